@@ -5,7 +5,10 @@ from eda.components.navigation import navigation, register_navigation_callbacks
 from eda.components.graphs import register_graph_callbacks
 from eda.data_correction.data_correction import register_data_correction_callbacks
 from eda.file_input.file_input import register_input_callbacks
+from eda.file_input.upload import register_upload_routes
 from eda.data_table.data_table import register_dataframe_callbacks
+from eda.data_table.download import register_download_routes
+from eda.dataset.sessions import register_session_routes
 
 from eda.components import H1
 from eda.components.statistics_1d import register_1d_stats_callbacks
@@ -58,6 +61,9 @@ app.layout = html.Div(id="main", children=[
 
     dcc.Store(id="dataframe"),
     dcc.Store(id="base_dtypes"),
+    dcc.Store(id="upload_handle"),
+    dcc.Store(id="dataset_handle"),
+    dcc.Store(id="memory_report"),
     dcc.Store(id="file_column_separator"),
     dcc.Store(id="file_decimal_separator"),
     dcc.Store(id="active_section_id", data="data-edition-container"),
@@ -85,6 +91,9 @@ register_graph_callbacks()
 register_data_correction_callbacks()
 
 server = app.server
+register_session_routes(server)
+register_upload_routes(server)
+register_download_routes(server)
 
 if __name__ == "__main__":
     if DEVELOPMENT:
@@ -0,0 +1,108 @@
+// Sends files picked in the "upload-csv-data" dropzone to the chunked
+// /upload endpoint instead of letting dcc.Upload read them into a base64
+// data URL. When done, only a small handle is passed to the Dash callbacks.
+(function () {
+    const CHUNK_SIZE = 8 * 1024 * 1024;
+    const MAX_RETRIES = 5;
+    const UPLOAD_CONTAINER_ID = "upload-csv-data";
+
+    function sleep(ms) {
+        return new Promise((resolve) => setTimeout(resolve, ms));
+    }
+
+    function storageKey(file) {
+        return `eda-upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function setProgress(text) {
+        window.dash_clientside.set_props("upload-error", {children: text});
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, options);
+        if (!response.ok && response.status !== 409) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+    }
+
+    async function startOrResume(file) {
+        const key = storageKey(file);
+        const uploadId = window.localStorage.getItem(key);
+        if (uploadId) {
+            try {
+                return await requestJson(`upload/${uploadId}`);
+            } catch (e) {
+                window.localStorage.removeItem(key);
+            }
+        }
+        const status = await requestJson("upload", {method: "POST"});
+        window.localStorage.setItem(key, status.upload_id);
+        return status;
+    }
+
+    async function uploadFile(file) {
+        let status = await startOrResume(file);
+        let retries = 0;
+
+        while (status.offset < file.size) {
+            setProgress(`Przesyłanie pliku: ${Math.floor(100 * status.offset / file.size)}%`);
+            const chunk = file.slice(status.offset, status.offset + CHUNK_SIZE);
+            try {
+                status = await requestJson(
+                    `upload/${status.upload_id}?offset=${status.offset}`,
+                    {method: "PUT", body: chunk}
+                );
+                retries = 0;
+            } catch (e) {
+                if (++retries > MAX_RETRIES) {
+                    throw e;
+                }
+                await sleep(1000 * 2 ** retries);
+                status = await requestJson(`upload/${status.upload_id}`);
+            }
+        }
+
+        window.localStorage.removeItem(storageKey(file));
+        setProgress("");
+        window.dash_clientside.set_props("upload_handle", {
+            data: {
+                upload_id: status.upload_id,
+                filename: file.name,
+                size: file.size,
+                // Checked by the server like the type of a data URL
+                type: file.type,
+            },
+        });
+    }
+
+    function interceptFiles(event, files) {
+        if (!window.dash_clientside || !window.dash_clientside.set_props) {
+            return;
+        }
+        if (!files || files.length === 0) {
+            return;
+        }
+        event.preventDefault();
+        event.stopPropagation();
+        if (event.target.value) {
+            event.target.value = "";
+        }
+        uploadFile(files[0]).catch((e) => {
+            setProgress(`Nie udało się przesłać pliku: ${e.message}`);
+        });
+    }
+
+    // Capturing on the document runs before the dropzone's own handlers.
+    document.addEventListener("change", (event) => {
+        if (event.target.closest && event.target.closest(`#${UPLOAD_CONTAINER_ID}`)) {
+            interceptFiles(event, event.target.files);
+        }
+    }, true);
+
+    document.addEventListener("drop", (event) => {
+        if (event.target.closest && event.target.closest(`#${UPLOAD_CONTAINER_ID}`)) {
+            interceptFiles(event, event.dataTransfer && event.dataTransfer.files);
+        }
+    }, true);
+})();
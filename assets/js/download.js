@@ -0,0 +1,22 @@
+// Starts the downloads served by the download route, see
+// eda/data_table/download.py. The browser saves the streamed file
+// itself, so it never passes through the Dash store.
+(function () {
+    function start(request) {
+        if (request && request.url) {
+            const link = document.createElement("a");
+            link.href = request.url;
+            link.download = "";
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+        }
+        return window.dash_clientside.no_update;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        download: {
+            start: start,
+        },
+    });
+})();
@@ -0,0 +1,229 @@
+// Journal of the edits made in the "data-table" since the last save, see
+// eda/data_table/edit_journal.py. Saving applies the journal to the saved
+// JSON in the browser, so the table is not sent to the server and back.
+// The same edits are queued in "table-version" until the server stores
+// them as a new version for the version history.
+(function () {
+    function noUpdate() {
+        return window.dash_clientside.no_update;
+    }
+
+    function sameRow(row, previous) {
+        if (row === previous) {
+            return true;
+        }
+        return Object.keys(row).every((key) => row[key] === previous[key]);
+    }
+
+    function changedValues(row, previous) {
+        // Fields missing from the row belong to a deleted column, which is
+        // recorded by recordColumns.
+        let values = null;
+        for (const key of Object.keys(row)) {
+            if (row[key] !== previous[key]) {
+                values = values || {};
+                values[key] = row[key] === undefined ? null : row[key];
+            }
+        }
+        return values;
+    }
+
+    function withEdits(journal, edits, changes) {
+        return Object.assign({}, journal, changes, {edits: journal.edits.concat(edits)});
+    }
+
+    function recorded(journal, tableVersion, edits, changes) {
+        if (!edits.length) {
+            return [noUpdate(), noUpdate()];
+        }
+        return [
+            withEdits(journal, edits, changes),
+            // Callbacks about the table take edited versions as changed
+            // everywhere, see triggering_changes in table_patch.py
+            tableVersion ? withEdits(tableVersion, edits, {changes: null}) : noUpdate(),
+        ];
+    }
+
+    function recordData(timestamp, data, previous, journal, tableVersion) {
+        if (!journal || !data || !previous) {
+            return [noUpdate(), noUpdate()];
+        }
+
+        const edits = [];
+        if (data.length < previous.length) {
+            // Positions of the deleted rows, as they were before the deletion
+            const rows = [];
+            let position = 0;
+            for (let row = 0; row < previous.length; row++) {
+                if (position < data.length && sameRow(data[position], previous[row])) {
+                    position++;
+                } else {
+                    rows.push(row);
+                }
+            }
+            edits.push({op: "delete_rows", rows: rows});
+        } else {
+            for (let row = 0; row < data.length; row++) {
+                const values = row < previous.length
+                    ? changedValues(data[row], previous[row])
+                    : null;
+                if (values) {
+                    edits.push({op: "cells", row: row, values: values});
+                }
+            }
+        }
+        return recorded(journal, tableVersion, edits);
+    }
+
+    function recordColumns(columns, journal, tableVersion) {
+        if (!journal || !columns) {
+            return [noUpdate(), noUpdate()];
+        }
+
+        const names = Object.assign({}, journal.names);
+        const ids = new Set(columns.map((column) => column.id));
+        const edits = [];
+        for (const id of Object.keys(journal.names)) {
+            if (!ids.has(id)) {
+                edits.push({op: "delete_column", column: id});
+                delete names[id];
+            }
+        }
+        for (const column of columns) {
+            if (column.id in names && names[column.id] !== column.name) {
+                edits.push({op: "rename", column: column.id, name: column.name});
+                names[column.id] = column.name;
+            }
+        }
+        return recorded(journal, tableVersion, edits, {names: names});
+    }
+
+    function tableColumn(data, id) {
+        return data.map((row) => (row[id] === undefined ? null : row[id]));
+    }
+
+    function savedColumns(storedJson, journal) {
+        // The saved JSON holds column names and rows, see frame_json in
+        // eda/dataset/transport.py
+        const stored = JSON.parse(storedJson);
+        const positions = new Map(stored.columns.map((name, position) => [name, position]));
+        const columns = {};
+        for (const [id, key] of Object.entries(journal.keys)) {
+            if (positions.has(key)) {
+                const position = positions.get(key);
+                columns[id] = stored.data.map((row) => row[position]);
+            }
+        }
+        return columns;
+    }
+
+    function applyEdits(journal, storedJson, data) {
+        const edits = journal.edits;
+        if (edits.some((edit) => edit.op === "replace")) {
+            return null;
+        }
+
+        const columns = savedColumns(storedJson, journal);
+        // Columns replaced on the server are taken from the table once the
+        // rows match, after the deletions have been applied.
+        const copied = new Set();
+        for (const edit of edits) {
+            switch (edit.op) {
+                case "cells":
+                    for (const [id, value] of Object.entries(edit.values)) {
+                        if (id in columns) {
+                            columns[id][edit.row] = value;
+                        }
+                    }
+                    break;
+                case "delete_rows": {
+                    const rows = edit.rows.slice().sort((a, b) => b - a);
+                    for (const values of Object.values(columns)) {
+                        for (const row of rows) {
+                            values.splice(row, 1);
+                        }
+                    }
+                    break;
+                }
+                case "columns":
+                    edit.columns.forEach((id) => copied.add(id));
+                    break;
+                case "delete_column":
+                    delete columns[edit.column];
+                    break;
+            }
+        }
+        for (const id of copied) {
+            columns[id] = tableColumn(data, id);
+        }
+
+        const inSync = Object.values(columns).every((values) => values.length === data.length);
+        return inSync ? columns : null;
+    }
+
+    function toJson(names, columns, order) {
+        const rows = order || Array.from({length: columns.length ? columns[0].length : 0}, (_, row) => row);
+        const data = rows.map((row) => columns.map((values) => (values[row] === undefined ? null : values[row])));
+        return JSON.stringify({columns: names, data: data});
+    }
+
+    function isReordered(indices, length) {
+        return indices.length !== length || indices.some((row, position) => row !== position);
+    }
+
+    function savedHistory(history, tableVersion, order) {
+        // The saved version is the current one, unless it still waits for
+        // edits; then the server marks the version it makes from them
+        if (!tableVersion || (!tableVersion.edits.length && !order)) {
+            const saved = history.entries[history.position];
+            return [Object.assign({}, history, {saved: saved}), noUpdate()];
+        }
+        const edits = order ? tableVersion.edits.concat([{op: "rows", rows: order}]) : tableVersion.edits;
+        return [noUpdate(), Object.assign({}, tableVersion, {edits: edits, save: true, changes: null})];
+    }
+
+    function save(nClicks, journal, storedJson, dtypes, currentDataset, data, tableColumns, indices, history, tableVersion) {
+        if (currentDataset !== null && currentDataset !== undefined) {
+            return [
+                noUpdate(),
+                Object.assign({}, dtypes),
+                currentDataset,
+                noUpdate(),
+                noUpdate(),
+                ...savedHistory(history, null, null),
+            ];
+        }
+
+        const columns = applyEdits(journal, storedJson, data) || {};
+        const names = tableColumns.map((column) => column.name);
+        const values = tableColumns.map((column) => columns[column.id] || tableColumn(data, column.id));
+        // The saved version holds the rows as filtered and sorted in the table
+        const order = indices && isReordered(indices, data.length) ? indices : null;
+
+        const storedDtypes = {};
+        const ids = {};
+        for (const column of tableColumns) {
+            if (column.id in dtypes) {
+                storedDtypes[column.name] = dtypes[column.id];
+            }
+            ids[column.id] = column.name;
+        }
+
+        return [
+            toJson(names, values, order),
+            storedDtypes,
+            noUpdate(),
+            {keys: ids, names: Object.assign({}, ids), edits: []},
+            order ? order.map((row) => data[row]) : noUpdate(),
+            ...savedHistory(history, tableVersion, order),
+        ];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        edit_journal: {
+            record_data: recordData,
+            record_columns: recordColumns,
+            save: save,
+        },
+    });
+})();
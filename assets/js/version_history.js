@@ -0,0 +1,42 @@
+// Adds the versions stored by the server to the version history of the
+// table, see eda/data_table/history.py.
+(function () {
+    function noUpdate() {
+        return window.dash_clientside.no_update;
+    }
+
+    function push(entry, history, tableVersion) {
+        if (!entry || !history) {
+            return [noUpdate(), noUpdate()];
+        }
+        // A version made from table edits only counts when it was made from
+        // the current version, and the edits made since then stay pending
+        const fromEdits = entry.base !== undefined;
+        if (fromEdits && (!tableVersion || tableVersion.version !== entry.base)) {
+            return [noUpdate(), noUpdate()];
+        }
+
+        const entries = history.entries.slice(0, history.position + 1).concat([entry]);
+        const next = Object.assign({}, history, {entries: entries, position: entries.length - 1});
+        if (entry.saved) {
+            next.saved = entry;
+        }
+
+        if (!tableVersion) {
+            return [next, noUpdate()];
+        }
+        return [next, {
+            version: entry.version,
+            edits: fromEdits ? tableVersion.edits.slice(entry.applied) : [],
+            save: Boolean(tableVersion.save && !entry.saved),
+            // What the server changed, for the callbacks about the table
+            changes: entry.changes || null,
+        }];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        version_history: {
+            push: push,
+        },
+    });
+})();
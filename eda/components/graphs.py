@@ -4,6 +4,7 @@ import pandas as pd
 import plotly.express as px
 
 from eda.data_table.column_type import is_number_type, is_categorical_type, is_data_type
+from eda.data_table.history import load_table
 
 
 def register_graph_callbacks():
@@ -14,15 +15,24 @@ def register_graph_callbacks():
         Input('2d-dropdown2', 'value'),
         Input('stats-2d__reverse', 'n_clicks'),
         State('stored-dtypes', 'data'),
-        State('data-table', 'data'),
+        State('table-version', 'data'),
         Input('start-row', 'value'),
         Input('end-row', 'value'),
+        State('current-dataset', 'data'),
         prevent_initial_call=True
     )
-    def generate_charts(x, y, clicks, dtypes, df, start_row, end_row):
-        if x is None or y is None or df is None:
+    def generate_charts(x, y, clicks, dtypes, current_version, start_row, end_row, current_dataset):
+        if x is None or y is None:
             raise PreventUpdate
-        data = pd.DataFrame(df)
+        if current_dataset is not None:
+            # Only the selected row range of both columns is read from
+            # the mapped file, so the helpers get an already sliced frame.
+            stop = None if end_row is None else end_row + 1
+            data = load_table(current_version, current_dataset, [x, y], start_row, stop)
+            data.reset_index(drop=True, inplace=True)
+            start_row, end_row = 0, len(data) - 1
+        else:
+            data = load_table(current_version, None, [x, y])
 
         charts = [
             generate_scatter_plot(clicks, data, x, y, start_row, end_row),
@@ -47,10 +47,15 @@ def register_navigation_callbacks():
         Output("navigation", "className"),
         State("navigation", "className"),
         Input("upload-csv-data", "contents"),
+        Input("upload_handle", "data"),
         prevent_initial_call=True
     )
-    def on_upload(class_name: str, content: str | None) -> str:
-        if content is None:
+    def on_upload(
+        class_name: str,
+        content: str | None,
+        upload_handle: dict | None
+    ) -> str:
+        if content is None and upload_handle is None:
             raise PreventUpdate
         return class_name.replace("hidden", "block")
 
@@ -9,6 +9,8 @@ from pandas.core.dtypes.common import is_numeric_dtype
 from eda.destats import *
 from eda.components import H2, H3, H6, P, GridDiv
 from eda.data_table.column_type import is_number_type, is_categorical_type
+from eda.data_table.history import load_table
+from eda.data_table.table_patch import triggering_changes, waits_for_version
 
 
 def register_1d_stats_callbacks():
@@ -21,7 +23,7 @@ def register_1d_stats_callbacks():
         Input('dataframe', 'data'),
         prevent_initial_call=True
     )
-    def render(df_json: str):
+    def render(df_payload: str):
         return html.Div(id="stats-1d", children=[
             H2("Statystki opisowe 1D"),
 
@@ -43,11 +45,17 @@ def register_1d_stats_callbacks():
 
     @callback(
         Output('stats-1d__multiselect', 'children'),
-        Input('data-table', 'data'),
+        Input('table-version', 'data'),
+        Input('current-dataset', 'data'),
+        Input('changed-columns', 'data'),
         prevent_initial_call=True
     )
-    def update_dropdowns(data_table):
-        df = pd.DataFrame(data_table)
+    def update_dropdowns(current_version, current_dataset, changed_columns):
+        # Corrections and type changes keep the names of the columns
+        if waits_for_version(current_version) \
+                or triggering_changes(changed_columns, current_version) is not None:
+            raise PreventUpdate
+        df = load_table(current_version, current_dataset, stop=0)
         options = [{'label': col, 'value': col} for col in df.columns]
         dropdown = html.Div([
             H3("Wybór zmiennych"),
@@ -66,16 +74,17 @@ def register_1d_stats_callbacks():
         Output('stats-1d__charts', 'children'),
         Output("stats-1d__main", "className"),
         Input('multi-select-dropdown', 'value'),
-        State('data-table', 'data'),
+        State('table-version', 'data'),
         State('stored-dtypes', 'data'),
         State("stats-1d__main", "className"),
+        State('current-dataset', 'data'),
         prevent_initial_call=True
     )
-    def computing_stats(columns, data, dtypes, chart_class_name):
+    def computing_stats(columns, current_version, dtypes, chart_class_name, current_dataset):
         if columns is None:
             raise PreventUpdate
 
-        df = pd.DataFrame(data)
+        df = load_table(current_version, current_dataset, columns)
         numeric_columns = []
         categorical_columns = []
         charts = []
@@ -84,15 +93,15 @@ def register_1d_stats_callbacks():
             if is_number_type(dtypes[col]):
                 numeric_columns.append(col)
                 charts.extend([
-                    histogram_chart(col, data),
-                    box_chart(col, data),
-                    violin_chart(col, data)
+                    histogram_chart(col, df),
+                    box_chart(col, df),
+                    violin_chart(col, df)
                 ])
             else:
                 categorical_columns.append(col)
                 charts.extend([
-                    bar_chart(col, data),
-                    pie_chart(col, data)
+                    bar_chart(col, df),
+                    pie_chart(col, df)
                 ])
 
         return (numeric_stats(numeric_columns, df) + categorical_stats(categorical_columns,df),
@@ -110,50 +119,30 @@ def register_1d_stats_callbacks():
             "Rozstęp",
             "Skośność/asymetria rozkładu"
         ]
-        functions = [
-            na_count_1d,
-            median_1d,
-            mean_1d,
-            std_deviation_1d,
-            variance_1d,
-            range_1d,
-            skewness_1d
-        ]
+        statistics = ["na_count", "median", "mean", "std", "variance", "range", "skewness"]
+        summary = describe_1d(df[columns], [0.25, 0.5, 0.75])
 
         stats = [
             html.Div(children=[
                 H6(label),
-                P(children=[html.Pre(f"{col}: {np.round(function(df[col]), 3)}") for col in columns])
+                P(children=[html.Pre(f"{col}: {np.round(summary.at[col, statistic], 3)}") for col in columns])
             ])
-            for label, function in zip(labels, functions)
+            for label, statistic in zip(labels, statistics)
         ]
         stats += [
             html.Div(children=[
                 H6("Kwantyle"),
-                P(className="stats__paragraph", children=[
-                    "¼",
-                    html.Pre(children=[
-                        f"{col}: {np.round(quantiles_1d(df[col], [0.25])[0.25], 3)}\n"
-                        for col in columns],
-                        className="stats__value"
-                    ),
-                ]),
-                P(className="stats__paragraph", children=[
-                    "½",
-                    html.Pre(children=[
-                        f"{col}: {np.round(quantiles_1d(df[col], [0.5])[0.5], 3)}\n"
-                        for col in columns],
-                        className="stats__value"
-                    ),
-                ]),
-                P(className="stats__paragraph", children=[
-                    "¾",
-                    html.Pre(children=[
-                        f"{col}: {np.round(quantiles_1d(df[col], [0.75])[0.75], 3)}\n"
-                        for col in columns],
-                        className="stats__value"
-                    ),
-                ]),
+                *[
+                    P(className="stats__paragraph", children=[
+                        label,
+                        html.Pre(children=[
+                            f"{col}: {np.round(summary.at[col, level], 3)}\n"
+                            for col in columns],
+                            className="stats__value"
+                        ),
+                    ])
+                    for label, level in (("¼", 0.25), ("½", 0.5), ("¾", 0.75))
+                ],
             ])
         ]
 
@@ -175,15 +164,16 @@ def register_1d_stats_callbacks():
     @callback(
         Output('stats-1d__details', 'children'),
         Input('multi-select-dropdown', 'value'),
-        State('data-table', 'data'),
+        State('table-version', 'data'),
         State('stored-dtypes', 'data'),
+        State('current-dataset', 'data'),
         prevent_initial_call=True
     )
-    def generate_tables(columns, data, dtypes):
-        if data is None or columns is None:
+    def generate_tables(columns, current_version, dtypes, current_dataset):
+        if columns is None:
             raise PreventUpdate
 
-        df = pd.DataFrame(data)
+        df = load_table(current_version, current_dataset, columns)
 
         numeric_columns = []
         categorical_columns = []
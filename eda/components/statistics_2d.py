@@ -4,16 +4,24 @@ from pandas.core.dtypes.common import is_numeric_dtype
 
 from eda.destats import *
 from eda.components import H2, H3, H6, P, GridDiv
+from eda.data_table.history import load_table
+from eda.data_table.table_patch import triggering_changes, waits_for_version
+from eda.dataset.mapped import MappedDataset
+from eda.dataset.transport import decode_frame
 
 
 def register_2d_stats_callbacks():
     @callback(
         Output("statistic_2d_output", "children", allow_duplicate=True),
         Input("dataframe", "data"),
+        State("dataset_handle", "data"),
         prevent_initial_call=True
     )
-    def render(df_json: str):
-        df = pd.read_json(df_json)
+    def render(df_payload: str, dataset_id: str | None):
+        if dataset_id is not None:
+            row_count = MappedDataset(dataset_id).num_rows
+        else:
+            row_count = len(decode_frame(df_payload))
         return html.Div(id="stats-2d", children=[
             H2("Statystki opisowe 2D"),
             H3("Wybór zmiennych"),
@@ -22,10 +30,10 @@ def register_2d_stats_callbacks():
             html.Div(id="stats-2d__tables"),
             html.Div([
                 html.Label("Wybierz zakres wierszy:"),
-                dcc.Input(id='start-row', type='number', placeholder='Początkowy wiersz', min=0, max=len(df) - 1,
+                dcc.Input(id='start-row', type='number', placeholder='Początkowy wiersz', min=0, max=row_count - 1,
                           value=0),
-                dcc.Input(id='end-row', type='number', placeholder='Końcowy wiersz', min=0, max=len(df) - 1,
-                          value=len(df) - 1)
+                dcc.Input(id='end-row', type='number', placeholder='Końcowy wiersz', min=0, max=row_count - 1,
+                          value=row_count - 1)
             ]),
             GridDiv(id='stats-2d__charts', columns_count=2),
             html.Div(id='stats-2d__reverse'),
@@ -33,11 +41,17 @@ def register_2d_stats_callbacks():
 
     @callback(
         Output("stats-2d__dropdown", "children"),
-        Input("data-table", "data"),
+        Input("table-version", "data"),
+        Input("current-dataset", "data"),
+        Input("changed-columns", "data"),
         prevent_initial_call=True
     )
-    def update_dropdowns(data_table):
-        df = pd.DataFrame(data_table)
+    def update_dropdowns(current_version, current_dataset, changed_columns):
+        # Corrections and type changes keep the names of the columns
+        if waits_for_version(current_version) \
+                or triggering_changes(changed_columns, current_version) is not None:
+            raise PreventUpdate
+        df = load_table(current_version, current_dataset, stop=0)
         options = [{"label": col, "value": col} for col in df.columns]
 
         return [
@@ -49,14 +63,15 @@ def register_2d_stats_callbacks():
         Output('stats-2d__summary', 'children'),
         Input('2d-dropdown1', 'value'),
         Input('2d-dropdown2', 'value'),
-        State('data-table', 'data'),
+        State('table-version', 'data'),
+        State('current-dataset', 'data'),
         prevent_initial_call=True
     )
-    def computing_stats(x, y, data):
+    def computing_stats(x, y, current_version, current_dataset):
         if x is None or y is None:
             raise PreventUpdate
 
-        df = pd.DataFrame(data)
+        df = load_table(current_version, current_dataset, [x, y])
 
         if is_numeric_dtype(df[x]) and is_numeric_dtype(df[y]):
             return numeric_stats(df, x, y)
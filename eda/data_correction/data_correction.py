@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from pandas.core.dtypes.common import is_numeric_dtype
 from dash import (
@@ -8,23 +9,38 @@ from dash import (
   Output,
   no_update,
   State,
+  Patch,
 )
 from dash.exceptions import PreventUpdate
 import dash_ag_grid as dag
 
 from eda.data_correction.missing_values import handle_missing_values
 from eda.data_correction.outliers import handle_outliers
+from eda.data_table.edit_journal import journal_edits
+from eda.data_table.history import derived_version, load_table, version_entry
+from eda.data_table.table_patch import table_changes, table_update, triggering_changes, waits_for_version
+from eda.dataset.mapped import MappedDataset
 from eda.components import H2, H3, H4, Button, GridDiv
 
 
 def register_data_correction_callbacks():
     @callback(
         Output("data-correction-container", "children"),
-        Input("data-table", "data"),
+        Input("table-version", "data"),
+        Input("current-dataset", "data"),
+        Input("changed-columns", "data"),
         prevent_initial_call=True,
     )
-    def data_correction(df):
-        df = pd.DataFrame(df)
+    def data_correction(current_version, current_dataset, changed_columns):
+        if waits_for_version(current_version):
+            raise PreventUpdate
+        # New values keep the columns and their types, so the panel and the
+        # choices made in it stay as they are
+        changes = triggering_changes(changed_columns, current_version)
+        if changes is not None and not changes["types"]:
+            raise PreventUpdate
+        # Only the columns and their types are needed
+        df = load_table(current_version, current_dataset, stop=0)
         return html.Div([
             H2("Poprawa danych"),
             missing_values_dropdown(df),
@@ -34,11 +50,13 @@ def register_data_correction_callbacks():
     @callback(
         Output("missing-values-method", "options"),
         Input("missing-values-column", "value"),
-        State("data-table", "data"),
+        State("table-version", "data"),
+        State("current-dataset", "data"),
     )
-    def method_dropdown(columns, df):
+    def method_dropdown(columns, table_version, current_dataset):
         if columns:
-            df = pd.DataFrame(df)
+            # Only the types of the columns are needed
+            df = load_table(table_version, current_dataset, columns, stop=0)
             numeric_only = True
             for column in columns:
                 if not is_numeric_dtype(df[column]):
@@ -59,60 +77,140 @@ def register_data_correction_callbacks():
 
     @callback(
         Output("data-table", "data", allow_duplicate=True),
+        Output("current-dataset", "data", allow_duplicate=True),
+        Output("edit-journal", "data", allow_duplicate=True),
+        Output("changed-columns", "data", allow_duplicate=True),
+        Output("new-version", "data", allow_duplicate=True),
         Input("missing-values-button", "n_clicks"),
         State("missing-values-column", "value"),
         State("missing-values-method", "value"),
         State("custom-missing-value", "value"),
-        State("data-table", "data"),
+        State("current-dataset", "data"),
+        State("data-table", "columns"),
+        State("current-dtypes", "data"),
+        State("table-version", "data"),
         prevent_initial_call=True,
     )
-    def button_callback(n_clicks, columns, method, missing_values, df):
+    def button_callback(n_clicks, columns, method, missing_values, current_dataset, table_columns, dtypes, table_version):
         if n_clicks and columns and method and n_clicks > 0:
-            df = pd.DataFrame(df)
+            if current_dataset is not None:
+                dataset = MappedDataset(current_dataset)
+                df = dataset.read(columns)
+                for column in columns:
+                    df = handle_missing_values(df, column, method, missing_values=missing_values)
+                dataset = dataset.derive(
+                    columns=df,
+                    keep=np.isin(np.arange(dataset.num_rows), df.index)
+                )
+                changes = table_changes(columns, rows=len(df) < dataset.num_rows)
+                entry = version_entry(dataset.dataset_id, dtypes, table_columns)
+                return no_update, dataset.dataset_id, no_update, changes, entry
+
+            records = load_table(table_version, None)
+            df = records.copy()
             for column in columns:
                 df = handle_missing_values(df, column, method, missing_values=missing_values)
-            return df.to_dict("records")
+            update = table_update(records, df, columns)
+            entry = version_entry(
+                derived_version(table_version, records, df, columns),
+                dtypes,
+                table_columns,
+                changes=update.changes
+            )
+            return update.data, no_update, journal_edits(update.edits), update.changes, entry
         else:
-            return no_update
+            return no_update, no_update, no_update, no_update, no_update
 
     @callback(
         Output("data-table", "data", allow_duplicate=True),
+        Output("current-dataset", "data", allow_duplicate=True),
+        Output("edit-journal", "data", allow_duplicate=True),
+        Output("changed-columns", "data", allow_duplicate=True),
+        Output("new-version", "data", allow_duplicate=True),
         Input("outliers-button", "n_clicks"),
         State("outliers-column", "value"),
         State("outliers-find-method", "value"),
         State("outliers-fix-method", "value"),
-        State("data-table", "data"),
+        State("current-dataset", "data"),
+        State("data-table", "columns"),
+        State("current-dtypes", "data"),
+        State("table-version", "data"),
         prevent_initial_call=True,
     )
-    def button_callback(n_clicks, columns, find_method, fix_method, df):
+    def button_callback(n_clicks, columns, find_method, fix_method, current_dataset, table_columns, dtypes, table_version):
         if n_clicks and columns and n_clicks > 0:
-            df = pd.DataFrame(df)
-            return handle_outliers(df, columns, find_method, fix_method).to_dict("records")
+            if current_dataset is not None:
+                dataset = MappedDataset(current_dataset)
+                df = handle_outliers(dataset.read(columns), columns, find_method, fix_method)
+                dataset = dataset.derive(columns=df)
+                entry = version_entry(dataset.dataset_id, dtypes, table_columns)
+                return no_update, dataset.dataset_id, no_update, table_changes(columns), entry
+
+            records = load_table(table_version, None)
+            df = handle_outliers(records.copy(), columns, find_method, fix_method)
+            update = table_update(records, df, columns)
+            entry = version_entry(
+                derived_version(table_version, records, df, columns),
+                dtypes,
+                table_columns,
+                changes=update.changes
+            )
+            return update.data, no_update, journal_edits(update.edits), update.changes, entry
         else:
-            return no_update
+            return no_update, no_update, no_update, no_update, no_update
 
     @callback(
         Output("missing-values-table", "rowData"),
-        Input("data-table", "data")
+        Input("table-version", "data"),
+        Input("current-dataset", "data"),
+        Input("changed-columns", "data"),
     )
-    def table_data(data):
-        df = pd.DataFrame(data)
-        table_data_list = []
-        for col in df.columns:
-            missing = df[col].isna()
-            missing_list = []
-            for i in range(len(missing)):
-                if missing[i]:
-                    missing_list.append(str(i))
-            rows = ", ".join(missing_list)
-            print(rows)
-
-            table_data_list.append({
-                "col": col,
-                "number": missing.sum(),
-                "rows": rows,
-            })
-        return table_data_list
+    def table_data(current_version, current_dataset, changed_columns):
+        if waits_for_version(current_version):
+            raise PreventUpdate
+        changes = triggering_changes(changed_columns, current_version)
+        if current_dataset is not None:
+            missing_rows = MappedDataset(current_dataset).missing_rows()
+            return [
+                {
+                    "col": col,
+                    "number": len(rows),
+                    "rows": ", ".join(map(str, rows)),
+                }
+                for col, rows in missing_rows.items()
+            ]
+
+        # Row numbers only move when rows are deleted, and a change of types
+        # renders the panel again; otherwise just the changed columns are
+        # counted again
+        if changes is not None and not changes["rows"] and not changes["types"]:
+            columns = load_table(current_version, None, stop=0).columns
+            positions = {column: position for position, column in enumerate(columns)}
+            df = load_table(current_version, None, changes["columns"])
+            row_data = Patch()
+            for col, row in zip(df.columns, missing_values_rows(df)):
+                row_data[positions[col]] = row
+            return row_data
+
+        return missing_values_rows(load_table(current_version, None))
+
+
+def missing_values_rows(df: pd.DataFrame) -> list[dict]:
+    table_data_list = []
+    for col in df.columns:
+        missing = df[col].isna()
+        missing_list = []
+        for i in range(len(missing)):
+            if missing[i]:
+                missing_list.append(str(i))
+        rows = ", ".join(missing_list)
+
+        table_data_list.append({
+            "col": col,
+            "number": missing.sum(),
+            "rows": rows,
+        })
+    return table_data_list
 
 
 def missing_values_dropdown(df: pd.DataFrame) -> html.Div:
@@ -4,6 +4,8 @@ import re
 import pandas as pd
 import numpy as np
 
+from eda.data_table.datetime_format import parse_datetime
+
 ColumnType = Literal[
     "int64",
     "float64",
@@ -27,33 +29,196 @@ __NUMBER_REGEX = re.compile(r"^\d+([,\.]\d+)?$")
 __INT_REGEX = re.compile(r"^\d+([,\.]0)?$")
 __FLOAT_REGEX = re.compile(r"^\d+[,\.]\d+$")
 
+SAMPLE_ROWS = 1024
+
+__MAX_VECTORIZED_WIDTH = 64
+__CHUNK_ROWS = 64 * 1024
+__DIGIT_0, __DIGIT_9 = ord("0"), ord("9")
+__COMMA, __DOT, __NEWLINE = ord(","), ord("."), ord("\n")
+
+NumberMasks = NamedTuple("NumberMasks", [
+    ("number", np.ndarray),
+    ("int", np.ndarray),
+    ("float", np.ndarray),
+])
+
+
+def __match_regexes(strings: np.ndarray) -> NumberMasks:
+    return NumberMasks(
+        number=np.array([bool(__NUMBER_REGEX.match(s)) for s in strings], dtype=bool),
+        int=np.array([bool(__INT_REGEX.match(s)) for s in strings], dtype=bool),
+        float=np.array([bool(__FLOAT_REGEX.match(s)) for s in strings], dtype=bool),
+    )
+
+
+def __match_short_strings(strings: np.ndarray, lengths: np.ndarray) -> NumberMasks:
+    """Evaluates the number regexes on a character matrix.
+
+    Rows the matrix cannot decide the same way as `re` does (non-ASCII
+    digits, a trailing newline matched by `$`) are matched with the
+    regexes instead.
+    """
+    width = max(int(lengths.max(initial=0)), 1)
+    codes = strings.astype(f"U{width}").view(np.uint32).reshape(-1, width)
+    rows = np.arange(len(codes))
+    inside = np.arange(width) < lengths[:, None]
+    last_position = np.maximum(lengths - 1, 0)
+
+    digit = (codes >= __DIGIT_0) & (codes <= __DIGIT_9)
+    separator = (codes == __COMMA) | (codes == __DOT)
+    separator_count = separator.sum(axis=1)
+    last = codes[rows, last_position]
+
+    shape = (lengths > 0) \
+        & ((digit | separator) | ~inside).all(axis=1) \
+        & digit[:, 0]
+    number = shape & digit[rows, last_position] & (separator_count <= 1)
+    floating = number & (separator_count == 1)
+    integer = shape & (
+        (separator_count == 0)
+        | ((separator_count == 1)
+           & separator[rows, np.maximum(lengths - 2, 0)]
+           & (last == __DIGIT_0))
+    )
+
+    undecided = np.flatnonzero(
+        (codes > 127).any(axis=1) | ((lengths > 0) & (last == __NEWLINE))
+    )
+    if undecided.size:
+        matched = __match_regexes(strings[undecided].astype(str))
+        number[undecided] = matched.number
+        integer[undecided] = matched.int
+        floating[undecided] = matched.float
+
+    return NumberMasks(number=number, int=integer, float=floating)
+
+
+def __match_strings(values: np.ndarray) -> NumberMasks:
+    """Vectorized `re.match` of the number regexes over `str(value)`."""
+    masks = NumberMasks(*(np.zeros(len(values), dtype=bool) for _ in range(3)))
+
+    for start in range(0, len(values), __CHUNK_ROWS):
+        strings = np.array([str(value) for value in values[start:start + __CHUNK_ROWS]], dtype=object)
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+
+        # Long strings are rare in numeric columns and the regexes reject
+        # text early, so they are not worth widening the character matrix
+        short = lengths <= __MAX_VECTORIZED_WIDTH
+        for index, matched in (
+            (np.flatnonzero(short), __match_short_strings(strings[short], lengths[short])),
+            (np.flatnonzero(~short), __match_regexes(strings[~short])),
+        ):
+            masks.number[start + index] = matched.number
+            masks.int[start + index] = matched.int
+            masks.float[start + index] = matched.float
 
-def __is_number(value: any) -> bool:
-    if pd.isna(value):
-        return True
-    return bool(__NUMBER_REGEX.match(str(value)))
+    return masks
 
 
-def __is_int(value: any) -> bool:
-    if pd.isna(value):
-        return True
-    return bool(__INT_REGEX.match(str(value)))
+def __match_floats(values: np.ndarray) -> NumberMasks:
+    # repr() of a float has the form "<digits>.<digits>" unless it is
+    # negative, not finite or written in scientific notation, which
+    # happens for magnitudes below 1e-4 and from 1e16 up
+    positional = np.isfinite(values) & ~np.signbit(values) \
+        & ((values == 0) | ((values >= 1e-4) & (values < 1e16)))
+    with np.errstate(invalid="ignore"):
+        integral = positional & (values == np.floor(values))
+    return NumberMasks(number=positional, int=integral, float=positional)
 
 
-def __is_float(value: any) -> bool:
-    if pd.isna(value):
-        return True
-    return bool(__FLOAT_REGEX.match(str(value)))
+def number_masks(column: pd.Series) -> NumberMasks:
+    """Which values of the column match the number, int and float regexes.
+
+    The result is the same as matching `str(value)` of every value, with
+    missing values matching all three, but is computed per column.
+    """
+    missing = np.asarray(pd.isna(column), dtype=bool)
+    present = ~missing
+    dtype = column.dtype
+
+    if pd.api.types.is_bool_dtype(dtype) or dtype.kind in "mM":
+        matched = NumberMasks(*(np.zeros(present.sum(), dtype=bool),) * 3)
+    elif pd.api.types.is_integer_dtype(dtype):
+        values = column[present].to_numpy()
+        non_negative = values >= 0
+        matched = NumberMasks(
+            number=non_negative,
+            int=non_negative,
+            float=np.zeros(len(values), dtype=bool)
+        )
+    elif pd.api.types.is_float_dtype(dtype):
+        matched = __match_floats(column[present].to_numpy(dtype=np.float64))
+    else:
+        matched = __match_strings(column.to_numpy(dtype=object)[present])
+
+    masks = NumberMasks(*(missing.copy() for _ in range(3)))
+    masks.number[present] = matched.number
+    masks.int[present] = matched.int
+    masks.float[present] = matched.float
+    return masks
+
+
+def __sample_rejects(column: pd.Series, mask: str) -> bool:
+    """Checks one row from each of SAMPLE_ROWS equal strata of the column.
+
+    A single value outside the mask decides the column, so most text
+    columns are rejected without reading the rest of their rows.
+    """
+    size = len(column)
+    if size <= SAMPLE_ROWS:
+        return False
+    positions = (np.arange(SAMPLE_ROWS) * size + size // 2) // SAMPLE_ROWS
+    sample = number_masks(column.iloc[positions])
+    return not getattr(sample, mask).all()
+
+
+def __scan(column: pd.Series, stop_unless_int: bool = False) -> tuple[bool, bool, bool]:
+    """Checks the column chunk by chunk and stops at the first counter-example.
+
+    Returns whether all values are numbers, whether all are integers and
+    whether any is written with a fractional part.
+    """
+    all_int, any_float = True, False
+    for start in range(0, len(column), __CHUNK_ROWS):
+        masks = number_masks(column.iloc[start:start + __CHUNK_ROWS])
+        all_int = all_int and bool(masks.int.all())
+        any_float = any_float or bool(masks.float.any())
+        if not masks.number.all():
+            return False, False, any_float
+        if stop_unless_int and not all_int:
+            break
+    return True, all_int, any_float
+
+
+def classify_column(column: pd.Series) -> ColumnType | None:
+    """Returns "int64" or "float64" when every value reads as such a number.
+
+    A column the sample accepts is still verified in full, since the
+    conversion has to hold for every row.
+    """
+    if __sample_rejects(column, "number"):
+        return None
+
+    is_number, all_int, any_float = __scan(column)
+    if is_number and all_int:
+        return column_info[0].type
+    if is_number and any_float:
+        return column_info[1].type
+    return None
 
 
 def is_int_column(column: pd.Series) -> bool:
-    return column.apply(__is_int).all()
+    if __sample_rejects(column, "int"):
+        return False
+    _, all_int, _ = __scan(column, stop_unless_int=True)
+    return all_int
 
 
 def is_float_column(column: pd.Series) -> bool:
-    if not column.apply(__is_number).all():
+    if __sample_rejects(column, "number"):
         return False
-    return column.apply(__is_float).any()
+    is_number, _, any_float = __scan(column)
+    return is_number and any_float
 
 
 def is_number_type(column_type: str) -> bool:
@@ -83,10 +248,9 @@ def convert_dataframe_float_columns_to_int(df: pd.DataFrame) -> None:
 def convert_numeric_strings_to_numbers(df: pd.DataFrame) -> None:
     for name, values in df.items():
         if values.dtype == "object" or values.dtype == "float64":
-            if is_int_column(values):
-                convert_column_data_type(df, name, "int64")
-            elif is_float_column(values):
-                convert_column_data_type(df, name, "float64")
+            column_type = classify_column(values)
+            if column_type is not None:
+                convert_column_data_type(df, name, column_type)
 
 
 def convert_column_data_type(
@@ -99,8 +263,11 @@ def convert_column_data_type(
         case "object":
             df[column_name] = column.astype(str)
         case "int64":
-            df[column_name] = np.floor(pd.to_numeric(column)) \
-                .astype("Int64")
+            values = np.floor(pd.to_numeric(column))
+            # Nullable integers are only needed to hold missing values
+            df[column_name] = values.astype(
+                "Int64" if values.isna().any() else "int64"
+            )
         case "float64":
             if column.dtype == "object":
                 df[column_name] = pd.to_numeric(
@@ -109,10 +276,10 @@ def convert_column_data_type(
             else:
                 df[column_name] = pd.to_numeric(column)
         case "datetime64":
-            datetime_pattern = "%Y-%m-%dT%H:%M:%S"
-            df[column_name] = pd.to_datetime(
+            df[column_name] = parse_datetime(
                 column,
-                format=datetime_pattern
+                cache_key=str(column_name),
+                allow_epoch=True
             )
         case "category":
             df[column_name] = column.astype("category")
@@ -121,16 +288,18 @@ def convert_column_data_type(
 def get_types_from_dataframe(df: pd.DataFrame) -> dict[str, str]:
     result: dict[str, str] = {}
     for column in df:
-        column_type = df[column].dtype.name.lower()
-        for cinfo in column_info:
-            if column_type == cinfo.type:
-                result[column] = cinfo.type
-                break
-
-        if column not in result:
-            if column_info[2].type in column_type:
-                result[column] = column_info[2].type
-            else:
-                result[column] = column_info[3].type
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            result[column] = column_info[4].type
+        elif pd.api.types.is_bool_dtype(dtype):
+            result[column] = column_info[3].type
+        elif pd.api.types.is_integer_dtype(dtype):
+            result[column] = column_info[0].type
+        elif pd.api.types.is_float_dtype(dtype):
+            result[column] = column_info[1].type
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            result[column] = column_info[2].type
+        else:
+            result[column] = column_info[3].type
 
     return result
@@ -0,0 +1,49 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from eda.data_table.column_type import ColumnType, convert_column_data_type
+from eda.dataset.cache import LRUCache
+
+CONVERSION_CACHE_BYTES = int(os.getenv("EDA_CONVERSION_CACHE_BYTES", 256 * 1024 * 1024))
+
+
+def column_version(column: pd.Series) -> str:
+    """Fingerprints the values of a column, so equal columns share a version."""
+    hashes = pd.util.hash_pandas_object(column, index=False).to_numpy()
+    digest = hashlib.sha256(hashes.tobytes())
+    digest.update(str(column.dtype).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """Columns converted by convert_column_data_type.
+
+    Entries are keyed by (column version, column name, target type); the
+    least recently used ones are dropped once they exceed `max_bytes`, or
+    once the session that converted them exceeds its memory budget.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._entries = LRUCache("conversion", max_bytes)
+
+    def convert(
+        self,
+        version: str,
+        column: pd.Series,
+        column_type: ColumnType
+    ) -> pd.Series:
+        key = (version, str(column.name), column_type)
+        converted = self._entries.get(key)
+        if converted is not None:
+            return converted.copy()
+
+        df = column.to_frame()
+        convert_column_data_type(df, column.name, column_type)
+        converted = df[column.name]
+        self._entries.put(key, converted, int(converted.memory_usage(index=False, deep=True)))
+        return converted.copy()
+
+
+conversion_cache = ConversionCache(CONVERSION_CACHE_BYTES)
@@ -1,7 +1,6 @@
-from io import StringIO
+import math
 from copy import copy
 
-import pandas as pd
 from dash import (
     html,
     callback,
@@ -12,15 +11,71 @@ from dash import (
     State,
     ALL,
     no_update,
+    clientside_callback,
+    ClientsideFunction,
+    ctx,
 )
 
 from dash.exceptions import PreventUpdate
 
 from eda.components import H2, H3, P, Button, GridDiv
-from eda.data_table.column_type import (
-    column_info,
-    convert_column_data_type,
+from eda.data_table.column_type import column_info
+from eda.data_table.conversion_cache import column_version, conversion_cache
+from eda.data_table.download import download_formats, download_url
+from eda.data_table.edit_journal import journal_edits, new_journal
+from eda.data_table.history import (
+    current_entry,
+    derived_version,
+    load_table,
+    moved,
+    new_history,
+    pushed,
+    table_version,
+    version_entry,
 )
+from eda.data_table.memory import ColumnMemory, format_bytes
+from eda.data_table.table_patch import table_changes, table_update
+from eda.file_input.columnar_parser import write_columnar
+from eda.dataset.mapped import MappedDataset
+from eda.dataset.query import query_page
+from eda.dataset.transport import decode_frame, frame_json
+from eda.dataset.versions import version_store
+
+PAGE_SIZE = 15
+
+def memory_summary(memory: dict[str, list] | None) -> html.P | None:
+    if not memory:
+        return None
+    report = [ColumnMemory(*column) for column in memory.values()]
+    size = sum(column.bytes for column in report)
+    original_size = sum(column.original_bytes for column in report)
+    return P(
+        margin_y=True,
+        children=f"Zajętość pamięci: {format_bytes(size)}"
+                 + f" (przed zmniejszeniem typów: {format_bytes(original_size)})"
+    )
+
+
+def column_memory_label(column: list | None) -> html.P | None:
+    if column is None:
+        return None
+    column = ColumnMemory(*column)
+    return P(
+        className="text-xs",
+        children=f"{format_bytes(column.bytes)} ({column.dtype})"
+    )
+
+
+def table_columns(names: list[str], editable: bool) -> list[dict]:
+    return [
+        {
+            "name": name,
+            "id": name,
+            "deletable": editable,
+            "renamable": editable,
+        }
+        for name in names
+    ]
 
 
 def register_dataframe_callbacks():
@@ -30,51 +85,101 @@ def register_dataframe_callbacks():
         Output("navigation", "className", allow_duplicate=True),
         Input("dataframe", "data"),
         Input("base_dtypes", "data"),
+        State("dataset_handle", "data"),
+        State("memory_report", "data"),
         prevent_initial_call=True
     )
-    def render(df_json: str, base_dtypes: dict[str, str]) -> html.Div:
-        df = pd.read_json(StringIO(df_json))
+    def render(
+        df_payload: str,
+        base_dtypes: dict[str, str],
+        dataset_id: str | None,
+        memory: dict[str, list] | None
+    ) -> html.Div:
+        df = decode_frame(df_payload)
+        # The table of a large dataset only holds the visible page; paging,
+        # sorting and filtering run on the server and cells cannot be edited.
+        editable = dataset_id is None
+        table_action = "native" if editable else "custom"
+
+        preview_note = None
+        page_count = None
+        if editable:
+            version_id = version_store.add(df)
+        else:
+            version_id = dataset_id
+            num_rows = MappedDataset(dataset_id).num_rows
+            page_count = max(math.ceil(num_rows / PAGE_SIZE), 1)
+            df = df.head(PAGE_SIZE)
+            preview_note = P(
+                margin_y=True,
+                children=f"Duży plik: {num_rows} wierszy. Stronicowanie, sortowanie"
+                         + " i filtrowanie odbywa się na serwerze, edycja komórek jest wyłączona."
+            )
 
         return html.Div([
             dcc.Store(id="current-dtypes", data=copy(base_dtypes)),
             dcc.Store(id="stored-dtypes", data=copy(base_dtypes)),
-            dcc.Store(id="stored-dataframe", data=df_json),
+            dcc.Store(id="stored-dataframe", data=frame_json(df)),
+            dcc.Store(id="current-dataset", data=dataset_id),
+            dcc.Store(id="stored-dataset", data=dataset_id),
+            dcc.Store(id="edit-journal", data=new_journal(df.columns.tolist())),
+            dcc.Store(id="changed-columns"),
+            dcc.Store(id="version-history", data=new_history(version_entry(
+                version_id,
+                base_dtypes,
+                table_columns(df.columns.tolist(), editable)
+            ))),
+            dcc.Store(id="table-version", data=table_version(version_id if editable else None)),
+            dcc.Store(id="new-version"),
 
             H2("Przetwarzanie pliku"),
 
             H3("Podgląd zaimportowanego pliku CSV"),
+            preview_note,
             dash_table.DataTable(
                 id="data-table",
-                columns=[
-                    {
-                        "name": name,
-                        "id": name,
-                        "deletable": True,
-                        "renamable": True,
-                    }
-                    for name in df.columns.tolist()
-                ],
+                columns=table_columns(df.columns.tolist(), editable),
                 data=df.to_dict("records"),
-                filter_action='native',
-                sort_action="native",
+                filter_action=table_action,
+                sort_action=table_action,
                 sort_mode="multi",
-                editable=True,
-                row_deletable=True,
-                page_size=15,
+                page_action=table_action,
+                page_current=0,
+                page_count=page_count,
+                editable=editable,
+                row_deletable=editable,
+                page_size=PAGE_SIZE,
             ),
 
-            GridDiv(id="var-button-container", columns_count=4, margin_y=True, children=[
+            GridDiv(id="var-button-container", columns_count=6, margin_y=True, children=[
                 Button("Zapisz zmiany", id="save"),
+                Button("Cofnij", id="undo"),
+                Button("Ponów", id="redo"),
                 Button("Wróć do zapisanej wersji", id="reset-unsaved"),
                 Button("Wróć do pierwotnej wersji", id="reset-all"),
-                Button("Pobierz CSV", id="download"),
+                Button("Pobierz plik", id="download"),
+            ]),
+            GridDiv(columns_count=4, margin_y=True, children=[
+                P(children="Format pobieranego pliku"),
+                dcc.Dropdown(
+                    id="download-format",
+                    options=[
+                        {"label": label, "value": file_format}
+                        for file_format, (label, _, _) in download_formats.items()
+                    ],
+                    value="csv",
+                    searchable=False,
+                    clearable=False
+                ),
             ]),
 
             H3("Edytor zmiennych"),
+            memory_summary(memory),
             GridDiv(id="dropdown-container", columns_count=6),
             P(id="dropdown_status", margin_y=True),
 
             dcc.Download(id="download-file"),
+            dcc.Store(id="download-request"),
 
             html.Div(id="data-correction-container", className="py-6 block"),
         ]), "py-6 hidden", "w-full fixed inset-x-0 bottom-0 block"
@@ -83,9 +188,11 @@ def register_dataframe_callbacks():
     @callback(
         Output('dropdown-container', 'children'),
         Input('current-dtypes', 'data'),
-        Input('data-table', 'columns')
+        Input('data-table', 'columns'),
+        State('memory_report', 'data')
     )
-    def update_dropdowns(current_data_types, data_table_columns):
+    def update_dropdowns(current_data_types, data_table_columns, memory):
+        memory = memory or {}
         dropdowns = []
         for column in data_table_columns:
             column_name = column['name']
@@ -105,126 +212,328 @@ def register_dataframe_callbacks():
                             for cinfo in column_info
                         ],
                         value=column_type
-                    )
+                    ),
+                    column_memory_label(memory.get(column_id))
                 ])
             )
         return dropdowns
 
+    @callback(
+        Output('data-table', 'data', allow_duplicate=True),
+        Output('data-table', 'page_count'),
+        Input('data-table', 'page_current'),
+        Input('data-table', 'page_size'),
+        Input('data-table', 'sort_by'),
+        Input('data-table', 'filter_query'),
+        Input('current-dataset', 'data'),
+        prevent_initial_call=True
+    )
+    def update_page(page_current, page_size, sort_by, filter_query, current_dataset):
+        # Tables of in-memory data page, sort and filter in the browser
+        if current_dataset is None:
+            raise PreventUpdate
+
+        df, page_count = query_page(
+            MappedDataset(current_dataset),
+            page_current,
+            page_size,
+            sort_by,
+            filter_query
+        )
+        return df.to_dict('records'), page_count
+
     @callback(
         Output('dropdown_status', 'children'),
         Output('data-table', 'data'),
         Output('current-dtypes', 'data', allow_duplicate=True),
+        Output('current-dataset', 'data', allow_duplicate=True),
+        Output('edit-journal', 'data', allow_duplicate=True),
+        Output('changed-columns', 'data', allow_duplicate=True),
+        Output('new-version', 'data', allow_duplicate=True),
         Input({'type-dropdown': ALL}, 'value'),
         Input({'type-dropdown': ALL}, 'id'),
-        State('data-table', 'data'),
         State('data-table', 'columns'),
         State('current-dtypes', 'data'),
+        State('current-dataset', 'data'),
+        State('table-version', 'data'),
         prevent_initial_call=True
     )
-    def update_data_types(selected_values, column_ids, data_table_data, data_table_columns, current_data_types):
-        df = pd.DataFrame(data_table_data)
+    def update_data_types(selected_values, column_ids, data_table_columns, current_data_types, current_dataset, current_version):
+        # All dropdowns are inputs, but only the columns whose type differs
+        # from the current one are converted.
+        changed = {
+            column['id']: dtype
+            for column, dtype in zip(data_table_columns, selected_values)
+            if dtype != current_data_types[column['id']]
+        }
+        if not changed:
+            raise PreventUpdate
+        id_to_name = {column['id']: column['name'] for column in data_table_columns}
 
-        for column, dtype in zip(data_table_columns, selected_values):
-            column_id = column['id']
+        if current_dataset is not None:
+            dataset = MappedDataset(current_dataset)
+            df = dataset.read(list(changed))
+        else:
+            records = load_table(current_version, None)
+            df = records.copy()
+
+        for column_id, dtype in changed.items():
+            # A dataset version names fixed data, so it versions its columns
+            # too; table columns are versioned by their values.
+            version = current_dataset or column_version(df[column_id])
             try:
-                convert_column_data_type(df, column_id, dtype)
+                df[column_id] = conversion_cache.convert(version, df[column_id], dtype)
                 current_data_types[column_id] = dtype
-
             except Exception:
                 return (
                     "Wystąpił błąd przy zmianie typu kolumny"
-                        + f"{column['name']} na {dtype}",
+                        + f"{id_to_name[column_id]} na {dtype}",
+                    no_update,
+                    no_update,
+                    no_update,
+                    no_update,
                     no_update,
                     no_update
                 )
 
-        return "Poprawnie wybrane typy", df.to_dict('records'), current_data_types
+        if current_dataset is not None:
+            # Rewriting the mapped file is costly, so only the converted
+            # columns are passed on to the new version.
+            # The new version reaches the table through update_page
+            dataset = dataset.derive(columns=df)
+            return (
+                "Poprawnie wybrane typy",
+                no_update,
+                current_data_types,
+                dataset.dataset_id,
+                no_update,
+                table_changes(list(changed), types=True),
+                version_entry(dataset.dataset_id, current_data_types, data_table_columns)
+            )
+
+        # Only the cells whose values changed are sent to the table
+        update = table_update(records, df, list(changed), types=True)
+        version_id = derived_version(current_version, records, df, list(changed))
+        return (
+            "Poprawnie wybrane typy",
+            update.data,
+            current_data_types,
+            no_update,
+            journal_edits(update.edits),
+            update.changes,
+            version_entry(version_id, current_data_types, data_table_columns, changes=update.changes)
+        )
 
     @callback(
         Output('data-table', 'data', allow_duplicate=True),
         Output('data-table', 'columns', allow_duplicate=True),
         Output('current-dtypes', 'data', allow_duplicate=True),
+        Output('current-dataset', 'data', allow_duplicate=True),
+        Output('edit-journal', 'data', allow_duplicate=True),
+        Output('version-history', 'data', allow_duplicate=True),
+        Output('table-version', 'data', allow_duplicate=True),
+        Output('dropdown_status', 'children', allow_duplicate=True),
+        Input('undo', 'n_clicks'),
+        Input('redo', 'n_clicks'),
         Input('reset-unsaved', 'n_clicks'),
-        State('stored-dataframe', 'data'),
-        State('stored-dtypes', 'data'),
+        Input('reset-all', 'n_clicks'),
+        State('version-history', 'data'),
+        State('dataset_handle', 'data'),
         prevent_initial_call=True
     )
-    def reset_data_to_saved_version(n_clicks, stored_df_json, stored_data_types):
-        df = pd.read_json(StringIO(stored_df_json))
-        columns=[
-            {
-                'name': name,
-                'id': name,
-                'deletable': True,
-                'renamable': True,
-            }
-            for name in df.columns.tolist()
-        ]
-
-        return df.to_dict('records'), columns, stored_data_types
+    def restore_version(undo_clicks, redo_clicks, reset_unsaved_clicks, reset_all_clicks, history, dataset_handle):
+        # Every version is kept whole, so going back to the saved or the
+        # original one is a step of the history like undo and redo.
+        match ctx.triggered_id:
+            case 'undo':
+                history = moved(history, -1)
+            case 'redo':
+                history = moved(history, 1)
+            case 'reset-unsaved':
+                history = pushed(history, history['saved'])
+            case 'reset-all':
+                history = pushed(history, history['entries'][0])
+        if history is None:
+            raise PreventUpdate
+
+        entry = current_entry(history)
+        columns = entry['columns']
+        names = {column['id']: column['name'] for column in columns}
+        dataset_id = None
+        data = no_update
+        if dataset_handle is not None:
+            # The new version reaches the table through update_page
+            try:
+                dataset_id = MappedDataset(entry['version']).dataset_id
+            except TypeError:
+                pass
+        else:
+            df = version_store.frame(entry['version'])
+            if df is not None:
+                data = df.to_dict('records')
+
+        if dataset_id is None and data is no_update:
+            return (
+                no_update,
+                no_update,
+                no_update,
+                no_update,
+                no_update,
+                no_update,
+                no_update,
+                "Ta wersja nie jest już dostępna"
+            )
+        # The saved JSON stays as it is, so the journal saves the whole
+        # table unless it shows the saved version again
+        replaced = entry['version'] != history['saved']['version']
+        return (
+            data,
+            columns,
+            copy(entry['dtypes']),
+            dataset_id,
+            new_journal(list(names), replaced=replaced, names=names),
+            history,
+            table_version(entry['version'] if dataset_id is None else None),
+            None
+        )
 
     @callback(
-        Output('data-table', 'data', allow_duplicate=True),
-        Output('data-table', 'columns', allow_duplicate=True),
-        Output('current-dtypes', 'data', allow_duplicate=True),
-        Input('reset-all', 'n_clicks'),
-        State('dataframe', 'data'),
-        State("base_dtypes", "data"),
+        Output('new-version', 'data'),
+        Input('table-version', 'data'),
+        State('current-dtypes', 'data'),
+        State('data-table', 'columns'),
         prevent_initial_call=True
     )
-    def reset_data_all(n_clicks, initial_data, base_dtypes: dict[str, str]):
-        df = pd.read_json(StringIO(initial_data))
+    def version_edits(current_version, current_data_types, data_table_columns):
+        # Table edits become a version of their own, made from the version
+        # they were made to
+        if current_version is None or not (current_version['edits'] or current_version['save']):
+            raise PreventUpdate
+        edits = current_version['edits']
+        version_id = version_store.apply_edits(current_version['version'], edits)
+        if version_id is None:
+            raise PreventUpdate
+        return version_entry(
+            version_id,
+            current_data_types,
+            data_table_columns,
+            base=current_version['version'],
+            applied=len(edits),
+            saved=current_version['save'],
+            # The table already shows the edits
+            changes=table_changes([])
+        )
 
-        columns=[
-            {
-                'name': name,
-                'id': name,
-                'deletable': True,
-                'renamable': True,
-            }
-            for name in df.columns.tolist()
-        ]
+    # The versions made on the server are added to the version history in
+    # the browser, see assets/js/version_history.js
+    clientside_callback(
+        ClientsideFunction(namespace="version_history", function_name="push"),
+        Output('version-history', 'data', allow_duplicate=True),
+        Output('table-version', 'data', allow_duplicate=True),
+        Input('new-version', 'data'),
+        State('version-history', 'data'),
+        State('table-version', 'data'),
+        prevent_initial_call=True
+    )
 
-        return df.to_dict('records'), columns, copy(base_dtypes)
+    # Edits are journaled and saved in the browser, see
+    # assets/js/edit_journal.js; only tables of large datasets, which
+    # cannot be edited, keep their version on the server.
+    clientside_callback(
+        ClientsideFunction(namespace="edit_journal", function_name="record_data"),
+        Output('edit-journal', 'data', allow_duplicate=True),
+        Output('table-version', 'data', allow_duplicate=True),
+        Input('data-table', 'data_timestamp'),
+        State('data-table', 'data'),
+        State('data-table', 'data_previous'),
+        State('edit-journal', 'data'),
+        State('table-version', 'data'),
+        prevent_initial_call=True
+    )
 
-    @callback(
+    clientside_callback(
+        ClientsideFunction(namespace="edit_journal", function_name="record_columns"),
+        Output('edit-journal', 'data', allow_duplicate=True),
+        Output('table-version', 'data', allow_duplicate=True),
+        Input('data-table', 'columns'),
+        State('edit-journal', 'data'),
+        State('table-version', 'data'),
+        prevent_initial_call=True
+    )
+
+    clientside_callback(
+        ClientsideFunction(namespace="edit_journal", function_name="save"),
         Output('stored-dataframe', 'data'),
         Output('stored-dtypes', 'data'),
+        Output('stored-dataset', 'data'),
+        Output('edit-journal', 'data', allow_duplicate=True),
+        Output('data-table', 'data', allow_duplicate=True),
+        Output('version-history', 'data', allow_duplicate=True),
+        Output('table-version', 'data', allow_duplicate=True),
         Input('save', 'n_clicks'),
-        State('data-table', 'derived_virtual_data'),
-        State('data-table', 'columns'),
+        State('edit-journal', 'data'),
+        State('stored-dataframe', 'data'),
         State('current-dtypes', 'data'),
+        State('current-dataset', 'data'),
+        State('data-table', 'data'),
+        State('data-table', 'columns'),
+        State('data-table', 'derived_virtual_indices'),
+        State('version-history', 'data'),
+        State('table-version', 'data'),
         prevent_initial_call=True
     )
-    def save_data(n_clicks, data_table_data, data_table_columns, current_data_types):
-        id_to_name = {col['id']: col['name'] for col in data_table_columns}
-
-        df = pd.DataFrame(data_table_data)
-        df.rename(columns=id_to_name, inplace=True)
-        stored_data_types = {
-            id_to_name[key]: val
-            for key, val in current_data_types.items() if key in id_to_name
-        }
-
-        return df.to_json(date_format='iso'), stored_data_types
-
 
     @callback(
+        Output("download-request", "data"),
         Output("download-file", "data"),
         Input("download", "n_clicks"),
+        State("download-format", "value"),
         State("stored-dataframe", "data"),
+        State("stored-dataset", "data"),
+        State("version-history", "data"),
         State("file_column_separator", "data"),
-        State("file_decimal_separator", "data")
+        State("file_decimal_separator", "data"),
+        prevent_initial_call=True
     )
     def save_csv(
         n_clicks,
+        file_format: str,
         df_json,
+        stored_dataset: str | None,
+        history: dict,
         column_separator: str,
         decimal_separator: str
     ):
         if n_clicks and n_clicks > 0:
-            df = pd.read_json(StringIO(df_json))
-            df_csv = df.to_csv(sep=column_separator, decimal=decimal_separator)
-            return {"content": df_csv, "filename": "data.csv"}
+            # The saved version is streamed from the server by the download
+            # route; the saved JSON is only used once it is no longer kept
+            saved = history["saved"]
+            if stored_dataset is not None or version_store.exists(saved["version"]):
+                names = {column["id"]: column["name"] for column in saved["columns"]}
+                url = download_url(
+                    stored_dataset or saved["version"],
+                    file_format,
+                    column_separator,
+                    decimal_separator,
+                    names
+                )
+                return {"url": url, "n_clicks": n_clicks}, no_update
+
+            _, filename, _ = download_formats[file_format]
+            df = decode_frame(df_json)
+            if file_format == "csv":
+                df_csv = df.to_csv(sep=column_separator, decimal=decimal_separator)
+                return no_update, {"content": df_csv, "filename": filename}
+            return no_update, dcc.send_bytes(
+                lambda buffer: write_columnar(df, buffer, file_format),
+                filename
+            )
         else:
             raise PreventUpdate
+
+    clientside_callback(
+        ClientsideFunction(namespace="download", function_name="start"),
+        Output("download-request", "data", allow_duplicate=True),
+        Input("download-request", "data"),
+        prevent_initial_call=True
+    )
@@ -0,0 +1,213 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_ROWS = 256
+FORMAT_CACHE_SIZE = 1024
+
+ISO_FORMAT = "ISO8601"
+EPOCH_FORMATS = {
+    # Unit and the range of values read as 1973 - 2100 in that unit
+    "epoch_s": ("s", 1e8, 4.2e9),
+    "epoch_ms": ("ms", 1e11, 4.2e12),
+}
+
+# Day-first layouts come before their month-first counterparts, so an
+# ambiguous date such as 03.01.2020 is read the European way
+__DATE_LAYOUTS = (
+    "%d.%m.%Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%Y/%m/%d",
+    "%Y.%m.%d",
+    "%m/%d/%Y",
+    "%d.%m.%y",
+    "%d/%m/%y",
+)
+__TIME_LAYOUTS = ("", " %H:%M", " %H:%M:%S", " %H:%M:%S.%f")
+DATETIME_FORMATS = tuple(
+    date + time for date in __DATE_LAYOUTS for time in __TIME_LAYOUTS
+)
+
+__ISO_FIELDS = (("%Y", ""), ("%m", "-"), ("%d", "-"), ("%H", " "), ("%M", ":"), ("%S", ":"))
+__FIELD_WIDTHS = {"%Y": 4, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+__FORMAT_TOKEN_REGEX = re.compile(r"%.|.")
+__ISO_DATE_REGEX = re.compile(r"^\s*\d{4}-\d{2}-\d{2}")
+__DATE_REGEX = re.compile(r"^\s*\d{1,4}[./-]\d{1,2}[./-]\d{2,4}")
+
+
+class FormatCache:
+    """The datetime format last found for each column and sample."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._formats: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            datetime_format = self._formats.get(key)
+            if datetime_format is not None:
+                self._formats.move_to_end(key)
+            return datetime_format
+
+    def put(self, key: str, datetime_format: str) -> None:
+        with self._lock:
+            self._formats[key] = datetime_format
+            self._formats.move_to_end(key)
+            while len(self._formats) > self.max_entries:
+                self._formats.popitem(last=False)
+
+
+format_cache = FormatCache(FORMAT_CACHE_SIZE)
+
+
+def _sample(values: pd.Series) -> pd.Series:
+    present = values.dropna()
+    if len(present) <= SAMPLE_ROWS:
+        return present
+    positions = (np.arange(SAMPLE_ROWS) * len(present) + len(present) // 2) // SAMPLE_ROWS
+    return present.iloc[positions]
+
+
+def _sample_key(cache_key: str, values: pd.Series) -> str:
+    """Ties a cached format to the sampled values of the column.
+
+    Columns of the same name from another file or session have other
+    values, so they are searched again instead of reusing a format that
+    may read ambiguous dates such as 03/01/2020 the other way round.
+    """
+    digest = hashlib.sha256(str(len(values)).encode("utf-8"))
+    for value in _sample(values):
+        digest.update(b"\x1f" + str(value).encode("utf-8"))
+    return f"{cache_key}:{digest.hexdigest()}"
+
+
+def _to_iso(values: pd.Series, datetime_format: str) -> pd.Series | None:
+    """Rewrites fixed-width dates such as "31.12.2020 23:59" to ISO 8601.
+
+    pandas parses ISO strings in C, while other formats go through
+    strptime one value at a time. Returns None when the values do not all
+    have the exact width of the format, so they need the general parser.
+    """
+    fields, literals, width = {}, {}, 0
+    for token in __FORMAT_TOKEN_REGEX.findall(datetime_format):
+        if token in __FIELD_WIDTHS:
+            fields[token] = width
+            width += __FIELD_WIDTHS[token]
+        elif token.startswith("%"):
+            return None
+        else:
+            literals[width] = token
+            width += 1
+
+    iso_fields = [(field, separator) for field, separator in __ISO_FIELDS if field in fields]
+    if [field for field, _ in iso_fields] != [field for field, _ in __ISO_FIELDS[:len(fields)]]:
+        return None
+
+    present = values.dropna()
+    if pd.api.types.infer_dtype(present, skipna=False) != "string" \
+            or not (present.str.len() == width).all():
+        return None
+
+    codes = present.to_numpy(dtype=f"U{width}").view(np.uint32).reshape(-1, width)
+    for position, literal in literals.items():
+        if not (codes[:, position] == ord(literal)).all():
+            return None
+
+    columns = []
+    for field, separator in iso_fields:
+        if separator:
+            columns.append(np.full(len(codes), ord(separator), dtype=np.uint32))
+        start = fields[field]
+        columns.extend(codes[:, start:start + __FIELD_WIDTHS[field]].T)
+    iso = np.ascontiguousarray(np.column_stack(columns)).view(f"U{len(columns)}").ravel()
+
+    result = pd.Series(pd.NaT, index=values.index, name=values.name, dtype="datetime64[ns]")
+    result[present.index] = pd.to_datetime(iso, format=ISO_FORMAT)
+    return result
+
+
+def _parse(values: pd.Series, datetime_format: str) -> pd.Series:
+    if datetime_format in EPOCH_FORMATS:
+        unit, low, high = EPOCH_FORMATS[datetime_format]
+        numbers = pd.to_numeric(values)
+        present = numbers.dropna()
+        if not present.between(low, high).all():
+            raise ValueError(f"Values out of the {datetime_format} range")
+        return pd.to_datetime(numbers, unit=unit)
+
+    if datetime_format != ISO_FORMAT:
+        parsed = _to_iso(values, datetime_format)
+        if parsed is not None:
+            return parsed
+    return pd.to_datetime(values, format=datetime_format)
+
+
+def _candidate_formats(sample: pd.Series, allow_epoch: bool) -> list[str]:
+    if pd.api.types.is_numeric_dtype(sample.dtype):
+        return list(EPOCH_FORMATS) if allow_epoch else []
+
+    first = str(sample.iloc[0])
+    if __ISO_DATE_REGEX.match(first):
+        return [ISO_FORMAT]
+    if __DATE_REGEX.match(first):
+        return list(DATETIME_FORMATS)
+    if allow_epoch:
+        return list(EPOCH_FORMATS)
+    return []
+
+
+def detect_datetime_formats(values: pd.Series, allow_epoch: bool = False) -> Iterator[str]:
+    """Yields the formats that parse a sample of the values, best first."""
+    sample = _sample(values)
+    if sample.empty:
+        return
+
+    for datetime_format in _candidate_formats(sample, allow_epoch):
+        try:
+            _parse(sample, datetime_format)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        yield datetime_format
+
+
+def parse_datetime(
+    values: pd.Series,
+    cache_key: str | None = None,
+    allow_epoch: bool = False
+) -> pd.Series:
+    """Parses a whole column with one exact datetime format.
+
+    The format is found on a sample and remembered under `cache_key` and
+    the sampled values, so parsing the same column again skips the search. Epoch seconds and
+    milliseconds are only considered with `allow_epoch`. Raises ValueError
+    when no known format fits every value.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values
+
+    if cache_key is not None:
+        cache_key = _sample_key(cache_key, values)
+        cached = format_cache.get(cache_key)
+        if cached is not None and (allow_epoch or cached not in EPOCH_FORMATS):
+            try:
+                return _parse(values, cached)
+            except (ValueError, TypeError, OverflowError):
+                pass
+
+    for datetime_format in detect_datetime_formats(values, allow_epoch):
+        try:
+            parsed = _parse(values, datetime_format)
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if cache_key is not None:
+            format_cache.put(cache_key, datetime_format)
+        return parsed
+
+    raise ValueError("Unknown datetime format")
@@ -0,0 +1,112 @@
+import json
+import unicodedata
+from urllib.parse import quote, urlencode
+
+from flask import Flask, Response, abort, request
+
+from eda.dataset.export import csv_chunks, columnar_chunks, frame_batches, frame_schema, record_batches
+from eda.dataset.mapped import MappedDataset
+from eda.dataset.versions import version_store
+
+download_formats = {
+    "csv": ("CSV", "data.csv", "text/csv"),
+    "parquet": ("Parquet", "data.parquet", "application/vnd.apache.parquet"),
+    "feather": ("Feather", "data.feather", "application/vnd.apache.arrow.file"),
+    "arrow": ("Arrow IPC", "data.arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def download_url(
+    version_id: str,
+    file_format: str,
+    column_separator: str,
+    decimal_separator: str,
+    names: dict[str, str]
+) -> str:
+    """The address the browser downloads a version of the table from.
+
+    `names` maps the columns of the version to the names shown in the
+    table; only renamed columns are sent.
+    """
+    query = {
+        "format": file_format,
+        "column_separator": column_separator,
+        "decimal_separator": decimal_separator,
+    }
+    renamed = {column: name for column, name in names.items() if column != name}
+    if renamed:
+        query["names"] = json.dumps(renamed)
+    return f"download/{version_id}?{urlencode(query)}"
+
+
+def _attachment(filename: str) -> dict[str, str]:
+    """The options of a Content-Disposition header naming `filename`.
+
+    Like flask.send_file, names that are not ASCII are also given as
+    filename*, with an ASCII approximation for older browsers.
+    """
+    try:
+        filename.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        return {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    return {"filename": filename}
+
+
+def _version_chunks(
+    version_id: str,
+    file_format: str,
+    column_separator: str,
+    decimal_separator: str,
+    names: dict[str, str]
+):
+    df = version_store.frame(version_id)
+    if df is None:
+        # Tables of large datasets are versioned as mapped datasets, which
+        # cannot be renamed
+        dataset = MappedDataset(version_id)
+        if file_format == "csv":
+            return dataset.stream_csv(column_separator, decimal_separator)
+        return dataset.stream_columnar(file_format)
+
+    df = df.set_axis(
+        [names.get(column, column) for column in df.columns],
+        axis="columns",
+        copy=False
+    )
+    if file_format == "csv":
+        return csv_chunks(frame_batches(df), column_separator, decimal_separator)
+    # The schema is inferred from the whole table, so that every batch is
+    # converted to the same types
+    schema = frame_schema(df)
+    return columnar_chunks(schema, record_batches(frame_batches(df), schema), file_format)
+
+
+def register_download_routes(server: Flask) -> None:
+    @server.get("/download/<version_id>")
+    def download(version_id: str):
+        file_format = request.args.get("format", "csv")
+        if file_format not in download_formats:
+            abort(404)
+        try:
+            names = json.loads(request.args.get("names", "{}"))
+        except ValueError:
+            abort(400)
+
+        try:
+            chunks = _version_chunks(
+                version_id,
+                file_format,
+                request.args.get("column_separator", ","),
+                request.args.get("decimal_separator", "."),
+                names
+            )
+        except TypeError:
+            abort(404)
+
+        # The file is written while it is sent, a batch of rows at a time
+        _, filename, mimetype = download_formats[file_format]
+        response = Response(chunks, mimetype=mimetype)
+        # Quoted as needed, so names with spaces or ";" keep the header valid
+        response.headers.set("Content-Disposition", "attachment", **_attachment(filename))
+        return response
@@ -0,0 +1,33 @@
+from dash import Patch
+
+
+def new_journal(
+    column_names: list[str],
+    replaced: bool = False,
+    names: dict[str, str] | None = None
+) -> dict:
+    """An empty journal of the edits made since the table was last saved.
+
+    The journal is kept in the browser by assets/js/edit_journal.js, which
+    records changed cells, deleted rows and renamed or deleted columns, and
+    applies them to the saved JSON when the table is saved. `keys` maps the
+    column ids of the table to the columns of the saved JSON. A `replaced`
+    journal saves the whole table, because it no longer derives from the
+    saved version. `names` holds the names of renamed columns.
+    """
+    names = {name: (names or {}).get(name, name) for name in column_names}
+    return {
+        "keys": dict(names),
+        "names": names,
+        "edits": [{"op": "replace"}] if replaced else [],
+    }
+
+
+def journal_edits(edits: list[dict]) -> Patch:
+    """Records changes the server made to `data-table.data`.
+
+    Only the new entries are sent; the journal itself stays in the browser.
+    """
+    journal = Patch()
+    journal["edits"].extend(edits)
+    return journal
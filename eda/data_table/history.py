@@ -0,0 +1,144 @@
+from copy import copy
+
+import numpy as np
+import pandas as pd
+
+from eda.dataset.mapped import MappedDataset
+from eda.dataset.versions import version_store
+
+
+def version_entry(version_id: str, dtypes: dict[str, str], columns: list[dict], **details) -> dict:
+    """A step of the version history: a version and how the table shows it.
+
+    `version_id` names a version in the version store, or a dataset
+    version for tables of large datasets.
+    """
+    return {"version": version_id, "dtypes": copy(dtypes), "columns": columns, **details}
+
+
+def new_history(entry: dict) -> dict:
+    """The version history of a table, kept in the browser.
+
+    Only the versions are kept on the server; undo and redo move the
+    position, and the saved entry is what "Wróć do zapisanej wersji"
+    returns to. assets/js/version_history.js pushes the new entries.
+    """
+    return {"entries": [entry], "position": 0, "saved": entry}
+
+
+def pushed(history: dict, entry: dict) -> dict:
+    """The history with `entry` after the current one, dropping redo steps."""
+    entries = history["entries"][:history["position"] + 1] + [entry]
+    return {**history, "entries": entries, "position": len(entries) - 1}
+
+
+def moved(history: dict, steps: int) -> dict | None:
+    """The history moved back or forward, or None when there is no such step."""
+    position = history["position"] + steps
+    if not 0 <= position < len(history["entries"]):
+        return None
+    return {**history, "position": position}
+
+
+def current_entry(history: dict) -> dict:
+    return history["entries"][history["position"]]
+
+
+def table_version(version_id: str | None) -> dict | None:
+    """The version of an in-memory table and the edits made since then.
+
+    assets/js/edit_journal.js queues the table edits, which version_edits
+    stores as the next version. Tables of large datasets, which cannot be
+    edited, have no table version.
+    """
+    if version_id is None:
+        return None
+    return {"version": version_id, "edits": [], "save": False}
+
+
+def derived_version(
+    current_version: dict | None,
+    records: pd.DataFrame,
+    df: pd.DataFrame,
+    columns: list[str]
+) -> str:
+    """Stores the result of a server change of an in-memory table.
+
+    `records` holds the table the change was made to and `df` the changed
+    `columns` with the index of the rows it kept. The new version shares
+    the other columns with the current one, unless the table has edits
+    that are not stored yet.
+    """
+    version_id = None
+    if current_version is not None and not current_version["edits"]:
+        keep = np.isin(np.arange(len(records)), df.index)
+        version_id = version_store.derive(
+            current_version["version"],
+            columns=df[columns],
+            keep=None if keep.all() else keep
+        )
+    return version_id or version_store.add(df.reset_index(drop=True))
+
+
+def _record_dtype(column: pd.Series) -> np.dtype:
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        dtype = column.dtype.categories.dtype
+    else:
+        dtype = getattr(column.dtype, "numpy_dtype", np.dtype(object))
+    if dtype.kind in "iu":
+        return np.dtype("float64") if column.hasnans else np.dtype("int64")
+    if dtype.kind == "f":
+        return np.dtype("float64")
+    if dtype.kind == "b" and not column.hasnans:
+        return dtype
+    return np.dtype(object)
+
+
+def _table_types(df: pd.DataFrame) -> pd.DataFrame:
+    # Compacted columns, like nullable integers and categories, get the
+    # types they have in the records of the table
+    compacted = [
+        name for name, column in df.items()
+        if pd.api.types.is_extension_array_dtype(column.dtype)
+        and not isinstance(column.dtype, pd.DatetimeTZDtype)
+    ]
+    if not compacted:
+        return df
+    columns = {name: column for name, column in df.items()}
+    for name in compacted:
+        columns[name] = df[name].astype(_record_dtype(df[name]))
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_table(
+    current_version: dict | None,
+    dataset_id: str | None,
+    columns: list[str] | None = None,
+    start: int | None = None,
+    stop: int | None = None
+) -> pd.DataFrame:
+    """Returns the working DataFrame of a callback from the table handles.
+
+    Callbacks get the small `table-version` or `current-dataset` stores
+    instead of the records of the data table. Large datasets are read from
+    the mapped file and in-memory tables from the version store, with the
+    edits that are not stored yet applied and the column types of the
+    records. The frame shares its columns with the store and must not be
+    modified in place.
+    """
+    if dataset_id is not None:
+        return MappedDataset(dataset_id).read(columns, start, stop)
+
+    df = None
+    if current_version is not None:
+        if current_version["edits"]:
+            df = version_store.edited(current_version["version"], current_version["edits"])
+            if df is not None and columns is not None:
+                df = df[columns]
+        else:
+            df = version_store.frame(current_version["version"], columns)
+    if df is None:
+        raise TypeError("Table version is no longer available")
+    if start is not None or stop is not None:
+        df = df.iloc[start:stop]
+    return _table_types(df)
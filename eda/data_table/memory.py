@@ -0,0 +1,88 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+ColumnMemory = NamedTuple("ColumnMemory", [
+    ("dtype", str),
+    ("bytes", int),
+    ("original_bytes", int),
+])
+
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+__INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _column_bytes(column: pd.Series) -> int:
+    return int(column.memory_usage(index=False, deep=True))
+
+
+def _smallest_int_dtype(column: pd.Series) -> str | None:
+    present = column.dropna()
+    if present.empty:
+        return None
+
+    low, high = present.min(), present.max()
+    for int_type in __INT_TYPES:
+        limits = np.iinfo(int_type)
+        if limits.min <= low and high <= limits.max:
+            name = np.dtype(int_type).name
+            # Only nullable integers can hold missing values
+            return name if len(present) == len(column) else name.capitalize()
+    return None
+
+
+def _compact_column(column: pd.Series) -> pd.Series:
+    dtype = column.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return column
+
+    if pd.api.types.is_integer_dtype(dtype):
+        int_dtype = _smallest_int_dtype(column)
+        return column if int_dtype is None else column.astype(int_dtype)
+
+    if dtype == np.float64:
+        # float32 is only used when every value survives the round trip,
+        # so statistics and the JSON sent to the browser stay the same
+        values = column.to_numpy()
+        compact = values.astype(np.float32)
+        if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+            return pd.Series(compact, index=column.index, name=column.name)
+        return column
+
+    if dtype == object and len(column) > 0 \
+            and pd.api.types.infer_dtype(column, skipna=True) == "string" \
+            and column.nunique() <= len(column) * CATEGORY_MAX_UNIQUE_RATIO:
+        return column.astype("category")
+
+    return column
+
+
+def compact_dataframe(df: pd.DataFrame) -> dict[str, ColumnMemory]:
+    """Stores every column in the smallest dtype that keeps its values.
+
+    Integers are narrowed to the smallest width that fits, floats become
+    float32 when that is lossless and repetitive strings become categories.
+    Returns the memory used by each column before and after.
+    """
+    report = {}
+    for name, column in df.items():
+        original_bytes = _column_bytes(column)
+        compact = _compact_column(column)
+        if compact is not column:
+            df[name] = compact
+        report[name] = ColumnMemory(
+            str(compact.dtype),
+            _column_bytes(compact),
+            original_bytes
+        )
+    return report
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
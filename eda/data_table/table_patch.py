@@ -0,0 +1,112 @@
+import uuid
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from dash import Patch, ctx
+
+# A patch operation carries its location besides the value, so it is
+# sent instead of the records only while it stays clearly smaller
+PATCH_OPERATION_CELLS = 4
+
+TableUpdate = NamedTuple("TableUpdate", [
+    ("data", Patch | list[dict]),
+    ("changes", dict),
+    ("edits", list[dict]),
+])
+
+
+def table_changes(columns: list[str], rows: bool = False, types: bool = False) -> dict:
+    """Tells the callbacks listening to `changed-columns` what changed.
+
+    `rows` is set when rows were deleted and `types` when the data types
+    of the columns changed; otherwise only their values did.
+    """
+    return {"id": uuid.uuid4().hex, "columns": columns, "rows": rows, "types": types}
+
+
+def waits_for_version(current_version: dict | None) -> bool:
+    """Whether an in-memory table changed but its new version is not set yet.
+
+    Callbacks about the table listen to `table-version` and, for large
+    datasets, to `current-dataset` and `changed-columns`. A server change
+    of an in-memory table sets `changed-columns` before the new version
+    reaches `table-version`, see assets/js/version_history.js, so the
+    callback runs again with the new version.
+    """
+    return current_version is not None \
+        and "changed-columns.data" in ctx.triggered_prop_ids \
+        and "table-version.data" not in ctx.triggered_prop_ids
+
+
+def triggering_changes(changes: dict | None, current_version: dict | None = None) -> dict | None:
+    """The changes that came with the update which fired the callback.
+
+    New versions of in-memory tables carry the changes the server made,
+    and large datasets send them to `changed-columns`. Returns None when
+    the table changed in some other way, e.g. it was edited by hand, so
+    every column has to be considered changed.
+    """
+    if current_version is not None:
+        if "table-version.data" not in ctx.triggered_prop_ids:
+            return None
+        return current_version.get("changes")
+    if changes is None or "changed-columns.data" not in ctx.triggered_prop_ids:
+        return None
+    return changes
+
+
+def _differs(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    old_missing, new_missing = pd.isna(old), pd.isna(new)
+    differs = old_missing != new_missing
+    # pd.NA cannot be compared, so only present values are
+    present = ~(old_missing | new_missing)
+    differs[present] = np.asarray(old[present] != new[present], dtype=bool)
+    return differs
+
+
+def table_update(
+    before: pd.DataFrame,
+    after: pd.DataFrame,
+    columns: list[str],
+    types: bool = False
+) -> TableUpdate:
+    """Describes the change of the table records from `before` to `after`.
+
+    `before` holds the records of the table in order and `after` the
+    result of changing `columns`, with the index of the rows it kept. The
+    returned data is a Patch of the deleted rows and changed cells, or all
+    records when that would be smaller. The edits are the same changes for
+    the edit journal.
+    """
+    positions = before.index.get_indexer(after.index)
+    deleted = np.setdiff1d(np.arange(len(before)), positions)
+
+    cells = {}
+    for column in columns:
+        old = before[column].to_numpy(dtype=object)[positions]
+        new = after[column].to_numpy(dtype=object)
+        for row in np.flatnonzero(_differs(old, new)):
+            cells.setdefault(int(row), {})[column] = new[row]
+
+    changes = table_changes(columns, rows=len(deleted) > 0, types=types)
+    num_operations = len(deleted) + sum(len(values) for values in cells.values())
+    if num_operations * PATCH_OPERATION_CELLS >= after.size:
+        if len(deleted):
+            edits = [{"op": "replace"}]
+        else:
+            edits = [{"op": "columns", "columns": columns}]
+        return TableUpdate(after.to_dict("records"), changes, edits)
+
+    data = Patch()
+    # Patch operations run in order, so rows are deleted from the end
+    # before the cells are set at their new positions
+    for row in deleted[::-1]:
+        del data[int(row)]
+    for row, values in cells.items():
+        for column, value in values.items():
+            data[row][column] = value
+
+    edits = [{"op": "delete_rows", "rows": deleted.tolist()}] if len(deleted) else []
+    edits += [{"op": "cells", "row": row, "values": values} for row, values in cells.items()]
+    return TableUpdate(data, changes, edits)
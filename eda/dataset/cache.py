@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from eda.dataset.sessions import memory_accountant
+
+
+class LRUCache:
+    """Values kept up to `max_bytes`, the least recently used dropped first.
+
+    Every value is charged to the session that put it under the name of
+    the cache, and is dropped as well once that session exceeds its
+    memory budget. `evicted` is called with the key and the value of
+    every entry dropped either way, without the lock of the cache, e.g.
+    to keep the value on disk; discarded entries are not passed to it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        evicted: Callable[[Hashable, object], None] | None = None
+    ) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self._evicted = evicted
+        self._entries: OrderedDict[Hashable, tuple[object, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            memory_accountant.touch(self.name, key)
+        return entry[0]
+
+    def put(self, key: Hashable, value, size: int) -> bool:
+        """Keeps `value` under `key`, replacing the value kept before.
+
+        Returns False when the value is larger than the whole cache and is
+        not kept.
+        """
+        if size > self.max_bytes:
+            return False
+
+        evicted = []
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                memory_accountant.release(self.name, evicted_key)
+                evicted.append((evicted_key, evicted_value))
+            evict_over_budget = memory_accountant.record(
+                self.name, key, size, lambda: self._evict(key, value)
+            )
+
+        evict_over_budget()
+        for evicted_key, evicted_value in evicted:
+            self._notify(evicted_key, evicted_value)
+        return True
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            if self._remove(key):
+                memory_accountant.release(self.name, key)
+
+    def _evict(self, key: Hashable, value) -> None:
+        # The accountant has dropped the charge of this value already; a
+        # value put under the same key since then has a charge of its own
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not value:
+                return
+            self._remove(key)
+        self._notify(key, value)
+
+    def _notify(self, key: Hashable, value) -> None:
+        if self._evicted is not None:
+            self._evicted(key, value)
+
+    def _remove(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._size -= entry[1]
+        return True
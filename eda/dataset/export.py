@@ -0,0 +1,123 @@
+import io
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+EXPORT_ROWS = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """A file that keeps what was written until it is taken.
+
+    Lets the pyarrow writers, which write to files, produce the chunks of
+    a streamed response.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def frame_batches(df: pd.DataFrame, rows: int = EXPORT_ROWS) -> Iterator[pd.DataFrame]:
+    """Slices of `df`, which are views and share its memory.
+
+    A table without rows gives one empty slice, which keeps its columns.
+    """
+    for start in range(0, max(len(df), 1), rows):
+        yield df.iloc[start:start + rows]
+
+
+def csv_chunks(
+    batches: Iterable[pd.DataFrame],
+    column_separator: str,
+    decimal_separator: str
+) -> Iterator[bytes]:
+    """The CSV of a table given in batches, one chunk per batch.
+
+    The header comes as a chunk of its own, so a response starts before
+    the first batch is formatted. It is written from the columns of the
+    first batch, which must be given even for a table without rows.
+    """
+    header = True
+    for batch in batches:
+        if header:
+            yield batch.iloc[:0].to_csv(sep=column_separator).encode("utf-8")
+            header = False
+        if not batch.empty:
+            yield batch.to_csv(
+                sep=column_separator,
+                decimal=decimal_separator,
+                header=False
+            ).encode("utf-8")
+
+
+def frame_schema(df: pd.DataFrame) -> "pa.Schema":
+    if pa is None:
+        raise TypeError("Writing columnar files requires the pyarrow package")
+    return pa.Schema.from_pandas(df, preserve_index=False)
+
+
+def record_batches(batches: Iterable[pd.DataFrame], schema: "pa.Schema") -> Iterator["pa.RecordBatch"]:
+    """Converts the batches of a table one at a time, see frame_schema."""
+    for batch in batches:
+        yield pa.RecordBatch.from_pandas(batch, schema=schema, preserve_index=False)
+
+
+def columnar_chunks(
+    schema: "pa.Schema",
+    batches: Iterable["pa.RecordBatch"],
+    file_format: str
+) -> Iterator[bytes]:
+    """A Parquet, Feather or Arrow IPC file written a batch at a time.
+
+    Every batch is a row group of the Parquet file or a record batch of
+    the IPC file and is handed on as soon as it is written.
+    """
+    if pa is None:
+        raise TypeError("Writing columnar files requires the pyarrow package")
+
+    sink = _ChunkSink()
+    match file_format:
+        case "parquet":
+            writer = pa.parquet.ParquetWriter(sink, schema)
+            write = writer.write_batch
+        case "feather" | "arrow":
+            options = pa.ipc.IpcWriteOptions(
+                compression="lz4" if file_format == "feather" else None
+            )
+            writer = pa.ipc.new_file(sink, schema, options=options)
+            write = writer.write
+        case _:
+            raise ValueError(f"Unknown columnar format: {file_format}")
+
+    with writer:
+        for batch in batches:
+            write(batch)
+            if chunk := sink.take():
+                yield chunk
+    yield sink.take()
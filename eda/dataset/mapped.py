@@ -0,0 +1,355 @@
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+from eda.data_table.memory import ColumnMemory
+from eda.dataset.export import columnar_chunks, csv_chunks
+from eda.file_input.csv_parser import decompressing_stream
+from eda.file_input.columnar_parser import detect_columnar_format
+
+DATASET_DIRECTORY = Path(os.getenv(
+    "EDA_DATASET_DIR",
+    os.path.join(tempfile.gettempdir(), "eda-datasets")
+))
+OUT_OF_CORE_BYTES = int(os.getenv("EDA_OUT_OF_CORE_BYTES", 256 * 1024 * 1024))
+SERVER_PAGING_ROWS = int(os.getenv("EDA_SERVER_PAGING_ROWS", 100_000))
+STALE_DATASET_SECONDS = 24 * 60 * 60
+PREVIEW_ROWS = 1000
+BATCH_ROWS = 64 * 1024
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+
+__DATASET_ID_REGEX = re.compile(r"^[0-9a-f]{32}$")
+
+
+def is_out_of_core(size: int) -> bool:
+    return pa is not None and size >= OUT_OF_CORE_BYTES
+
+
+def needs_server_paging(num_rows: int) -> bool:
+    return pa is not None and num_rows > SERVER_PAGING_ROWS
+
+
+def dataset_path(dataset_id: str) -> Path:
+    if not isinstance(dataset_id, str) or not __DATASET_ID_REGEX.match(dataset_id):
+        raise TypeError("Invalid dataset handle")
+    return DATASET_DIRECTORY / f"{dataset_id}.arrow"
+
+
+def manifest_path(dataset_id: str) -> Path:
+    return dataset_path(dataset_id).with_suffix(".json")
+
+
+def _remove_stale_datasets() -> None:
+    deadline = time.time() - STALE_DATASET_SECONDS
+    # Files that versions still in use take columns from are kept, however
+    # long ago they were written
+    referenced = set()
+    stale = []
+    for path in DATASET_DIRECTORY.glob("*.json"):
+        try:
+            if path.stat().st_mtime < deadline:
+                stale.append(path)
+                continue
+            sources = json.loads(path.read_text(encoding="utf-8"))["columns"]
+        except (OSError, ValueError):
+            continue
+        referenced.update(file_id for _, file_id, _ in sources)
+
+    for path in DATASET_DIRECTORY.glob("*.arrow"):
+        if path.stem in referenced:
+            continue
+        try:
+            if path.stat().st_mtime < deadline:
+                stale.append(path)
+        except OSError:
+            pass
+
+    for path in stale:
+        path.unlink(missing_ok=True)
+
+
+def _write_batches(schema: "pa.Schema", batches) -> str:
+    """Writes record batches to a new uncompressed Arrow IPC file.
+
+    Uncompressed files can be memory-mapped, so reading a column later
+    only pages in that column's buffers.
+    """
+    DATASET_DIRECTORY.mkdir(parents=True, exist_ok=True)
+
+    dataset_id = uuid.uuid4().hex
+    path = dataset_path(dataset_id)
+    partial_path = path.with_suffix(".partial")
+    try:
+        with pa.OSFile(str(partial_path), "wb") as sink, \
+                pa.ipc.new_file(sink, schema) as writer:
+            for batch in batches:
+                writer.write(batch)
+        os.replace(partial_path, path)
+    finally:
+        partial_path.unlink(missing_ok=True)
+    return dataset_id
+
+
+def spool_dataset(
+    buffer: BinaryIO,
+    column_separator: str,
+    decimal_separator: str,
+    quote_char: str = '"',
+    encoding: str = "utf-8"
+) -> "MappedDataset":
+    if pa is None:
+        raise TypeError("Out-of-core mode requires the pyarrow package")
+
+    DATASET_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    _remove_stale_datasets()
+
+    try:
+        match detect_columnar_format(buffer):
+            case "parquet":
+                reader = pa.parquet.ParquetFile(buffer)
+                schema = reader.schema_arrow
+                batches = reader.iter_batches(batch_size=BATCH_ROWS)
+            case "feather":
+                table = pa.feather.read_table(buffer, memory_map=False)
+                schema = table.schema
+                batches = table.to_batches(max_chunksize=BATCH_ROWS)
+            case "arrow_stream":
+                reader = pa.ipc.open_stream(buffer)
+                schema = reader.schema
+                batches = reader
+            case _:
+                reader = pa.csv.open_csv(
+                    decompressing_stream(buffer),
+                    read_options=pa.csv.ReadOptions(
+                        block_size=CSV_BLOCK_SIZE,
+                        encoding=encoding
+                    ),
+                    parse_options=pa.csv.ParseOptions(
+                        delimiter=column_separator,
+                        quote_char=quote_char
+                    ),
+                    convert_options=pa.csv.ConvertOptions(
+                        decimal_point=decimal_separator
+                    )
+                )
+                schema = reader.schema
+                batches = reader
+        dataset_id = _write_batches(schema, batches)
+    except (pa.ArrowException, OSError) as e:
+        raise TypeError(f"Invalid file: {e}") from e
+
+    return MappedDataset(dataset_id)
+
+
+def store_dataframe(df: pd.DataFrame) -> "MappedDataset | None":
+    """Writes a parsed DataFrame as a new dataset.
+
+    Returns None when a column cannot be stored in Arrow, e.g. an object
+    column mixing numbers and strings.
+    """
+    if pa is None:
+        raise TypeError("Out-of-core mode requires the pyarrow package")
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+
+    DATASET_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    _remove_stale_datasets()
+    return MappedDataset(_write_batches(
+        table.schema,
+        table.to_batches(max_chunksize=BATCH_ROWS)
+    ))
+
+
+def _write_manifest(sources: list[list[str]]) -> str:
+    dataset_id = uuid.uuid4().hex
+    path = manifest_path(dataset_id)
+    partial_path = path.with_suffix(".partial")
+    try:
+        partial_path.write_text(json.dumps({"columns": sources}), encoding="utf-8")
+        os.replace(partial_path, path)
+    finally:
+        partial_path.unlink(missing_ok=True)
+    for file_id in {file_id for _, file_id, _ in sources}:
+        # The files the manifest refers to count as used now
+        try:
+            os.utime(dataset_path(file_id))
+        except OSError:
+            pass
+    return dataset_id
+
+
+def _map_file(file_id: str) -> "pa.Table":
+    path = dataset_path(file_id)
+    os.utime(path)
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+class MappedDataset:
+    """A dataset version kept in memory-mapped Arrow IPC files.
+
+    Versions are immutable; every change returns a new MappedDataset, so
+    a handle always names the same data. A version is either one file or
+    a manifest that takes each column from the file of an earlier version,
+    so changing a few columns only writes those columns.
+    """
+
+    def __init__(self, dataset_id: str) -> None:
+        if pa is None:
+            raise TypeError("Out-of-core mode requires the pyarrow package")
+
+        self.dataset_id = dataset_id
+        path = dataset_path(dataset_id)
+        try:
+            if path.exists():
+                self._table = _map_file(dataset_id)
+                # Columns as [name, file, name in the file]
+                self._sources = [[name, dataset_id, name] for name in self._table.column_names]
+            else:
+                manifest = manifest_path(dataset_id)
+                self._sources = json.loads(manifest.read_text(encoding="utf-8"))["columns"]
+                os.utime(manifest)
+                files = {file_id: _map_file(file_id) for _, file_id, _ in self._sources}
+                self._table = pa.Table.from_arrays(
+                    [files[file_id].column(field) for _, file_id, field in self._sources],
+                    names=[name for name, _, _ in self._sources]
+                )
+        except (OSError, ValueError):
+            raise TypeError("Dataset is no longer available")
+
+    @property
+    def columns(self) -> list[str]:
+        return self._table.column_names
+
+    @property
+    def num_rows(self) -> int:
+        return self._table.num_rows
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        start: int | None = None,
+        stop: int | None = None
+    ) -> pd.DataFrame:
+        table = self._table
+        if columns is not None:
+            table = table.select(list(dict.fromkeys(columns)))
+
+        start = max(start or 0, 0)
+        stop = self.num_rows if stop is None else min(stop, self.num_rows)
+        df = table.slice(start, max(stop - start, 0)).to_pandas()
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    def take(self, rows: np.ndarray, columns: list[str] | None = None) -> pd.DataFrame:
+        """Reads the rows at the given positions, indexed by those positions."""
+        table = self._table
+        if columns is not None:
+            table = table.select(list(dict.fromkeys(columns)))
+
+        df = table.take(pa.array(rows, type=pa.int64())).to_pandas()
+        df.index = pd.Index(rows)
+        return df
+
+    def preview(self) -> pd.DataFrame:
+        return self.read(stop=PREVIEW_ROWS)
+
+    def batches(self, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        # A dataset without rows gives one empty batch with its columns
+        for start in range(0, max(self.num_rows, 1), BATCH_ROWS):
+            yield self.read(columns, start, start + BATCH_ROWS)
+
+    def derive(
+        self,
+        columns: pd.DataFrame | None = None,
+        keep: np.ndarray | None = None
+    ) -> "MappedDataset":
+        """Writes a new version of the dataset.
+
+        `columns` replaces (or adds) whole columns and must be indexed by
+        row position. `keep` is a boolean row mask applied afterwards.
+        Without `keep` only the new columns are written and the others are
+        shared with this version; deleting rows changes every column.
+        """
+        table = self._table
+        sources = [list(source) for source in self._sources]
+        for name, values in (columns.items() if columns is not None else ()):
+            array = pa.array(
+                values.reindex(pd.RangeIndex(self.num_rows)),
+                from_pandas=True
+            )
+            if keep is None:
+                column_table = pa.table({name: array})
+                file_id = _write_batches(
+                    column_table.schema,
+                    column_table.to_batches(max_chunksize=BATCH_ROWS)
+                )
+                sources = [source for source in sources if source[0] != name]
+                sources.append([name, file_id, name])
+                continue
+            if name in table.column_names:
+                table = table.set_column(
+                    table.column_names.index(name), name, array
+                )
+            else:
+                table = table.append_column(name, array)
+
+        if keep is None:
+            # Replaced columns keep their place
+            order = {name: position for position, name in enumerate(self.columns)}
+            sources.sort(key=lambda source: order.get(source[0], len(order)))
+            return MappedDataset(_write_manifest(sources))
+
+        table = table.filter(pa.array(keep, type=pa.bool_()))
+        return MappedDataset(_write_batches(
+            table.schema,
+            table.to_batches(max_chunksize=BATCH_ROWS)
+        ))
+
+    def missing_rows(self) -> dict[str, np.ndarray]:
+        result = {}
+        for name in self.columns:
+            column = self._table.column(name)
+            mask = column.is_null(nan_is_null=True)
+            result[name] = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+        return result
+
+    def memory_report(self) -> dict[str, ColumnMemory]:
+        return {
+            name: ColumnMemory(
+                str(self._table.schema.field(name).type),
+                self._table.column(name).nbytes,
+                self._table.column(name).nbytes
+            )
+            for name in self.columns
+        }
+
+    def stream_csv(self, column_separator: str, decimal_separator: str) -> Iterator[bytes]:
+        return csv_chunks(self.batches(), column_separator, decimal_separator)
+
+    def stream_columnar(self, file_format: str) -> Iterator[bytes]:
+        return columnar_chunks(
+            self._table.schema,
+            self._table.to_batches(max_chunksize=BATCH_ROWS),
+            file_format
+        )
+
@@ -0,0 +1,472 @@
+import math
+import os
+import re
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+from eda.dataset.cache import LRUCache
+from eda.dataset.mapped import MappedDataset
+
+QUERY_CACHE_BYTES = int(os.getenv("EDA_QUERY_CACHE_BYTES", 256 * 1024 * 1024))
+
+FilterTerm = NamedTuple("FilterTerm", [
+    ("column", str),
+    ("operator", str),
+    ("value", str | None),
+    ("case_insensitive", bool),
+])
+FilterExpression = NamedTuple("FilterExpression", [
+    ("operator", str),
+    ("operands", tuple),
+])
+SortedIndex = NamedTuple("SortedIndex", [
+    ("order", np.ndarray),
+    ("keys", np.ndarray),
+    ("valid", int),
+])
+
+__TOKEN_REGEX = re.compile(r"""\s*(?:
+    (?P<column>\{(?:[^}\\]|\\.)*\})
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`)
+  | (?P<logical>&&|\|\|)
+  | (?P<symbol>[si]?(?:!=|<=|>=|=|<|>)|!|\(|\))
+  | (?P<word>[^\s()]+)
+)""", re.VERBOSE)
+__OPERATOR_ALIASES = {
+    "=": "eq",
+    "!=": "ne",
+    "<": "lt",
+    "<=": "le",
+    ">": "gt",
+    ">=": "ge",
+}
+__WORD_OPERATORS = ("contains", "datestartswith", "eq", "ne", "lt", "le", "gt", "ge")
+__RANGE_OPERATORS = ("eq", "ne", "lt", "le", "gt", "ge")
+__NUMEXPR_OPERATORS = {"eq": "==", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+__UNARY_OPERATORS = ("blank", "nil", "num", "str", "even", "odd")
+__ESCAPE_REGEX = re.compile(r"\\(.)")
+
+
+# Query results of immutable dataset versions; they are dropped when the
+# session that computed them exceeds its budget, as they can be computed
+# again
+query_cache = LRUCache("query", QUERY_CACHE_BYTES)
+
+
+def _unescape(text: str) -> str:
+    return __ESCAPE_REGEX.sub(r"\1", text[1:-1])
+
+
+def _term_operator(text: str) -> tuple[str, bool]:
+    """Resolves an operator such as "i<=" to ("le", True)."""
+    operator = text.lower()
+    prefix = ""
+    if operator[:1] in ("s", "i") and operator not in __WORD_OPERATORS \
+            and __OPERATOR_ALIASES.get(operator[1:], operator[1:]) in __WORD_OPERATORS:
+        prefix, operator = operator[0], operator[1:]
+    operator = __OPERATOR_ALIASES.get(operator, operator)
+    if operator not in __WORD_OPERATORS:
+        raise ValueError(f"Unknown filter operator: {text}")
+    return operator, prefix == "i"
+
+
+def _unary_operator(text: str) -> str:
+    if text.lower() not in __UNARY_OPERATORS:
+        raise ValueError(f"Unknown filter operator: is {text}")
+    return f"is {text.lower()}"
+
+
+def _is_range_operator(operator: str) -> bool:
+    return operator in __RANGE_OPERATORS
+
+
+def _tokenize(filter_query: str) -> list[tuple[str, str]]:
+    tokens = []
+    position = 0
+    while filter_query[position:].strip():
+        match = __TOKEN_REGEX.match(filter_query, position)
+        if match is None:
+            raise ValueError(f"Invalid filter at position {position}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser of the DataTable filtering syntax.
+
+    expression := and_expression (("||" | "or") and_expression)*
+    and_expression := unary (("&&" | "and") unary)*
+    unary := ("!" | "not") unary | "(" expression ")" | term
+    term := {column} operator value | {column} "is" ["not"] unary_operator
+    """
+
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of filter")
+        self.position += 1
+        return token
+
+    def accept(self, *texts: str) -> bool:
+        token = self.peek()
+        if token is not None and token[0] != "string" and token[1].lower() in texts:
+            self.position += 1
+            return True
+        return False
+
+    def parse(self) -> FilterTerm | FilterExpression:
+        expression = self.expression()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected {self.peek()[1]!r} in filter")
+        return expression
+
+    def expression(self) -> FilterTerm | FilterExpression:
+        operands = [self.and_expression()]
+        while self.accept("||", "or"):
+            operands.append(self.and_expression())
+        return operands[0] if len(operands) == 1 else FilterExpression("or", tuple(operands))
+
+    def and_expression(self) -> FilterTerm | FilterExpression:
+        operands = [self.unary()]
+        while self.accept("&&", "and"):
+            operands.append(self.unary())
+        return operands[0] if len(operands) == 1 else FilterExpression("and", tuple(operands))
+
+    def unary(self) -> FilterTerm | FilterExpression:
+        if self.accept("!", "not"):
+            return FilterExpression("not", (self.unary(),))
+        if self.accept("("):
+            expression = self.expression()
+            if not self.accept(")"):
+                raise ValueError("Missing closing parenthesis in filter")
+            return expression
+        return self.term()
+
+    def term(self) -> FilterTerm | FilterExpression:
+        kind, text = self.take()
+        if kind != "column":
+            raise ValueError(f"Expected a column instead of {text!r}")
+        column = _unescape(text)
+
+        if self.accept("is"):
+            negated = self.accept("not")
+            term = FilterTerm(column, _unary_operator(self.take()[1]), None, False)
+            return FilterExpression("not", (term,)) if negated else term
+
+        operator, case_insensitive = _term_operator(self.take()[1])
+        kind, value = self.take()
+        if kind == "string":
+            value = _unescape(value)
+        return FilterTerm(column, operator, value, case_insensitive)
+
+
+def parse_filter_query(filter_query: str | None) -> FilterTerm | FilterExpression | None:
+    """Parses a DataTable filter_query into a tree of terms.
+
+    Returns None for an empty or invalid query; the DataTable shows all
+    rows for an invalid filter too.
+    """
+    if not filter_query or not filter_query.strip():
+        return None
+    try:
+        return _Parser(_tokenize(filter_query)).parse()
+    except ValueError:
+        return None
+
+
+def _is_orderable(column: pd.Series) -> bool:
+    return pd.api.types.is_datetime64_any_dtype(column.dtype) or (
+        pd.api.types.is_numeric_dtype(column.dtype)
+        and not pd.api.types.is_bool_dtype(column.dtype)
+    )
+
+
+def _sort_keys(column: pd.Series) -> np.ndarray:
+    """Orderable values as float64, with missing values as NaN."""
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        if column.dt.tz is not None:
+            column = column.dt.tz_localize(None)
+        keys = column.to_numpy(dtype="datetime64[ns]").view(np.int64).astype(np.float64)
+    else:
+        keys = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    keys[column.isna().to_numpy()] = np.nan
+    return keys
+
+
+def _key_value(column: pd.Series, value: str) -> float:
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return float(pd.Timestamp(value).tz_localize(None).value)
+    return float(value.replace(",", "."))
+
+
+def _build_index(keys: np.ndarray) -> SortedIndex:
+    valid = ~np.isnan(keys)
+    positions = np.flatnonzero(valid)
+    order = positions[np.argsort(keys[positions], kind="stable")]
+    # Missing values go last, like in pandas
+    order = np.concatenate([order, np.flatnonzero(~valid)])
+    return SortedIndex(order, keys[order[:len(positions)]], len(positions))
+
+
+def sorted_index(dataset: MappedDataset, column: str) -> SortedIndex:
+    """The rows of a dataset version ordered by one column, built once."""
+    key = ("index", dataset.dataset_id, column)
+    index = query_cache.get(key)
+    if index is None:
+        index = _build_index(_sort_keys(dataset.read([column])[column]))
+        query_cache.put(key, index, index.order.nbytes + index.keys.nbytes)
+    return index
+
+
+def _index_mask(index: SortedIndex, operator: str, value: float, size: int) -> np.ndarray:
+    """Answers a range predicate with binary searches on a sorted index."""
+    keys = index.keys
+    match operator:
+        case "eq" | "ne":
+            start, stop = np.searchsorted(keys, value, "left"), np.searchsorted(keys, value, "right")
+        case "lt":
+            start, stop = 0, np.searchsorted(keys, value, "left")
+        case "le":
+            start, stop = 0, np.searchsorted(keys, value, "right")
+        case "gt":
+            start, stop = np.searchsorted(keys, value, "right"), index.valid
+        case _:
+            start, stop = np.searchsorted(keys, value, "left"), index.valid
+
+    mask = np.zeros(size, dtype=bool)
+    mask[index.order[start:stop]] = True
+    return ~mask if operator == "ne" else mask
+
+
+def _compare(keys: np.ndarray, operator: str, value: float) -> np.ndarray:
+    if numexpr is not None:
+        return numexpr.evaluate(
+            f"keys {__NUMEXPR_OPERATORS[operator]} value",
+            local_dict={"keys": keys, "value": value}
+        )
+    match operator:
+        case "eq":
+            return keys == value
+        case "ne":
+            return keys != value
+        case "lt":
+            return keys < value
+        case "le":
+            return keys <= value
+        case "gt":
+            return keys > value
+        case _:
+            return keys >= value
+
+
+def _string_mask(column: pd.Series, term: FilterTerm) -> pd.Series:
+    strings = column.astype(str)
+    value = term.value
+    if term.case_insensitive:
+        strings, value = strings.str.lower(), value.lower()
+
+    match term.operator:
+        case "contains":
+            mask = strings.str.contains(value, regex=False)
+        case "datestartswith":
+            mask = strings.str.startswith(value)
+        case "eq":
+            mask = strings == value
+        case "ne":
+            return (strings != value) | column.isna()
+        case "lt":
+            mask = strings < value
+        case "le":
+            mask = strings <= value
+        case "gt":
+            mask = strings > value
+        case _:
+            mask = strings >= value
+    return mask & column.notna()
+
+
+def _unary_mask(column: pd.Series, operator: str) -> pd.Series:
+    numeric = _is_orderable(column) and not pd.api.types.is_datetime64_any_dtype(column.dtype)
+    match operator:
+        case "is blank":
+            return column.isna() | (column.astype(str) == "")
+        case "is nil":
+            return column.isna()
+        case "is num":
+            return column.notna() & numeric
+        case "is str":
+            return column.map(lambda value: isinstance(value, str)).astype(bool)
+        case _:
+            if not numeric:
+                return pd.Series(False, index=column.index)
+            remainder = 0 if operator == "is even" else 1
+            return (column % 2 == remainder).fillna(False)
+
+
+class _Evaluator:
+    """Turns a filter tree into a boolean row mask of one dataset version.
+
+    Masks of terms and subexpressions are cached per dataset version, so
+    refining a filter only evaluates the parts that changed. Range
+    predicates use the sorted index of a column once it has been built.
+    """
+
+    def __init__(self, dataset: MappedDataset) -> None:
+        self.dataset = dataset
+        self.size = dataset.num_rows
+
+    def mask(self, node: FilterTerm | FilterExpression) -> np.ndarray:
+        key = ("mask", self.dataset.dataset_id, node)
+        mask = query_cache.get(key)
+        if mask is None:
+            if isinstance(node, FilterTerm):
+                mask = self.term_mask(node)
+            else:
+                mask = self.expression_mask(node)
+            query_cache.put(key, mask, mask.nbytes)
+        return mask
+
+    def expression_mask(self, expression: FilterExpression) -> np.ndarray:
+        masks = [self.mask(operand) for operand in expression.operands]
+        if expression.operator == "not":
+            return ~masks[0]
+
+        joiner = "&" if expression.operator == "and" else "|"
+        if numexpr is not None:
+            names = {f"m{number}": mask for number, mask in enumerate(masks)}
+            return numexpr.evaluate(joiner.join(names), local_dict=names)
+        combine = np.logical_and if joiner == "&" else np.logical_or
+        return combine.reduce(masks)
+
+    def term_mask(self, term: FilterTerm) -> np.ndarray:
+        if term.column not in self.dataset.columns:
+            # The DataTable only filters on its own columns; a term left
+            # over after a column disappeared is ignored
+            return np.ones(self.size, dtype=bool)
+
+        index = None
+        if _is_range_operator(term.operator):
+            index = query_cache.get(("index", self.dataset.dataset_id, term.column))
+        # The index answers the predicate without reading the column
+        column = self.dataset.read([term.column], stop=0 if index is not None else None)[term.column]
+
+        if term.operator.startswith("is "):
+            return _unary_mask(column, term.operator).to_numpy(dtype=bool)
+
+        if _is_range_operator(term.operator) and _is_orderable(column):
+            try:
+                value = _key_value(column, term.value)
+            except ValueError:
+                return np.full(self.size, term.operator == "ne")
+            if index is not None:
+                return _index_mask(index, term.operator, value, self.size)
+            return _compare(_sort_keys(column), term.operator, value)
+
+        if index is not None:
+            column = self.dataset.read([term.column])[term.column]
+        return _string_mask(column, term).fillna(False).to_numpy(dtype=bool)
+
+
+def _descending(index: SortedIndex) -> np.ndarray:
+    # Reversing the ascending order would also reverse equal values; a
+    # stable sort keeps them in row order, like pandas does
+    valid = index.order[:index.valid]
+    return valid[np.argsort(-index.keys, kind="stable")]
+
+
+def _sort_rows(
+    dataset: MappedDataset,
+    rows: np.ndarray | None,
+    sort_by: list[dict]
+) -> np.ndarray:
+    # A single orderable column is sorted through its index, which later
+    # range filters on that column use as well
+    if len(sort_by) == 1:
+        column = sort_by[0]["column_id"]
+        if _is_orderable(dataset.read([column], stop=0)[column]):
+            index = sorted_index(dataset, column)
+            order = index.order
+            if sort_by[0]["direction"] != "asc":
+                order = np.concatenate([_descending(index), index.order[index.valid:]])
+            if rows is None:
+                return order
+            selected = np.zeros(dataset.num_rows, dtype=bool)
+            selected[rows] = True
+            return order[selected[order]]
+
+    df = dataset.read([item["column_id"] for item in sort_by])
+    if rows is not None:
+        df = df.iloc[rows]
+    return df.sort_values(
+        by=[item["column_id"] for item in sort_by],
+        ascending=[item["direction"] == "asc" for item in sort_by],
+        kind="stable",
+        na_position="last"
+    ).index.to_numpy()
+
+
+def query_rows(
+    dataset: MappedDataset,
+    sort_by: list[dict] | None,
+    filter_query: str | None
+) -> np.ndarray | None:
+    """Positions of the filtered rows in sort order; None for all rows in order.
+
+    The result is cached per dataset version, filter and sort, so moving
+    between pages only slices it.
+    """
+    expression = parse_filter_query(filter_query)
+    sort_by = [
+        (item["column_id"], item["direction"])
+        for item in sort_by or []
+        if item["column_id"] in dataset.columns
+    ]
+    if expression is None and not sort_by:
+        return None
+
+    key = ("rows", dataset.dataset_id, expression, tuple(sort_by))
+    rows = query_cache.get(key)
+    if rows is None:
+        if expression is not None:
+            rows = np.flatnonzero(_Evaluator(dataset).mask(expression))
+        if sort_by:
+            rows = _sort_rows(dataset, rows, [
+                {"column_id": column, "direction": direction}
+                for column, direction in sort_by
+            ])
+        query_cache.put(key, rows, rows.nbytes)
+    return rows
+
+
+def query_page(
+    dataset: MappedDataset,
+    page_current: int,
+    page_size: int,
+    sort_by: list[dict] | None,
+    filter_query: str | None
+) -> tuple[pd.DataFrame, int]:
+    """Returns one page of the filtered and sorted dataset and the page count."""
+    rows = query_rows(dataset, sort_by, filter_query)
+
+    num_rows = dataset.num_rows if rows is None else len(rows)
+    page_count = max(math.ceil(num_rows / page_size), 1)
+    start = min(max(page_current or 0, 0), page_count - 1) * page_size
+    if rows is None:
+        return dataset.read(start=start, stop=start + page_size), page_count
+    return dataset.take(rows[start:start + page_size]), page_count
+
@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple
+
+from flask import Flask, abort, g, has_request_context, jsonify, request
+
+SESSION_MEMORY_BYTES = int(os.getenv("EDA_SESSION_MEMORY_BYTES", 1024 * 1024 * 1024))
+SESSION_COOKIE = "eda_session"
+# Lets operators see the memory of every session at /memory/sessions by
+# sending it as a bearer token; the report is disabled without it
+MEMORY_REPORT_TOKEN = os.getenv("EDA_MEMORY_REPORT_TOKEN")
+# Requests made outside of a browser session, like background work
+DEFAULT_SESSION = ""
+
+Charge = NamedTuple("Charge", [
+    ("session", str),
+    ("size", int),
+    ("evict", Callable[[], None]),
+])
+
+
+def current_session() -> str:
+    if not has_request_context():
+        return DEFAULT_SESSION
+    return g.get("eda_session") or request.cookies.get(SESSION_COOKIE, DEFAULT_SESSION)
+
+
+def session_digest(session: str) -> str:
+    """Names a session in reports without giving away its cookie."""
+    return hashlib.sha256(session.encode()).hexdigest()[:16]
+
+
+class MemoryAccountant:
+    """Bytes held by the caches of this worker process, per session.
+
+    The budget is per worker: every process accounts for its own caches,
+    so a session served by several workers may hold up to `session_bytes`
+    in each of them. Table versions shared by the workers through files
+    are charged only for the columns a worker reads into its own memory.
+
+    Caches charge every artifact they keep to the session of the request
+    that made it, together with a function that evicts it: recomputable
+    artifacts are dropped, the others are spilled to disk. Once a session
+    holds more than `session_bytes`, its least recently used artifacts are
+    evicted until it fits again. An artifact used by several sessions is
+    charged to the one that made it.
+    """
+
+    def __init__(self, session_bytes: int) -> None:
+        self.session_bytes = session_bytes
+        self._charges: OrderedDict[tuple[str, Hashable], Charge] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def charge(self, cache: str, key: Hashable, size: int, evict: Callable[[], None]) -> None:
+        """Records an artifact kept by `cache` under `key`.
+
+        `evict` is called without the lock of the accountant, so it may
+        take the lock of the cache.
+        """
+        self.record(cache, key, size, evict)()
+
+    def record(self, cache: str, key: Hashable, size: int, evict: Callable[[], None]) -> Callable[[], None]:
+        """Records an artifact like charge, but leaves the evictions to the caller.
+
+        Caches record their artifacts under their own lock, so that an
+        artifact is never kept without its charge, and call the returned
+        function once they have released it.
+        """
+        session = current_session()
+        evicted = []
+        with self._lock:
+            self._remove((cache, key))
+            self._charges[(cache, key)] = Charge(session, size, evict)
+            self._sizes[session] = self._sizes.get(session, 0) + size
+
+            if self._sizes[session] > self.session_bytes:
+                # The newest artifact is kept even when it exceeds the budget
+                for charged_key, charge in list(self._charges.items())[:-1]:
+                    if charge.session == session:
+                        self._remove(charged_key)
+                        evicted.append(charge.evict)
+                    if self._sizes.get(session, 0) <= self.session_bytes:
+                        break
+
+        def evict_artifacts() -> None:
+            for evict_artifact in evicted:
+                evict_artifact()
+        return evict_artifacts
+
+    def touch(self, cache: str, key: Hashable) -> None:
+        with self._lock:
+            if (cache, key) in self._charges:
+                self._charges.move_to_end((cache, key))
+
+    def release(self, cache: str, key: Hashable) -> None:
+        """Forgets an artifact the cache dropped by itself."""
+        with self._lock:
+            self._remove((cache, key))
+
+    def usage(self, session: str) -> dict:
+        """Bytes held for `session` in this worker, per cache."""
+        caches = {}
+        with self._lock:
+            for (cache, _), charge in self._charges.items():
+                if charge.session == session:
+                    caches[cache] = caches.get(cache, 0) + charge.size
+        return {
+            "session_bytes": self.session_bytes,
+            "bytes": sum(caches.values()),
+            "caches": caches,
+        }
+
+    def report(self) -> dict:
+        """Bytes held for every session in this worker, by session digest."""
+        sessions = {}
+        with self._lock:
+            for (cache, _), charge in self._charges.items():
+                caches = sessions.setdefault(charge.session, {})
+                caches[cache] = caches.get(cache, 0) + charge.size
+        return {
+            "session_bytes": self.session_bytes,
+            "bytes": sum(sum(caches.values()) for caches in sessions.values()),
+            "sessions": {
+                session_digest(session): {"bytes": sum(caches.values()), "caches": caches}
+                for session, caches in sessions.items()
+            },
+        }
+
+    def _remove(self, key: tuple[str, Hashable]) -> None:
+        charge = self._charges.pop(key, None)
+        if charge is None:
+            return
+        self._sizes[charge.session] -= charge.size
+        if not self._sizes[charge.session]:
+            del self._sizes[charge.session]
+
+
+memory_accountant = MemoryAccountant(SESSION_MEMORY_BYTES)
+
+
+def register_session_routes(server: Flask) -> None:
+    @server.before_request
+    def start_session():
+        if SESSION_COOKIE not in request.cookies:
+            g.eda_session = uuid.uuid4().hex
+
+    @server.after_request
+    def keep_session(response):
+        if g.get("eda_session"):
+            response.set_cookie(SESSION_COOKIE, g.eda_session, httponly=True, samesite="Lax")
+        return response
+
+    @server.get("/memory")
+    def memory_usage():
+        # Only the session of the caller, as seen by the worker serving it
+        return jsonify(memory_accountant.usage(current_session()))
+
+    @server.get("/memory/sessions")
+    def memory_report():
+        # Every session of the worker serving the request, for operators
+        if not MEMORY_REPORT_TOKEN:
+            abort(404)
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(token.encode(), MEMORY_REPORT_TOKEN.encode()):
+            abort(403)
+        return jsonify(memory_accountant.report())
@@ -0,0 +1,71 @@
+import base64
+from io import StringIO
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+# Payloads of Arrow IPC streams start with the prefix, so that they can be
+# told apart from the JSON written without pyarrow
+ARROW_PREFIX = "arrow:"
+
+
+def _compression() -> str | None:
+    for codec in ("zstd", "lz4"):
+        if pa.Codec.is_available(codec):
+            return codec
+    return None
+
+
+def frame_json(df: pd.DataFrame) -> str:
+    """Column names and rows as arrays, without repeating the names.
+
+    The layout of stores the browser changes, like `stored-dataframe`.
+    """
+    return df.to_json(orient="split", index=False)
+
+
+def encode_frame(df: pd.DataFrame) -> str:
+    """A compact string for dcc.Store of a table only the server reads.
+
+    The table is a compressed Arrow IPC stream in base64, which keeps the
+    types of its columns. Without pyarrow, or for columns Arrow cannot
+    hold, it is written by frame_json.
+    """
+    if pa is None:
+        return frame_json(df)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return frame_json(df)
+
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=_compression())
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return ARROW_PREFIX + base64.b64encode(sink.getvalue()).decode("ascii")
+
+
+def decode_frame(payload: str) -> pd.DataFrame:
+    """Reads a table written by encode_frame or frame_json.
+
+    Columns of Arrow payloads are views of the decoded buffers where
+    pandas can use them as they are, so decoding copies no more than the
+    decompression does. The JSON written by DataFrame.to_json before is
+    read too.
+    """
+    if payload.startswith(ARROW_PREFIX):
+        if pa is None:
+            raise TypeError("Reading Arrow payloads requires the pyarrow package")
+        data = base64.b64decode(payload[len(ARROW_PREFIX):])
+        table = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    if payload.startswith('{"columns":'):
+        # Column names are kept as they are, even when they look like numbers
+        return pd.read_json(StringIO(payload), orient="split", convert_axes=False)
+    return pd.read_json(StringIO(payload))
@@ -0,0 +1,573 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from eda.dataset.cache import LRUCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+VERSION_DIRECTORY = Path(os.getenv(
+    "EDA_VERSION_DIR",
+    os.path.join(tempfile.gettempdir(), "eda-versions")
+))
+# Columns of in-memory tables spilled by the memory budget of a session
+SPILL_DIRECTORY = Path(os.getenv(
+    "EDA_SPILL_DIR",
+    os.path.join(tempfile.gettempdir(), "eda-spill")
+))
+VERSION_STORE_BYTES = int(os.getenv("EDA_VERSION_STORE_BYTES", 512 * 1024 * 1024))
+VERSION_CACHE_BYTES = int(os.getenv("EDA_VERSION_CACHE_BYTES", 256 * 1024 * 1024))
+# Column files this recent are never removed, as another worker may be
+# about to refer to them
+COLUMN_FILE_GRACE_SECONDS = 60
+
+__VERSION_ID_REGEX = re.compile(r"^[0-9a-f]{32}$")
+
+StoredVersion = NamedTuple("StoredVersion", [
+    # Column names mapped to the ids of the stored columns
+    ("columns", dict[str, str]),
+    ("rows", int),
+])
+
+
+def _is_version_id(version_id) -> bool:
+    return isinstance(version_id, str) and bool(__VERSION_ID_REGEX.match(version_id))
+
+
+def _column_size(column: pd.Series) -> int:
+    return int(column.memory_usage(index=False, deep=True))
+
+
+def _derived_columns(
+    parent: dict[str, pd.Series],
+    columns: pd.DataFrame | None = None,
+    keep: np.ndarray | None = None,
+    drop: list[str] | None = None
+) -> dict[str, pd.Series]:
+    derived = dict(parent)
+    num_rows = len(next(iter(derived.values()))) if derived else 0
+    for name, values in (columns.items() if columns is not None else ()):
+        values = values.reindex(pd.RangeIndex(num_rows))
+        derived[name] = pd.Series(values.array, name=name, copy=False)
+    for name in drop or ():
+        derived.pop(name, None)
+    if keep is not None:
+        positions = np.flatnonzero(keep) if keep.dtype == bool else keep
+        derived = {
+            name: pd.Series(column.array[positions], name=name, copy=False)
+            for name, column in derived.items()
+        }
+    return derived
+
+
+def _edited(frame: pd.DataFrame, edits: list[dict]) -> dict:
+    """The arguments of derive that apply edits of the edit journal."""
+    changed = {}
+    keep = np.arange(len(frame))
+    drop = []
+    for edit in edits:
+        match edit["op"]:
+            case "cells":
+                row = keep[edit["row"]]
+                for name, value in edit["values"].items():
+                    if name not in frame.columns or name in drop:
+                        continue
+                    if name not in changed:
+                        # Edited cells hold whatever the user typed
+                        changed[name] = frame[name].astype(object)
+                    changed[name].iloc[row] = value
+            case "delete_rows":
+                keep = np.delete(keep, edit["rows"])
+            case "rows":
+                # Rows kept in the order they were saved in
+                keep = keep[edit["rows"]]
+            case "delete_column":
+                drop.append(edit["column"])
+
+    # The columns get the types pandas infers from the records of the
+    # table, so numbers typed into a numeric column keep it numeric
+    changed = {name: column.infer_objects() for name, column in changed.items()}
+    return {
+        "columns": pd.DataFrame(changed) if changed else None,
+        "keep": None if np.array_equal(keep, np.arange(len(frame))) else keep,
+        "drop": drop,
+    }
+
+
+class BaseVersionStore(ABC):
+    """Versions of tables that share unchanged columns.
+
+    Stores implement add, exists, frame and derive; the edits of the edit
+    journal are applied through them.
+    """
+
+    @abstractmethod
+    def add(self, df: pd.DataFrame) -> str:
+        """Stores a table as a new version without a parent."""
+
+    @abstractmethod
+    def exists(self, version_id: str | None) -> bool:
+        """Whether a version is kept, without reading its columns."""
+
+    @abstractmethod
+    def frame(self, version_id: str | None, columns: list[str] | None = None) -> pd.DataFrame | None:
+        """The table of a version, or None when it is no longer kept.
+
+        None is also returned when the version lacks one of `columns`.
+        """
+
+    @abstractmethod
+    def derive(
+        self,
+        version_id: str | None,
+        columns: pd.DataFrame | None = None,
+        keep: np.ndarray | None = None,
+        drop: list[str] | None = None
+    ) -> str | None:
+        """Stores a version that differs from `version_id` in a few columns.
+
+        `columns` replaces (or adds) whole columns and is indexed by row
+        position; `keep` is a boolean row mask or an array of row positions
+        applied afterwards. Returns None when the parent is no longer kept.
+        """
+
+    def apply_edits(self, version_id: str | None, edits: list[dict]) -> str | None:
+        """Stores the version made by edits of the edit journal.
+
+        Only edits made in the table are expected: changed cells, deleted
+        and reordered rows and deleted columns. Renames only change the
+        table columns.
+        """
+        frame = self.frame(version_id)
+        if frame is None:
+            return None
+        return self.derive(version_id, **_edited(frame, edits))
+
+    def edited(self, version_id: str | None, edits: list[dict]) -> pd.DataFrame | None:
+        """The table of a version with edits that are not stored yet.
+
+        Like apply_edits, but the result is only returned. It shares the
+        unchanged columns with the version.
+        """
+        frame = self.frame(version_id)
+        if frame is None:
+            return None
+        parent = {name: column for name, column in frame.items()}
+        return pd.DataFrame(_derived_columns(parent, **_edited(frame, edits)), copy=False)
+
+
+class VersionStore(BaseVersionStore):
+    """Versions of in-memory tables that share unchanged columns.
+
+    A version names its columns, which are stored once under ids of their
+    own and never modified. Deriving a version stores only the columns
+    that changed and refers to the other ones of its parent, so a version
+    costs as much memory as it changed. Deleting rows changes every column.
+    Once the distinct columns exceed `max_bytes`, the least recently used
+    versions are dropped. Columns evicted by the memory budget of their
+    session are spilled to disk one by one and read back when they are
+    used again, so a column shared by several versions stays shared.
+    """
+
+    def __init__(self, max_bytes: int, directory: Path = SPILL_DIRECTORY) -> None:
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._versions: OrderedDict[str, StoredVersion] = OrderedDict()
+        self._references: Counter[str] = Counter()
+        # Every column in memory, or the file it was spilled to
+        self._columns: dict[str, pd.Series | Path] = {}
+        self._sizes: dict[str, int] = {}
+        self._size = 0
+        self._cached = LRUCache("version", max_bytes, self._spill)
+        self._lock = threading.Lock()
+
+    def add(self, df: pd.DataFrame) -> str:
+        """Stores a table as a new version without a parent.
+
+        The store keeps the columns of `df`, which must not be modified
+        afterwards.
+        """
+        columns = {
+            name: pd.Series(column.array, name=name, copy=False)
+            for name, column in df.items()
+        }
+        return self._put(columns, len(df))
+
+    def exists(self, version_id: str | None) -> bool:
+        with self._lock:
+            return version_id in self._versions
+
+    def frame(self, version_id: str | None, columns: list[str] | None = None) -> pd.DataFrame | None:
+        """The table of a version, or None when it is no longer kept.
+
+        The frame shares its columns with the store and must not be
+        modified in place. Selecting `columns` copies nothing either.
+        """
+        version = self._version(version_id)
+        if version is None:
+            return None
+        names = list(version.columns) if columns is None else list(dict.fromkeys(columns))
+        if any(name not in version.columns for name in names):
+            return None
+        stored = self._read({name: version.columns[name] for name in names})
+        if stored is None:
+            return None
+        return pd.DataFrame(stored, index=pd.RangeIndex(version.rows), copy=False)
+
+    def derive(
+        self,
+        version_id: str | None,
+        columns: pd.DataFrame | None = None,
+        keep: np.ndarray | None = None,
+        drop: list[str] | None = None
+    ) -> str | None:
+        version = self._version(version_id)
+        if version is None:
+            return None
+
+        if keep is not None:
+            # Deleting rows changes every column
+            parent = self._read(version.columns)
+            if parent is None:
+                return None
+            derived = _derived_columns(parent, columns, keep, drop)
+            num_rows = len(next(iter(derived.values()))) if derived else 0
+            return self._put(derived, num_rows)
+
+        # The other columns are shared by their ids, without reading them
+        derived = dict(version.columns)
+        for name, values in (columns.items() if columns is not None else ()):
+            values = values.reindex(pd.RangeIndex(version.rows))
+            derived[name] = pd.Series(values.array, name=name, copy=False)
+        for name in drop or ():
+            derived.pop(name, None)
+        return self._put(derived, version.rows)
+
+    def _version(self, version_id: str | None) -> StoredVersion | None:
+        with self._lock:
+            version = self._versions.get(version_id)
+            if version is not None:
+                self._versions.move_to_end(version_id)
+        return version
+
+    def _read(self, column_ids: dict[str, str]) -> dict[str, pd.Series] | None:
+        stored = {}
+        for name, column_id in column_ids.items():
+            column = self._column(column_id)
+            if column is None:
+                return None
+            stored[name] = column
+        return stored
+
+    def _column(self, column_id: str) -> pd.Series | None:
+        column = self._cached.get(column_id)
+        if column is not None:
+            return column
+
+        with self._lock:
+            stored = self._columns.get(column_id)
+            size = self._sizes.get(column_id)
+        if isinstance(stored, Path):
+            try:
+                stored = pd.read_pickle(stored, compression=None)
+            except OSError:
+                return None
+        if stored is None:
+            return None
+        # The spill file stays until the column is dropped, so the column
+        # is not written again when it is evicted next time
+        self._cached.put(column_id, stored, size)
+        with self._lock:
+            if column_id not in self._columns:
+                # Dropped while it was read
+                self._cached.discard(column_id)
+        return stored
+
+    def _put(self, columns: dict[str, pd.Series | str], num_rows: int) -> str | None:
+        """Stores a version of new columns and the ids of shared ones."""
+        version_id = uuid.uuid4().hex
+        column_ids = {}
+        new = {}
+        for name, column in columns.items():
+            if isinstance(column, str):
+                column_ids[name] = column
+            else:
+                column_ids[name] = uuid.uuid4().hex
+                new[column_ids[name]] = column
+
+        sizes = {column_id: _column_size(column) for column_id, column in new.items()}
+        with self._lock:
+            if any(column_id not in self._columns and column_id not in new for column_id in column_ids.values()):
+                # The parent was dropped in the meantime
+                return None
+            self._columns.update(new)
+            self._sizes.update(sizes)
+            self._size += sum(sizes.values())
+            self._references.update(column_ids.values())
+            self._versions[version_id] = StoredVersion(column_ids, num_rows)
+
+            dropped = []
+            while self._size > self.max_bytes and len(self._versions) > 1:
+                _, version = self._versions.popitem(last=False)
+                dropped.extend(self._release(version))
+        self._remove(dropped)
+
+        for column_id, column in new.items():
+            if not self._cached.put(column_id, column, sizes[column_id]):
+                # Larger than the cache
+                self._spill(column_id, column)
+        return version_id
+
+    def _spill(self, column_id: str, column: pd.Series) -> None:
+        with self._lock:
+            if self._columns.get(column_id) is not column:
+                # Dropped, or already on disk
+                return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{column_id}.pickle"
+        pd.to_pickle(column, path, compression=None)
+        with self._lock:
+            if self._columns.get(column_id) is not column:
+                path.unlink(missing_ok=True)
+                return
+            self._columns[column_id] = path
+
+    def _release(self, version: StoredVersion) -> list[tuple[str, pd.Series | Path]]:
+        # Columns no other version refers to are dropped with the version
+        dropped = []
+        for column_id in version.columns.values():
+            self._references[column_id] -= 1
+            if self._references[column_id] > 0:
+                continue
+            del self._references[column_id]
+            self._size -= self._sizes.pop(column_id)
+            dropped.append((column_id, self._columns.pop(column_id)))
+        return dropped
+
+    def _remove(self, dropped: list[tuple[str, pd.Series | Path]]) -> None:
+        for column_id, stored in dropped:
+            self._cached.discard(column_id)
+            if isinstance(stored, Path):
+                stored.unlink(missing_ok=True)
+
+
+class SharedVersionStore(BaseVersionStore):
+    """Versions kept in memory-mapped Arrow files shared by all workers.
+
+    Every column is a file of its own and a version is a manifest naming
+    the files of its columns, so versions share unchanged columns like in
+    VersionStore and any worker process can read any version. Fixed-width
+    columns are read as views of the mapped files, which all workers share
+    through the page cache; the others are converted once per worker and
+    kept up to `cache_bytes`, or until the session that read them exceeds
+    its memory budget. Columns that Arrow cannot hold, like object
+    columns mixing numbers and strings, are pickled. Once the files exceed
+    `max_bytes`, the least recently used versions are removed.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, cache_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._columns = LRUCache("version", cache_bytes)
+
+    def add(self, df: pd.DataFrame) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sources = [[name, self._write_column(column)] for name, column in df.items()]
+        return self._write_manifest(sources, len(df))
+
+    def exists(self, version_id: str | None) -> bool:
+        return self._read_manifest(version_id) is not None
+
+    def frame(self, version_id: str | None, columns: list[str] | None = None) -> pd.DataFrame | None:
+        manifest = self._read_manifest(version_id)
+        if manifest is None:
+            return None
+        files = dict(manifest["columns"])
+        names = list(files) if columns is None else list(dict.fromkeys(columns))
+        if any(name not in files for name in names):
+            return None
+        try:
+            stored = {
+                name: pd.Series(self._column(files[name]).array, name=name, copy=False)
+                for name in names
+            }
+        except OSError:
+            return None
+        return pd.DataFrame(stored, index=pd.RangeIndex(manifest["rows"]), copy=False)
+
+    def derive(
+        self,
+        version_id: str | None,
+        columns: pd.DataFrame | None = None,
+        keep: np.ndarray | None = None,
+        drop: list[str] | None = None
+    ) -> str | None:
+        manifest = self._read_manifest(version_id)
+        if manifest is None:
+            return None
+
+        if keep is not None:
+            # Deleting rows changes every column
+            parent = self.frame(version_id)
+            if parent is None:
+                return None
+            derived = _derived_columns(dict(parent.items()), columns, keep, drop)
+            return self.add(pd.DataFrame(derived, copy=False))
+
+        num_rows = manifest["rows"]
+        sources = [source for source in manifest["columns"] if source[0] not in (drop or ())]
+        for name, values in (columns.items() if columns is not None else ()):
+            file_id = self._write_column(values.reindex(pd.RangeIndex(num_rows)))
+            replaced = [source for source in sources if source[0] == name]
+            if replaced:
+                replaced[0][1] = file_id
+            else:
+                sources.append([name, file_id])
+        return self._write_manifest(sources, num_rows)
+
+    def _path(self, file_id: str, suffix: str) -> Path:
+        return self.directory / f"{file_id}{suffix}"
+
+    def _write_column(self, column: pd.Series) -> str:
+        file_id = uuid.uuid4().hex
+        partial_path = self._path(file_id, ".partial")
+        try:
+            try:
+                table = pa.Table.from_pandas(
+                    column.reset_index(drop=True).to_frame("values"),
+                    preserve_index=False
+                )
+                path = self._path(file_id, ".arrow")
+                with pa.OSFile(str(partial_path), "wb") as sink, \
+                        pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                path = self._path(file_id, ".pickle")
+                column.reset_index(drop=True).to_pickle(partial_path, compression=None)
+            os.replace(partial_path, path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        return file_id
+
+    def _write_manifest(self, sources: list[list[str]], num_rows: int) -> str:
+        version_id = uuid.uuid4().hex
+        path = self._path(version_id, ".json")
+        partial_path = self._path(version_id, ".partial")
+        try:
+            partial_path.write_text(
+                json.dumps({"columns": sources, "rows": num_rows}),
+                encoding="utf-8"
+            )
+            os.replace(partial_path, path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        self._evict()
+        return version_id
+
+    def _read_manifest(self, version_id: str | None) -> dict | None:
+        if not _is_version_id(version_id):
+            return None
+        path = self._path(version_id, ".json")
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+            # The modification time orders versions by their last use
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return manifest
+
+    def _column(self, file_id: str) -> pd.Series:
+        column = self._columns.get(file_id)
+        if column is not None:
+            return column
+
+        path = self._path(file_id, ".arrow")
+        if path.exists():
+            os.utime(path)
+            table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+            column = table.to_pandas(split_blocks=True)["values"]
+        else:
+            path = self._path(file_id, ".pickle")
+            os.utime(path)
+            column = pd.read_pickle(path, compression=None)
+        # The files stay, so evicted columns are read again when needed
+        self._columns.put(file_id, column, int(column.memory_usage(index=False, deep=True)))
+        return column
+
+    def _evict(self) -> None:
+        # Workers share the files, so the sizes are taken from the directory
+        manifests = []
+        files = {}
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.suffix == ".json":
+                manifests.append((stat.st_mtime, path, stat.st_size))
+            elif path.suffix in (".arrow", ".pickle"):
+                files[path.stem] = (path, stat.st_size, stat.st_mtime)
+
+        size = sum(manifest_size for _, _, manifest_size in manifests) \
+            + sum(file_size for _, file_size, _ in files.values())
+        if size <= self.max_bytes:
+            return
+
+        # Every manifest is read once; removing one only releases its files
+        sources = {}
+        references = Counter()
+        for _, path, _ in manifests:
+            try:
+                manifest = json.loads(path.read_text(encoding="utf-8"))
+                file_ids = [file_id for _, file_id in manifest["columns"]]
+            except (OSError, ValueError):
+                file_ids = []
+            sources[path] = file_ids
+            references.update(file_ids)
+
+        deadline = time.time() - COLUMN_FILE_GRACE_SECONDS
+
+        def remove_unreferenced(file_ids) -> int:
+            removed = 0
+            for file_id in file_ids:
+                if references[file_id] > 0 or file_id not in files:
+                    continue
+                file_path, file_size, mtime = files[file_id]
+                if mtime < deadline:
+                    file_path.unlink(missing_ok=True)
+                    removed += file_size
+                    del files[file_id]
+            return removed
+
+        size -= remove_unreferenced(list(files))
+        manifests.sort()
+        for _, path, manifest_size in manifests[:-1]:
+            if size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= manifest_size
+            references.subtract(sources[path])
+            size -= remove_unreferenced(sources[path])
+
+
+# Without pyarrow the versions are kept in the memory of each worker
+if pa is not None:
+    version_store = SharedVersionStore(VERSION_DIRECTORY, VERSION_STORE_BYTES, VERSION_CACHE_BYTES)
+else:
+    version_store = VersionStore(VERSION_STORE_BYTES)
@@ -56,6 +56,81 @@ def skewness_1d(values: pd.Series) -> float:
     return values.skew()
 
 
+def describe_1d(data: pd.DataFrame, q: list[float]) -> pd.DataFrame:
+    """Descriptive statistics of numeric columns, computed together.
+
+    The columns are read once into a 2D array, sorted once for the median,
+    the extremes and the quantiles `q`, and reduced column-wise for the
+    sum and the central moments. Returns one row per column, with the
+    columns "count", "na_count", "min", "max", "range", "sum", "mean",
+    "median", "variance", "std", "skewness" and one column per quantile;
+    the values match the functions above, except that the skewness of
+    columns of very small values is not taken for 0 and that quantiles
+    at infinite values are not NaN.
+    """
+    values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+    num_rows = values.shape[0]
+    missing = np.isnan(values)
+    count = num_rows - missing.sum(axis=0)
+
+    # Missing values are sorted last, so the present ones of every column
+    # take its first `count` rows
+    ordered = np.sort(values, axis=0)
+    if num_rows == 0:
+        # A row of missing values to index into
+        ordered = np.full((1, values.shape[1]), np.nan)
+    columns = np.arange(values.shape[1])
+
+    def quantile(level: float) -> np.ndarray:
+        position = level * np.maximum(count - 1, 0)
+        low = np.floor(position).astype(np.intp)
+        high = np.ceil(position).astype(np.intp)
+        low_values = ordered[np.minimum(low, num_rows - 1), columns]
+        high_values = ordered[np.minimum(high, num_rows - 1), columns]
+        # Only values between two others are interpolated, so that
+        # infinite values are taken as they are
+        result = np.where(
+            high != low,
+            low_values + (high_values - low_values) * (position - low),
+            low_values
+        )
+        return np.where(count > 0, result, np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        total = np.where(missing, 0.0, values).sum(axis=0)
+        mean = total / count
+        deviations = np.where(missing, 0.0, values - mean)
+        squares = deviations ** 2
+        m2 = squares.sum(axis=0)
+        m3 = (squares * deviations).sum(axis=0)
+
+        variance = np.where(count > 1, m2 / (count - 1), np.nan)
+        skewness = count * (count - 1) ** 0.5 / (count - 2) * (m3 / m2 ** 1.5)
+        minimum = np.where(count > 0, ordered[0], np.nan)
+        maximum = np.where(count > 0, ordered[np.maximum(count - 1, 0), columns], np.nan)
+        # Only columns of equal values have no skewness; a spread within
+        # the rounding error of the mean would be taken for one as well
+        skewness = np.where(minimum == maximum, 0.0, skewness)
+        skewness = np.where(count > 2, skewness, np.nan)
+
+        summary = pd.DataFrame({
+            "count": count,
+            "na_count": num_rows - count,
+            "min": minimum,
+            "max": maximum,
+            "range": maximum - minimum,
+            "sum": total,
+            "mean": mean,
+            "median": quantile(0.5),
+            "variance": variance,
+            "std": np.sqrt(variance),
+            "skewness": skewness,
+        }, index=data.columns)
+        for level in q:
+            summary[level] = quantile(level)
+    return summary
+
+
 # 2D
 def clean_columns(x: pd.Series, y: pd.Series) -> tuple[pd.Series, pd.Series]:
     mask = ~np.isnan(x) & ~np.isnan(y) & ~np.isinf(x) & ~np.isinf(y)
@@ -0,0 +1,71 @@
+from typing import BinaryIO
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+__MAGIC_NUMBERS = (
+    (b"PAR1", "parquet"),
+    (b"ARROW1", "feather"),
+    (b"FEA1", "feather"),
+    (b"\xff\xff\xff\xff", "arrow_stream"),
+)
+__MAGIC_NUMBER_LENGTH = max(len(magic) for magic, _ in __MAGIC_NUMBERS)
+
+
+def detect_columnar_format(buffer: BinaryIO) -> str | None:
+    position = buffer.tell()
+    header = buffer.read(__MAGIC_NUMBER_LENGTH)
+    buffer.seek(position)
+
+    for magic, file_format in __MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return file_format
+    return None
+
+
+class ColumnarParser:
+    """Reads Parquet, Feather and Arrow IPC files.
+
+    The column types are stored in these formats, so the result does not
+    need any of the type sniffing done for CSV files.
+    """
+
+    def get_dataframe_from_buffer(self, buffer: BinaryIO) -> pd.DataFrame:
+        if pa is None:
+            raise TypeError("Reading columnar files requires the pyarrow package")
+
+        try:
+            match detect_columnar_format(buffer):
+                case "parquet":
+                    df = pd.read_parquet(buffer)
+                case "feather":
+                    df = pd.read_feather(buffer)
+                case "arrow_stream":
+                    df = pyarrow.ipc.open_stream(buffer).read_pandas()
+                case _:
+                    raise TypeError("Invalid content type")
+        except (pa.ArrowException, OSError) as e:
+            raise TypeError(f"Invalid columnar file: {e}") from e
+
+        return df.reset_index(drop=True)
+
+
+def write_columnar(df: pd.DataFrame, buffer: BinaryIO, file_format: str) -> None:
+    if pa is None:
+        raise TypeError("Writing columnar files requires the pyarrow package")
+
+    df = df.reset_index(drop=True)
+    match file_format:
+        case "parquet":
+            df.to_parquet(buffer, index=False)
+        case "feather":
+            df.to_feather(buffer)
+        case "arrow":
+            df.to_feather(buffer, compression="uncompressed")
+        case _:
+            raise ValueError(f"Unknown columnar format: {file_format}")
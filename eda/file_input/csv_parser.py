@@ -1,25 +1,169 @@
 import base64
-from io import StringIO
+import bz2
+import gzip
+import lzma
+import os
+from io import BytesIO
+from typing import BinaryIO
 
 import pandas as pd
 
+from eda.data_table.datetime_format import parse_datetime
+from eda.file_input.parallel_parser import (
+    PARSE_WORKERS,
+    buffer_array,
+    can_parse_in_parallel,
+    read_csv_parallel,
+)
+
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_ENGINE = os.getenv("EDA_CSV_ENGINE", "pyarrow")
+except ImportError:
+    DEFAULT_ENGINE = "c"
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__MAGIC_NUMBERS = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+__MAGIC_NUMBER_LENGTH = max(len(magic) for magic, _ in __MAGIC_NUMBERS)
+
+
+def detect_compression(buffer: BinaryIO) -> str | None:
+    position = buffer.tell()
+    header = buffer.read(__MAGIC_NUMBER_LENGTH)
+    buffer.seek(position)
+
+    for magic, compression in __MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def decompressing_stream(buffer: BinaryIO) -> BinaryIO:
+    match detect_compression(buffer):
+        case "gzip":
+            return gzip.GzipFile(fileobj=buffer, mode="rb")
+        case "bz2":
+            return bz2.BZ2File(buffer, mode="rb")
+        case "xz":
+            return lzma.LZMAFile(buffer, mode="rb")
+        case "zstd":
+            if zstandard is None:
+                raise TypeError("Reading zstd files requires the zstandard package")
+            return zstandard.ZstdDecompressor().stream_reader(
+                buffer,
+                read_across_frames=True
+            )
+        case _:
+            return buffer
+
+
+def decode_contents(content: str) -> tuple[str, BytesIO]:
+    content_type, content_string = content.split(",")
+    return content_type, BytesIO(base64.b64decode(content_string))
+
+
+def _is_date_like_name(name: str) -> bool:
+    # The same naming rule pd.read_json used to pick date columns
+    name = str(name).lower()
+    return name.endswith(("_at", "_time")) \
+        or name.startswith("timestamp") \
+        or name in ("modified", "date", "datetime")
+
+
+def normalize_dataframe(df: pd.DataFrame) -> None:
+    for name, values in df.items():
+        if values.dtype.kind == "M":
+            if values.dtype != "datetime64[ns]":
+                df[name] = values.astype("datetime64[ns]")
+            continue
+
+        if values.dtype == "object":
+            numeric = pd.to_numeric(values, errors="coerce")
+            if numeric.count() == values.count():
+                df[name] = values = numeric
+
+        # Numbers are only read as epoch timestamps in date-like columns
+        date_like = _is_date_like_name(name)
+        if values.dtype != "object" and not (date_like and values.dtype.kind in "iuf"):
+            continue
+        try:
+            df[name] = parse_datetime(values, cache_key=str(name), allow_epoch=date_like)
+        except ValueError:
+            if date_like and values.dtype == "object":
+                try:
+                    df[name] = pd.to_datetime(values)
+                except (ValueError, TypeError):
+                    pass
+
 
 class CSVParser:
-    def __init__(self, column_separator=";", decimal_separator=",") -> None:
+    def __init__(
+        self,
+        column_separator=";",
+        decimal_separator=",",
+        engine: str = DEFAULT_ENGINE,
+        quote_char='"',
+        encoding="utf-8",
+        workers: int = PARSE_WORKERS
+    ) -> None:
         self.column_separator = column_separator
         self.decimal_separator = decimal_separator
+        self.engine = engine
+        self.quote_char = quote_char
+        self.encoding = encoding
+        self.workers = workers
 
     def get_dataframe_from_contents(self, content: str) -> pd.DataFrame:
-        content_type, content_string = content.split(",")
-        if content_type.startswith("data:text/csv"):
-            decoded = base64.b64decode(content_string).decode("utf-8")
-            df = pd.read_csv(
-                StringIO(decoded),
-                sep=self.column_separator,
-                decimal=self.decimal_separator,
-                date_format="ISO8601"
-            )
-            df = pd.read_json(StringIO(df.to_json(date_format="iso")))
-            return df
+        content_type, decoded = decode_contents(content)
+        if content_type.startswith("data:text/csv") \
+                or detect_compression(decoded) is not None:
+            return self.get_dataframe_from_buffer(decoded)
         else:
             raise TypeError("Invalid content type")
+
+    def get_dataframe_from_buffer(self, buffer: BinaryIO) -> pd.DataFrame:
+        try:
+            stream = decompressing_stream(buffer)
+            if self._is_parallel(stream, buffer):
+                df = read_csv_parallel(
+                    buffer_array(buffer),
+                    self.workers,
+                    quote_char=self.quote_char,
+                    sep=self.column_separator,
+                    decimal=self.decimal_separator,
+                    encoding=self.encoding
+                )
+            else:
+                # Types are inferred from whole columns, as the parallel
+                # parser does, and not from blocks of rows
+                options = {"low_memory": False} if self.engine == "c" else {}
+                df = pd.read_csv(
+                    stream,
+                    sep=self.column_separator,
+                    decimal=self.decimal_separator,
+                    quotechar=self.quote_char,
+                    encoding=self.encoding,
+                    engine=self.engine,
+                    **options
+                )
+        except (ValueError, OSError, EOFError, UnicodeError) as e:
+            raise TypeError(f"Invalid CSV file: {e}") from e
+        normalize_dataframe(df)
+        return df
+
+    def _is_parallel(self, stream: BinaryIO, buffer: BinaryIO) -> bool:
+        # The pyarrow engine already parses blocks of the file on all
+        # cores; the byte-range split is for the single-threaded C parser.
+        return self.engine == "c" \
+            and self.workers > 1 \
+            and stream is buffer \
+            and can_parse_in_parallel(buffer, self.encoding)
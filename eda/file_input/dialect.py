@@ -0,0 +1,146 @@
+import csv
+import re
+from collections import Counter
+from typing import BinaryIO, NamedTuple
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:
+    from_bytes = None
+
+from eda.file_input.csv_parser import decompressing_stream
+from eda.file_input.columnar_parser import detect_columnar_format
+
+Dialect = NamedTuple("Dialect", [
+    ("column_separator", str | None),
+    ("decimal_separator", str | None),
+    ("quote_char", str),
+    ("encoding", str | None),
+])
+
+SNIFF_BYTES = 256 * 1024
+COLUMN_SEPARATORS = (";", ",", "\t", "|")
+QUOTE_CHARS = ('"', "'")
+DECIMAL_SEPARATOR_MAJORITY = 0.9
+
+__DECIMAL_REGEX = re.compile(r"^[-+]?\d+([,.])(\d+)$")
+
+
+def _read_prefix(buffer: BinaryIO) -> bytes:
+    position = buffer.tell()
+    prefix = decompressing_stream(buffer).read(SNIFF_BYTES)
+    buffer.seek(position)
+
+    # The last line is most likely cut in half, together with
+    # a multi-byte character at its end
+    last_newline = prefix.rfind(b"\n")
+    if last_newline > 0 and len(prefix) == SNIFF_BYTES:
+        prefix = prefix[:last_newline]
+    return prefix
+
+
+def _detect_encoding(prefix: bytes) -> str | None:
+    try:
+        prefix.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    if from_bytes is None:
+        return None
+    best = from_bytes(prefix).best()
+    return None if best is None else best.encoding
+
+
+def _detect_quote_char(text: str) -> str:
+    # Count quotes that open a field, i.e. stand at the start of a line
+    # or right after a column separator
+    field_start = "(?:^|[" + re.escape("".join(COLUMN_SEPARATORS)) + "])"
+    counts = {
+        quote_char: len(re.findall(field_start + quote_char, text, re.MULTILINE))
+        for quote_char in QUOTE_CHARS
+    }
+    return max(QUOTE_CHARS, key=lambda quote_char: counts[quote_char])
+
+
+def _detect_column_separator(lines: list[str], quote_char: str) -> str | None:
+    consistent = []
+    for separator in COLUMN_SEPARATORS:
+        field_counts = {
+            len(row)
+            for row in csv.reader(lines, delimiter=separator, quotechar=quote_char)
+            if row
+        }
+        if len(field_counts) == 1 and field_counts.pop() > 1:
+            consistent.append(separator)
+
+    # Both ";" and "," can split every line evenly, e.g. when each row
+    # has the same number of decimal commas; the sniffer is unsure then.
+    return consistent[0] if len(consistent) == 1 else None
+
+
+def _detect_decimal_separator(
+    lines: list[str],
+    column_separator: str,
+    quote_char: str
+) -> str | None:
+    if column_separator == ",":
+        return "."
+
+    counts = Counter()
+    for row in csv.reader(lines[1:], delimiter=column_separator, quotechar=quote_char):
+        for field in row:
+            match = __DECIMAL_REGEX.match(field.strip())
+            # "60.0" looks the same in files with either decimal mark
+            if match and match.group(2).strip("0"):
+                counts[match.group(1)] += 1
+
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    separator, count = counts.most_common(1)[0]
+    return separator if count / total >= DECIMAL_SEPARATOR_MAJORITY else None
+
+
+def sniff_dialect(buffer: BinaryIO) -> Dialect:
+    """Guesses the CSV dialect from the first SNIFF_BYTES of the file.
+
+    Fields the sniffer is not sure about are None, so the caller can fall
+    back to the values picked by the user.
+    """
+    prefix = _read_prefix(buffer)
+    encoding = _detect_encoding(prefix)
+    text = prefix.decode(encoding or "utf-8", errors="replace")
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return Dialect(None, None, '"', encoding)
+
+    quote_char = _detect_quote_char(text)
+    column_separator = _detect_column_separator(lines, quote_char)
+    decimal_separator = None
+    if column_separator is not None:
+        decimal_separator = _detect_decimal_separator(
+            lines,
+            column_separator,
+            quote_char
+        )
+
+    return Dialect(column_separator, decimal_separator, quote_char, encoding)
+
+
+def resolve_dialect(
+    buffer: BinaryIO,
+    column_separator: str,
+    decimal_separator: str
+) -> Dialect:
+    """Sniffs the dialect and fills the unsure fields with the given ones."""
+    if detect_columnar_format(buffer) is not None:
+        return Dialect(column_separator, decimal_separator, '"', "utf-8")
+
+    sniffed = sniff_dialect(buffer)
+    return Dialect(
+        column_separator=sniffed.column_separator or column_separator,
+        decimal_separator=sniffed.decimal_separator or decimal_separator,
+        quote_char=sniffed.quote_char,
+        encoding=sniffed.encoding or "utf-8"
+    )
@@ -1,14 +1,119 @@
+from typing import BinaryIO
+
 import dash
-from dash import html, dcc, callback, Input, State, Output
+import pandas as pd
+from dash import ctx, html, dcc, callback, Input, State, Output
 from dash.exceptions import PreventUpdate
 
-from eda.file_input.csv_parser import CSVParser
+from eda.file_input.csv_parser import CSVParser, decode_contents, detect_compression
+from eda.file_input.columnar_parser import ColumnarParser, detect_columnar_format
+from eda.file_input.upload import open_upload, remove_upload
+from eda.file_input.upload_cache import CachedUpload, upload_cache, upload_key
+from eda.file_input.dialect import COLUMN_SEPARATORS, Dialect, resolve_dialect
+from eda.dataset.mapped import (
+    dataset_path,
+    is_out_of_core,
+    needs_server_paging,
+    spool_dataset,
+    store_dataframe
+)
+from eda.dataset.transport import encode_frame
 from eda.data_table.column_type import (
     convert_dataframe_float_columns_to_int,
     get_types_from_dataframe
 )
+from eda.data_table.memory import compact_dataframe
 from eda.components import P, GridDiv
 
+column_separator_labels = {"\t": "Tabulator"}
+
+__COLUMNAR_CONTENT_TYPES = (
+    "data:application/vnd.apache.parquet",
+    "data:application/vnd.apache.arrow.file",
+)
+
+
+def _check_content_type(content_type: str, buffer: BinaryIO) -> None:
+    # Browsers seldom know the types of Parquet and Arrow files, so those
+    # are also accepted by their magic numbers, like compressed CSV files
+    if content_type.startswith(("data:text/csv", *__COLUMNAR_CONTENT_TYPES)) \
+            or detect_compression(buffer) is not None \
+            or detect_columnar_format(buffer) is not None:
+        return
+    raise TypeError("Invalid content type")
+
+
+def _read_buffer(buffer: BinaryIO, dialect: Dialect) -> pd.DataFrame:
+    if detect_columnar_format(buffer) is not None:
+        return ColumnarParser().get_dataframe_from_buffer(buffer)
+
+    parser = CSVParser(
+        dialect.column_separator,
+        dialect.decimal_separator,
+        quote_char=dialect.quote_char,
+        encoding=dialect.encoding
+    )
+    result = parser.get_dataframe_from_buffer(buffer)
+    convert_dataframe_float_columns_to_int(result)
+    return result
+
+
+def _load_upload(
+    buffer: BinaryIO,
+    size: int | None,
+    column_separator: str,
+    decimal_separator: str
+) -> tuple[CachedUpload, Dialect]:
+    # The separators picked in the dropdowns are only used when the
+    # sniffer cannot tell them from the start of the file.
+    dialect = resolve_dialect(buffer, column_separator, decimal_separator)
+
+    # Re-uploading the same file (e.g. after a browser refresh) is served
+    # from the cache without parsing or type inference.
+    key = upload_key(buffer, dialect.column_separator, dialect.decimal_separator)
+    cached = upload_cache.get(key)
+    if cached is not None and (
+        cached.dataset_id is None or dataset_path(cached.dataset_id).exists()
+    ):
+        return cached, dialect
+
+    dataset_id = None
+    if size is not None and is_out_of_core(size):
+        dataset = spool_dataset(
+            buffer,
+            dialect.column_separator,
+            dialect.decimal_separator,
+            quote_char=dialect.quote_char,
+            encoding=dialect.encoding
+        )
+        dataset_id = dataset.dataset_id
+        result = dataset.preview()
+        types = get_types_from_dataframe(result)
+        memory = dataset.memory_report()
+    else:
+        result = _read_buffer(buffer, dialect)
+        # The types are taken before compaction, which stores repetitive
+        # strings as categories without changing how they are presented
+        types = get_types_from_dataframe(result)
+        memory = compact_dataframe(result)
+
+        # Tables too long for the browser are kept on the server and
+        # shown page by page
+        if needs_server_paging(len(result)):
+            dataset = store_dataframe(result)
+            if dataset is not None:
+                dataset_id = dataset.dataset_id
+                result = dataset.preview()
+
+    loaded = CachedUpload(
+        payload=encode_frame(result),
+        types=types,
+        dataset_id=dataset_id,
+        memory=memory
+    )
+    upload_cache.put(key, loaded)
+    return loaded, dialect
+
 
 def register_input_callbacks():
     @callback(
@@ -25,10 +130,10 @@ def register_input_callbacks():
                             id="file-column-separator",
                             options=[
                                 {
-                                    "label": separator,
+                                    "label": column_separator_labels.get(separator, separator),
                                     "value": separator,
                                 }
-                                for separator in [";", ","]
+                                for separator in COLUMN_SEPARATORS
                             ],
                             value=";",
                             placeholder="Seprator kolumn",
@@ -62,7 +167,7 @@ def register_input_callbacks():
                     html.Label(className="flex flex-col items-center w-full p-5 text-center bg-white border-2 border-purple-200 border-dashed cursor-pointer dark:bg-gray-900 dark:border-gray-700 rounded-xl hover:bg-slate-50 hover:border-blue-600 ease-in-out duration-200", children=[
                         html.I(className="fa-solid fa-cloud-arrow-up text-2xl text-gray-500 dark:text-gray-400"),
                         html.H2("Dodaj swój arkusz kalkulacyjny", className="mt-1 font-medium tracking-wide text-gray-700 dark:text-gray-200"),
-                        html.P("Wybierz lub przeciągnij i upuść plik CSV", className="mt-2 text-xs tracking-wide text-gray-500 dark:text-gray-400")
+                        html.P("Wybierz lub przeciągnij i upuść plik CSV, Parquet lub Feather", className="mt-2 text-xs tracking-wide text-gray-500 dark:text-gray-400")
                     ])
                 ]
             ),
@@ -86,24 +191,64 @@ def register_input_callbacks():
     @callback(
         Output("dataframe", "data"),
         Output("base_dtypes", "data"),
+        Output("dataset_handle", "data"),
+        Output("memory_report", "data"),
         Output("upload-error", "children"),
+        Output("file-column-separator", "value"),
+        Output("file-decimal-separator", "value"),
         Input("upload-csv-data", "contents"),
+        Input("upload_handle", "data"),
         State("file_column_separator", "data"),
         State("file_decimal_separator", "data")
     )
     def handle_file(
         content: str | None,
+        upload_handle: dict | None,
         column_separator: str,
         decimal_separator: str
     ):
-        if content is None:
+        if content is None and upload_handle is None:
             raise PreventUpdate
 
         try:
-            parser = CSVParser(column_separator, decimal_separator)
-            result = parser.get_dataframe_from_contents(content)
-            convert_dataframe_float_columns_to_int(result)
-            types = get_types_from_dataframe(result)
-            return result.to_json(), types, dash.no_update
+            if ctx.triggered_id == "upload_handle":
+                # The spool file is not needed again, whether it parses or not
+                try:
+                    with open_upload(upload_handle) as spooled_file:
+                        _check_content_type(f"data:{upload_handle.get('type') or ''}", spooled_file)
+                        loaded, dialect = _load_upload(
+                            spooled_file,
+                            upload_handle["size"],
+                            column_separator,
+                            decimal_separator
+                        )
+                finally:
+                    remove_upload(upload_handle)
+            else:
+                content_type, decoded = decode_contents(content)
+                _check_content_type(content_type, decoded)
+                loaded, dialect = _load_upload(
+                    decoded,
+                    None,
+                    column_separator,
+                    decimal_separator
+                )
+            return (
+                loaded.payload,
+                loaded.types,
+                loaded.dataset_id,
+                loaded.memory,
+                dash.no_update,
+                dialect.column_separator,
+                dialect.decimal_separator
+            )
         except TypeError as e:
-            return dash.no_update, dash.no_update, html.Div(str(e))
+            return (
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                dash.no_update,
+                html.Div(str(e)),
+                dash.no_update,
+                dash.no_update
+            )
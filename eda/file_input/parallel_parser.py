@@ -0,0 +1,166 @@
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+
+PARSE_WORKERS = int(os.getenv("EDA_CSV_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_BYTES = int(os.getenv("EDA_CSV_PARALLEL_MIN_BYTES", 64 * 1024 * 1024))
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+__NEWLINE = ord("\n")
+
+
+def _count(data: np.ndarray, start: int, stop: int, byte: int) -> int:
+    count = 0
+    for block_start in range(start, stop, SCAN_BLOCK_SIZE):
+        block = data[block_start:min(block_start + SCAN_BLOCK_SIZE, stop)]
+        count += int(np.count_nonzero(block == byte))
+    return count
+
+
+def _find(data: np.ndarray, start: int, byte: int) -> int:
+    for block_start in range(start, len(data), SCAN_BLOCK_SIZE):
+        block = data[block_start:block_start + SCAN_BLOCK_SIZE]
+        found = np.flatnonzero(block == byte)
+        if found.size:
+            return block_start + int(found[0])
+    return len(data)
+
+
+def _next_line_start(
+    data: np.ndarray,
+    position: int,
+    quote: int,
+    in_quotes: bool
+) -> tuple[int, bool]:
+    """Moves past the next line break that is not inside a quoted field.
+
+    `in_quotes` tells whether `position` itself is inside quotes; a field
+    is open as long as an odd number of quote characters came before it.
+    """
+    while position < len(data):
+        newline = _find(data, position, __NEWLINE)
+        in_quotes ^= bool(_count(data, position, newline, quote) % 2)
+        position = min(newline + 1, len(data))
+        if not in_quotes:
+            break
+    return position, in_quotes
+
+
+def split_ranges(
+    data: np.ndarray,
+    start: int,
+    parts: int,
+    quote_char: str
+) -> list[tuple[int, int]]:
+    """Splits data[start:] into about `parts` ranges of whole CSV rows."""
+    quote = ord(quote_char)
+    cuts = [start]
+    position, in_quotes = start, False
+    for part in range(1, parts):
+        target = start + (len(data) - start) * part // parts
+        if target <= position:
+            continue
+        in_quotes ^= bool(_count(data, position, target, quote) % 2)
+        position, in_quotes = _next_line_start(data, target, quote, in_quotes)
+        if position < len(data):
+            cuts.append(position)
+    cuts.append(len(data))
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def _has_compatible_dtypes(columns: list[pd.Series]) -> bool:
+    # All-empty chunks say nothing about the type of the column
+    dtypes = {column.dtype for column in columns if column.notna().any()}
+    if len(dtypes) <= 1:
+        return True
+    return all(dtype.kind in "iuf" for dtype in dtypes)
+
+
+def read_csv_parallel(
+    data: np.ndarray,
+    workers: int,
+    quote_char: str = '"',
+    **read_csv_options
+) -> pd.DataFrame:
+    """Parses a CSV file split into byte ranges on a pool of threads.
+
+    The C parser releases the GIL while tokenizing, so the ranges are
+    parsed at the same time. Every range shares the column names read
+    from the header and infers the types of whole columns, like read_csv
+    with low_memory=False. Columns that come out as numbers in some ranges
+    and as strings in others are parsed again as strings, which is what
+    the single read_csv call would have produced for them.
+    """
+    header_end, _ = _next_line_start(data, 0, ord(quote_char), False)
+    columns = pd.read_csv(
+        BytesIO(data[:header_end]),
+        nrows=0,
+        quotechar=quote_char,
+        **read_csv_options
+    ).columns.tolist()
+    if header_end >= len(data):
+        return pd.DataFrame(columns=columns)
+    ranges = split_ranges(data, header_end, workers, quote_char)
+
+    def parse(byte_range: tuple[int, int], usecols: list[str] | None = None) -> pd.DataFrame:
+        start, stop = byte_range
+        return pd.read_csv(
+            BytesIO(data[start:stop]),
+            header=None,
+            names=columns,
+            usecols=usecols,
+            dtype=None if usecols is None else str,
+            quotechar=quote_char,
+            engine="c",
+            low_memory=False,
+            **read_csv_options
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(parse, ranges))
+        mismatched = [
+            column
+            for column in columns
+            if not _has_compatible_dtypes([frame[column] for frame in frames])
+        ]
+        if mismatched:
+            # Only the mismatched columns are parsed again
+            reparsed = pool.map(lambda byte_range: parse(byte_range, mismatched), ranges)
+            for frame, strings in zip(frames, reparsed):
+                frame[mismatched] = strings[mismatched]
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def buffer_array(buffer: BinaryIO) -> np.ndarray:
+    """Exposes the rest of a file or BytesIO as a uint8 array without copying it."""
+    position = buffer.tell()
+    if hasattr(buffer, "getbuffer"):
+        return np.frombuffer(buffer.getbuffer(), dtype=np.uint8)[position:]
+
+    mapped = mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapped, dtype=np.uint8)[position:]
+
+
+def can_parse_in_parallel(buffer: BinaryIO, encoding: str) -> bool:
+    # On a single core the threads only add the cost of splitting
+    if (os.cpu_count() or 1) < 2:
+        return False
+    # Splitting at b"\n" is only safe for ASCII compatible encodings
+    if "\n".encode(encoding) != b"\n":
+        return False
+    if not hasattr(buffer, "getbuffer"):
+        try:
+            buffer.fileno()
+        except (AttributeError, OSError):
+            return False
+
+    position = buffer.tell()
+    size = buffer.seek(0, os.SEEK_END) - position
+    buffer.seek(position)
+    return size >= PARALLEL_MIN_BYTES
@@ -0,0 +1,92 @@
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from flask import Flask, abort, jsonify, request
+
+SPOOL_DIRECTORY = Path(os.getenv(
+    "EDA_SPOOL_DIR",
+    os.path.join(tempfile.gettempdir(), "eda-uploads")
+))
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+READ_BLOCK_SIZE = 1024 * 1024
+
+__UPLOAD_ID_REGEX = re.compile(r"^[0-9a-f]{32}$")
+
+
+def spool_path(upload_id: str) -> Path:
+    if not isinstance(upload_id, str) or not __UPLOAD_ID_REGEX.match(upload_id):
+        raise TypeError("Invalid upload handle")
+    return SPOOL_DIRECTORY / f"{upload_id}.part"
+
+
+def open_upload(handle: dict):
+    path = spool_path(handle.get("upload_id"))
+    if not path.exists() or path.stat().st_size != handle.get("size"):
+        raise TypeError("Upload is incomplete")
+    return open(path, "rb")
+
+
+def remove_upload(handle: dict) -> None:
+    spool_path(handle.get("upload_id")).unlink(missing_ok=True)
+
+
+def _remove_stale_uploads() -> None:
+    deadline = time.time() - STALE_UPLOAD_SECONDS
+    for path in SPOOL_DIRECTORY.glob("*.part"):
+        try:
+            if path.stat().st_mtime < deadline:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def _received_bytes(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+def register_upload_routes(server: Flask) -> None:
+    @server.post("/upload")
+    def create_upload():
+        SPOOL_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        _remove_stale_uploads()
+
+        upload_id = uuid.uuid4().hex
+        spool_path(upload_id).touch()
+        return jsonify(upload_id=upload_id, offset=0)
+
+    @server.get("/upload/<upload_id>")
+    def upload_status(upload_id: str):
+        try:
+            path = spool_path(upload_id)
+        except TypeError:
+            abort(404)
+        if not path.exists():
+            abort(404)
+        return jsonify(upload_id=upload_id, offset=_received_bytes(path))
+
+    @server.put("/upload/<upload_id>")
+    def upload_chunk(upload_id: str):
+        try:
+            path = spool_path(upload_id)
+        except TypeError:
+            abort(404)
+        if not path.exists():
+            abort(404)
+
+        # A chunk is accepted only at the current end of the spool file,
+        # so a client that lost track after a dropped connection asks
+        # for the offset again and resumes from there.
+        offset = request.args.get("offset", type=int)
+        received = _received_bytes(path)
+        if offset != received:
+            return jsonify(upload_id=upload_id, offset=received), 409
+
+        with open(path, "ab") as spool:
+            while block := request.stream.read(READ_BLOCK_SIZE):
+                spool.write(block)
+
+        return jsonify(upload_id=upload_id, offset=_received_bytes(path))
@@ -0,0 +1,54 @@
+import hashlib
+import os
+from copy import copy
+from typing import BinaryIO, NamedTuple
+
+from eda.data_table.memory import ColumnMemory
+from eda.dataset.cache import LRUCache
+
+CachedUpload = NamedTuple("CachedUpload", [
+    ("payload", str),
+    ("types", dict[str, str]),
+    ("dataset_id", str | None),
+    ("memory", dict[str, ColumnMemory]),
+])
+
+UPLOAD_CACHE_BYTES = int(os.getenv("EDA_UPLOAD_CACHE_BYTES", 512 * 1024 * 1024))
+
+
+def upload_key(
+    buffer: BinaryIO,
+    column_separator: str,
+    decimal_separator: str
+) -> str:
+    position = buffer.tell()
+    digest = hashlib.file_digest(buffer, "sha256").hexdigest()
+    buffer.seek(position)
+    return f"{digest}:{column_separator}:{decimal_separator}"
+
+
+class UploadCache:
+    """Parsed uploads keyed by content hash and separators.
+
+    The least recently used entries are dropped once the cached JSON
+    exceeds `max_bytes`, or once the session that parsed them exceeds its
+    memory budget.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._entries = LRUCache("upload", max_bytes)
+
+    def get(self, key: str) -> CachedUpload | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return entry._replace(types=copy(entry.types))
+
+    def put(self, key: str, entry: CachedUpload) -> None:
+        self._entries.put(key, entry._replace(types=copy(entry.types)), len(entry.payload))
+
+    def discard(self, key: str) -> None:
+        self._entries.discard(key)
+
+
+upload_cache = UploadCache(UPLOAD_CACHE_BYTES)
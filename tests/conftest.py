@@ -0,0 +1,36 @@
+import dash._callback
+import pytest
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+import app
+
+
+def _registered_functions() -> dict[tuple[str, str], object]:
+    # Before the first request the callbacks wait in the global map
+    callbacks = [*dash._callback.GLOBAL_CALLBACK_MAP.values(), *app.app.callback_map.values()]
+    return {
+        (function.__wrapped__.__module__, function.__wrapped__.__name__): function.__wrapped__
+        for function in (entry.get("callback") for entry in callbacks)
+        if function is not None
+    }
+
+
+@pytest.fixture
+def dash_callback():
+    """Finds the function of a server callback by its module and name."""
+    functions = _registered_functions()
+    return lambda module, name: functions[(module, name)]
+
+
+@pytest.fixture
+def triggered():
+    """Sets the input that triggered the callback called next."""
+    def trigger(prop_id: str, value=None) -> None:
+        context_value.set(AttributeDict(
+            triggered_inputs=[{"prop_id": prop_id, "value": value}],
+            inputs_list=[],
+            states_list=[],
+            outputs_list=[],
+        ))
+    return trigger
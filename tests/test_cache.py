@@ -0,0 +1,60 @@
+import pytest
+
+from eda.dataset import cache
+from eda.dataset.cache import LRUCache
+from eda.dataset.sessions import DEFAULT_SESSION, MemoryAccountant
+
+
+@pytest.fixture
+def accountant(monkeypatch):
+    accountant = MemoryAccountant(100)
+    monkeypatch.setattr(cache, "memory_accountant", accountant)
+    return accountant
+
+
+@pytest.fixture
+def evicted() -> list:
+    return []
+
+
+def _charged(accountant: MemoryAccountant) -> int:
+    return accountant.usage(DEFAULT_SESSION)["bytes"]
+
+
+def test_least_recently_used_entries_are_dropped(accountant, evicted):
+    lru = LRUCache("test", 50, lambda key, value: evicted.append(key))
+    lru.put("a", "A", 20)
+    lru.put("b", "B", 20)
+    assert lru.get("a") == "A"
+    lru.put("c", "C", 20)
+
+    assert evicted == ["b"] and "b" not in lru
+    assert lru.get("a") == "A" and lru.get("c") == "C"
+    assert _charged(accountant) == 40
+
+    lru.put("too large", "X", 51)
+    assert "too large" not in lru and _charged(accountant) == 40
+
+
+def test_entries_over_the_session_budget_are_dropped(accountant, evicted):
+    first = LRUCache("first", 1000, lambda key, value: evicted.append(key))
+    second = LRUCache("second", 1000)
+    first.put("a", "A", 60)
+    second.put("b", "B", 60)
+
+    assert evicted == ["a"] and "a" not in first and "b" in second
+    assert _charged(accountant) == 60
+
+
+def test_replaced_and_discarded_entries_are_charged_once(accountant, evicted):
+    lru = LRUCache("test", 1000, lambda key, value: evicted.append(value))
+    lru.put("a", "old", 30)
+    lru.put("a", "new", 40)
+    assert _charged(accountant) == 40
+
+    # An eviction of the value replaced meanwhile leaves the new one
+    lru._evict("a", "old")
+    assert lru.get("a") == "new" and evicted == []
+
+    lru.discard("a")
+    assert "a" not in lru and _charged(accountant) == 0 and evicted == []
@@ -0,0 +1,75 @@
+import dash._callback
+import numpy as np
+import pandas as pd
+import pytest
+from dash import Patch
+from dash.exceptions import PreventUpdate
+
+import app
+from eda.data_table.history import table_version
+from eda.data_table.table_patch import table_changes
+from eda.dataset.versions import version_store
+
+DATA_CORRECTION = "eda.data_correction.data_correction"
+
+
+@pytest.fixture
+def current_version() -> dict:
+    return table_version(version_store.add(pd.DataFrame({
+        "a": [1.0, np.nan, 3.0],
+        "b": ["x", None, None],
+    })))
+
+
+def test_server_callbacks_do_not_take_the_table_records():
+    callbacks = [*dash._callback.GLOBAL_CALLBACK_MAP.values(), *app.app.callback_map.values()]
+    for entry in callbacks:
+        if entry.get("callback") is not None:
+            assert {"id": "data-table", "property": "data"} not in entry["inputs"]
+
+
+def test_missing_values_of_the_version(dash_callback, triggered, current_version):
+    table_data = dash_callback(DATA_CORRECTION, "table_data")
+
+    triggered("table-version.data", current_version)
+    assert table_data(current_version, None, None) == [
+        {"col": "a", "number": 1, "rows": "1"},
+        {"col": "b", "number": 2, "rows": "1, 2"},
+    ]
+
+
+def test_server_changes_wait_for_their_version(dash_callback, triggered, current_version):
+    table_data = dash_callback(DATA_CORRECTION, "table_data")
+    changes = table_changes(["b"])
+
+    triggered("changed-columns.data", changes)
+    with pytest.raises(PreventUpdate):
+        table_data(current_version, None, changes)
+
+    # Only the changed columns are counted again
+    version = version_store.derive(current_version["version"], pd.DataFrame({"b": ["x", "y", None]}))
+    current_version = {**table_version(version), "changes": changes}
+    triggered("table-version.data", current_version)
+    row_data = table_data(current_version, None, changes)
+    assert isinstance(row_data, Patch)
+    assert row_data.to_plotly_json()["operations"] == [
+        {"operation": "Assign", "location": [1], "params": {"value": {"col": "b", "number": 1, "rows": "2"}}},
+    ]
+
+
+def test_panels_keep_their_choices_when_only_values_change(dash_callback, triggered, current_version):
+    data_correction = dash_callback(DATA_CORRECTION, "data_correction")
+    update_dropdowns = dash_callback("eda.components.statistics_1d", "update_dropdowns")
+
+    changed = {**current_version, "changes": table_changes(["a"])}
+    triggered("table-version.data", changed)
+    for function in (data_correction, update_dropdowns):
+        with pytest.raises(PreventUpdate):
+            function(changed, None, None)
+
+    # Hand edits change the table in ways the server did not see
+    edited = {**current_version, "edits": [{"op": "delete_column", "column": "b"}], "changes": None}
+    triggered("table-version.data", edited)
+    dropdown = update_dropdowns(edited, None, None)
+    assert dropdown.children[1].options == [{"label": "a", "value": "a"}]
+    assert data_correction(edited, None, None) is not None
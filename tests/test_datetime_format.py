@@ -0,0 +1,22 @@
+import pandas as pd
+
+from eda.data_table.datetime_format import parse_datetime
+
+
+def test_cached_format_is_not_shared_by_columns_of_the_same_name():
+    month_first = pd.Series(["01/13/2020", "03/01/2020", "12/25/2021"])
+    ambiguous = pd.Series(["03/01/2020", "04/02/2021"])
+    expected = parse_datetime(ambiguous)
+
+    parsed = parse_datetime(month_first, cache_key="date")
+    assert parsed[1] == pd.Timestamp(2020, 3, 1)
+
+    # Another file whose dates fit either order is read as without a cache
+    assert parse_datetime(ambiguous, cache_key="date").equals(expected)
+    assert expected[0] == pd.Timestamp(2020, 1, 3)
+
+
+def test_cached_format_is_reused_for_the_same_column():
+    values = pd.Series(["31.12.2020 23:59", "01.02.2021 00:00"])
+    first = parse_datetime(values, cache_key="when")
+    assert parse_datetime(values.copy(), cache_key="when").equals(first)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import skew
+
+from eda.destats import describe_1d
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+@pytest.fixture
+def columns() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    size = 1000
+    return pd.DataFrame({
+        "small": rng.exponential(size=size) * 1e-8,
+        "large": rng.normal(1e12, 1e9, size=size),
+        "constant": np.full(size, 3.3),
+        "missing": np.where(rng.random(size) < 0.2, np.nan, rng.normal(size=size)),
+        "nullable": pd.array(np.where(rng.random(size) < 0.2, None, rng.integers(0, 5, size)), dtype="Int8"),
+    })
+
+
+def test_describe_1d_matches_pandas(columns):
+    summary = describe_1d(columns, QUANTILES)
+    for name, values in columns.items():
+        values = values.astype("float64")
+        row = summary.loc[name]
+        assert row["na_count"] == values.isna().sum()
+        assert row["mean"] == pytest.approx(values.mean(), rel=1e-9)
+        assert row["median"] == pytest.approx(values.median(), rel=1e-12)
+        assert row["variance"] == pytest.approx(values.var(), rel=1e-9)
+        assert row["std"] == pytest.approx(values.std(), rel=1e-9)
+        assert row["range"] == pytest.approx(values.max() - values.min(), rel=1e-12)
+        for level in QUANTILES:
+            assert row[level] == pytest.approx(values.quantile(level), rel=1e-12)
+
+
+def test_describe_1d_skewness(columns):
+    summary = describe_1d(columns, QUANTILES)
+    for name in ("large", "constant", "missing", "nullable"):
+        assert summary.at[name, "skewness"] == pytest.approx(columns[name].astype("float64").skew(), abs=1e-9)
+    # pandas takes the spread of very small values for a rounding error
+    assert summary.at["small", "skewness"] == pytest.approx(skew(columns["small"], bias=False), rel=1e-9)
+
+
+def test_describe_1d_small_values_keep_their_spread():
+    summary = describe_1d(pd.DataFrame({"x": [1e-8, 2e-8, 4e-8]}), QUANTILES)
+    assert summary.at["x", "variance"] == pytest.approx(2.3333333333333336e-16)
+    assert summary.at["x", "std"] == pytest.approx(1.5275252316519467e-08)
+
+
+def test_describe_1d_few_values():
+    summary = describe_1d(pd.DataFrame({"empty": [np.nan] * 3, "two": [1.0, 2.0, np.nan]}), QUANTILES)
+    assert summary.at["empty", "count"] == 0
+    assert np.isnan(summary.at["empty", "mean"]) and np.isnan(summary.at["empty", 0.5])
+    assert summary.at["two", "variance"] == pytest.approx(0.5)
+    assert np.isnan(summary.at["two", "skewness"])
+
+    summary = describe_1d(pd.DataFrame({"x": pd.Series([], dtype="float64")}), QUANTILES)
+    assert summary.at["x", "count"] == 0 and np.isnan(summary.at["x", "max"])
+
+
+def test_describe_1d_skewness_far_from_zero():
+    summary = describe_1d(pd.DataFrame({"x": [1e9, 1e9, 1e9 + 3]}), QUANTILES)
+    assert summary.at["x", "skewness"] == pytest.approx(pd.Series([1e9, 1e9, 1e9 + 3]).skew())
+    assert summary.at["x", "skewness"] == pytest.approx(1.7320508075688772)
+
+
+def test_describe_1d_infinite_values():
+    summary = describe_1d(pd.DataFrame({
+        "inf": [1.0, np.inf, 3.0],
+        "-inf": [-np.inf, 1.0, 3.0],
+    }), QUANTILES)
+    assert summary.at["inf", "min"] == 1.0
+    assert summary.at["inf", "max"] == np.inf and summary.at["inf", "range"] == np.inf
+    assert summary.at["inf", "median"] == 3.0
+    assert summary.at["-inf", "min"] == -np.inf and summary.at["-inf", "max"] == 3.0
+    assert summary.at["-inf", "range"] == np.inf and summary.at["-inf", "median"] == 1.0
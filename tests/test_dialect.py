@@ -0,0 +1,59 @@
+import gzip
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from eda.file_input import dialect
+from eda.file_input.dialect import Dialect, resolve_dialect, sniff_dialect
+
+EXAMPLES = Path(__file__).parent.parent / "assets" / "csv"
+
+
+@pytest.mark.parametrize("name", ["example_data_0.csv", "example_data_1.csv"])
+def test_bundled_examples(name):
+    with open(EXAMPLES / name, "rb") as buffer:
+        assert sniff_dialect(buffer) == Dialect(";", ",", '"', "utf-8")
+        assert buffer.tell() == 0
+
+
+def test_comma_separated_and_quoted():
+    buffer = BytesIO(b'name,value\n"Smith, John",1.5\n"Doe, Jane",2.25\n')
+    assert sniff_dialect(buffer) == Dialect(",", ".", '"', "utf-8")
+
+
+def test_single_quotes_and_tabs():
+    buffer = BytesIO(b"name\tvalue\n'a\tb'\t1,5\n'c'\t2,75\n")
+    assert sniff_dialect(buffer) == Dialect("\t", ",", "'", "utf-8")
+
+
+def test_legacy_encoding():
+    text = "miasto;ludność\nŁódź;672185\nGdańsk;486022\nKraków;804237\nWrocław;674132\n"
+    buffer = BytesIO(text.encode("cp1250"))
+    sniffed = sniff_dialect(buffer)
+    assert sniffed.column_separator == ";"
+    assert pd.read_csv(buffer, sep=";", encoding=sniffed.encoding)["miasto"].tolist() == \
+        ["Łódź", "Gdańsk", "Kraków", "Wrocław"]
+
+
+def test_compressed():
+    with open(EXAMPLES / "example_data_0.csv", "rb") as file:
+        buffer = BytesIO(gzip.compress(file.read()))
+    assert sniff_dialect(buffer) == Dialect(";", ",", '"', "utf-8")
+
+
+def test_unsure_fields_fall_back_to_the_given_ones():
+    # Every row splits evenly on both ";" and ","
+    buffer = BytesIO(b"a,b;c\n1,5;2\n3,5;4\n")
+    assert sniff_dialect(buffer).column_separator is None
+    assert resolve_dialect(buffer, ";", ",") == Dialect(";", ",", '"', "utf-8")
+    assert resolve_dialect(BytesIO(b""), ",", ".") == Dialect(",", ".", '"', "utf-8")
+
+
+def test_only_the_prefix_is_read(monkeypatch):
+    monkeypatch.setattr(dialect, "SNIFF_BYTES", 64)
+    # The multi-byte character cut at the end of the prefix is dropped
+    # together with its line
+    buffer = BytesIO(("a;b\n" + "1,5;ż\n" * 100).encode("utf-8"))
+    assert sniff_dialect(buffer) == Dialect(";", ",", '"', "utf-8")
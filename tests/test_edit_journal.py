@@ -0,0 +1,16 @@
+from eda.data_table.edit_journal import journal_edits, new_journal
+
+
+def test_new_journal():
+    assert new_journal(["a", "b"]) == {"keys": {"a": "a", "b": "b"}, "names": {"a": "a", "b": "b"}, "edits": []}
+
+    journal = new_journal(["a", "b"], replaced=True, names={"b": "renamed"})
+    assert journal["keys"] == journal["names"] == {"a": "a", "b": "renamed"}
+    assert journal["edits"] == [{"op": "replace"}]
+
+
+def test_journal_edits_only_sends_new_entries():
+    edits = [{"op": "delete_rows", "rows": [1]}, {"op": "cells", "row": 0, "values": {"a": 2}}]
+    assert journal_edits(edits).to_plotly_json()["operations"] == [
+        {"operation": "Extend", "location": ["edits"], "params": {"value": edits}},
+    ]
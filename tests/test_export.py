@@ -0,0 +1,67 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet
+import pytest
+from flask import Flask
+
+from eda.data_table import download
+from eda.data_table.download import _attachment, download_url, register_download_routes
+from eda.dataset.export import columnar_chunks, csv_chunks, frame_batches, frame_schema, record_batches
+from eda.dataset.versions import VersionStore
+
+
+@pytest.fixture
+def table() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "number": rng.normal(size=1000),
+        "text": [f'row "{row}"; with, separators' for row in range(1000)],
+        "missing": np.where(rng.random(1000) < 0.3, np.nan, 1.5),
+    })
+
+
+@pytest.mark.parametrize("rows", [1, 7, 1000, 5000])
+def test_csv_chunks_match_to_csv(table, rows):
+    chunks = csv_chunks(frame_batches(table, rows), ";", ",")
+    assert b"".join(chunks) == table.to_csv(sep=";", decimal=",").encode("utf-8")
+
+
+def test_csv_chunks_of_an_empty_table_keep_the_header(table):
+    empty = table.iloc[:0]
+    assert b"".join(csv_chunks(frame_batches(empty), ",", ".")) == empty.to_csv().encode("utf-8")
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "feather", "arrow"])
+def test_columnar_chunks_round_trip(table, file_format):
+    schema = frame_schema(table)
+    contents = b"".join(columnar_chunks(schema, record_batches(frame_batches(table, 300), schema), file_format))
+
+    if file_format == "parquet":
+        read = pa.parquet.read_table(BytesIO(contents))
+    else:
+        read = pa.ipc.open_file(pa.py_buffer(contents)).read_all()
+    pd.testing.assert_frame_equal(read.to_pandas(), table)
+
+
+def test_attachment_names():
+    assert _attachment("data.csv") == {"filename": "data.csv"}
+    assert _attachment("dane ż.csv") == {"filename": "dane z.csv", "filename*": "UTF-8''dane%20%C5%BC.csv"}
+
+
+def test_download_route_streams_a_version(table, monkeypatch):
+    store = VersionStore(1024 * 1024 * 1024)
+    monkeypatch.setattr(download, "version_store", store)
+    server = Flask(__name__)
+    register_download_routes(server)
+    version_id = store.add(table)
+
+    response = server.test_client().get("/" + download_url(version_id, "csv", ";", ",", {"text": "Tekst"}))
+
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == "attachment; filename=data.csv"
+    expected = table.rename(columns={"text": "Tekst"}).to_csv(sep=";", decimal=",")
+    assert response.data == expected.encode("utf-8")
+    assert server.test_client().get("/download/" + "0" * 32).status_code == 404
@@ -0,0 +1,80 @@
+import gzip
+import uuid
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from eda.file_input import file_input, upload
+from eda.file_input.file_input import _check_content_type
+
+
+def _parquet() -> bytes:
+    buffer = BytesIO()
+    pd.DataFrame({"a": [1, 2]}).to_parquet(buffer)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("content_type, contents", [
+    ("data:text/csv;base64", b"a,b\n1,2\n"),
+    ("data:application/octet-stream;base64", gzip.compress(b"a,b\n1,2\n")),
+    ("data:application/octet-stream;base64", _parquet()),
+    ("data:application/vnd.apache.parquet;base64", _parquet()),
+])
+def test_accepted_uploads(content_type, contents):
+    _check_content_type(content_type, BytesIO(contents))
+
+
+@pytest.mark.parametrize("content_type, contents", [
+    ("data:image/png;base64", b"\x89PNG\r\n\x1a\n"),
+    ("data:application/pdf;base64", b"%PDF-1.7"),
+])
+def test_rejected_uploads(content_type, contents):
+    with pytest.raises(TypeError, match="Invalid content type"):
+        _check_content_type(content_type, BytesIO(contents))
+
+
+def test_check_keeps_the_position_of_the_buffer():
+    buffer = BytesIO(_parquet())
+    _check_content_type("data:application/octet-stream;base64", buffer)
+    assert buffer.tell() == 0
+
+
+def _spool(tmp_path, monkeypatch, contents: bytes) -> dict:
+    monkeypatch.setattr(upload, "SPOOL_DIRECTORY", tmp_path)
+    upload_id = uuid.uuid4().hex
+    upload.spool_path(upload_id).write_bytes(contents)
+    return {"upload_id": upload_id, "filename": "data.csv", "size": len(contents), "type": "text/csv"}
+
+
+def test_spooled_upload_is_removed_when_it_fails_to_load(tmp_path, monkeypatch, dash_callback, triggered):
+    def fail(*args):
+        raise TypeError("Invalid file")
+    monkeypatch.setattr(file_input, "_load_upload", fail)
+    handle = _spool(tmp_path, monkeypatch, b"a,b\n1,2\n")
+
+    triggered("upload_handle.data", handle)
+    result = dash_callback("eda.file_input.file_input", "handle_file")(None, handle, ",", ".")
+
+    assert result[4].children == "Invalid file"
+    assert not upload.spool_path(handle["upload_id"]).exists()
+
+
+@pytest.mark.parametrize("content_type, contents, accepted", [
+    ("text/csv", b"a,b\n1,2\n", True),
+    ("", gzip.compress(b"a,b\n1,2\n"), True),
+    ("image/png", b"\x89PNG\r\n\x1a\n", False),
+    ("", b"%PDF-1.7", False),
+])
+def test_spooled_uploads_are_checked_like_data_urls(
+    tmp_path, monkeypatch, dash_callback, triggered, content_type, contents, accepted
+):
+    def load(*args):
+        raise TypeError("Loaded")
+    monkeypatch.setattr(file_input, "_load_upload", load)
+    handle = {**_spool(tmp_path, monkeypatch, contents), "type": content_type}
+
+    triggered("upload_handle.data", handle)
+    result = dash_callback("eda.file_input.file_input", "handle_file")(None, handle, ",", ".")
+
+    assert result[4].children == ("Loaded" if accepted else "Invalid content type")
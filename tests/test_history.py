@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+from dash.exceptions import PreventUpdate
+
+from eda.data_table.history import load_table, new_history, pushed, table_version, version_entry
+from eda.dataset import mapped
+from eda.dataset.versions import version_store
+
+DATA_TABLE = "eda.data_table.data_table"
+
+
+@pytest.fixture
+def columns() -> list[dict]:
+    return [{"id": "a", "name": "a"}, {"id": "b", "name": "b"}]
+
+
+@pytest.fixture
+def history(columns) -> dict:
+    version_id = version_store.add(pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]}))
+    return new_history(version_entry(version_id, {"a": "Liczbowy", "b": "Tekstowy"}, columns))
+
+
+def _edit(dash_callback, history, columns, edits) -> dict:
+    current = history["entries"][history["position"]]["version"]
+    version_edits = dash_callback(DATA_TABLE, "version_edits")
+    entry = version_edits({**table_version(current), "edits": edits}, {"a": "Liczbowy"}, columns)
+    return pushed(history, entry)
+
+
+def test_undo_and_redo_restore_versions(dash_callback, triggered, history, columns):
+    restore_version = dash_callback(DATA_TABLE, "restore_version")
+    history = _edit(dash_callback, history, columns, [{"op": "cells", "row": 0, "values": {"b": "edited"}}])
+    history = _edit(dash_callback, history, columns, [{"op": "delete_rows", "rows": [2]}])
+
+    triggered("undo.n_clicks", 1)
+    data, _, _, dataset, journal, history, version, status = restore_version(1, None, None, None, history, None)
+    assert data == [{"a": 1, "b": "edited"}, {"a": 2, "b": "y"}, {"a": 3, "b": "z"}]
+    assert history["position"] == 1 and dataset is None and status is None
+    assert journal["edits"] == [{"op": "replace"}] and version["edits"] == []
+
+    triggered("undo.n_clicks", 2)
+    data, *_, history, _, _ = restore_version(2, None, None, None, history, None)
+    assert data[0] == {"a": 1, "b": "x"}
+
+    triggered("undo.n_clicks", 3)
+    with pytest.raises(PreventUpdate):
+        restore_version(3, None, None, None, history, None)
+
+    triggered("redo.n_clicks", 1)
+    data, *_, history, _, _ = restore_version(3, 1, None, None, history, None)
+    assert data[0] == {"a": 1, "b": "edited"} and len(data) == 3
+
+    triggered("reset-all.n_clicks", 1)
+    data, *_, history, _, _ = restore_version(3, 1, None, 1, history, None)
+    assert data[0] == {"a": 1, "b": "x"}
+    assert len(history["entries"]) == 3 and history["position"] == 2
+
+
+def test_version_edits_waits_for_edits(dash_callback, history, columns):
+    version_edits = dash_callback(DATA_TABLE, "version_edits")
+    with pytest.raises(PreventUpdate):
+        version_edits(table_version(history["saved"]["version"]), {}, columns)
+
+
+def test_missing_versions_are_reported(dash_callback, triggered, history, columns):
+    restore_version = dash_callback(DATA_TABLE, "restore_version")
+    history = pushed(history, version_entry("0" * 32, {}, columns))
+    history = pushed(history, history["entries"][0])
+
+    triggered("undo.n_clicks", 1)
+    *_, status = restore_version(1, None, None, None, history, None)
+    assert status == "Ta wersja nie jest już dostępna"
+
+
+def test_load_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapped, "DATASET_DIRECTORY", tmp_path)
+    df = pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64"), "b": pd.Categorical(["x", "y", "x"])})
+    version = table_version(version_store.add(df))
+
+    loaded = load_table(version, None)
+    assert loaded["a"].dtype == "float64" and loaded["b"].dtype == object
+    pd.testing.assert_frame_equal(load_table(version, None, ["b"], 1), pd.DataFrame({"b": ["y", "x"]}, index=[1, 2]))
+
+    edited = load_table({**version, "edits": [{"op": "delete_rows", "rows": [0]}]}, None, ["a"])
+    assert edited["a"].isna().tolist() == [True, False]
+
+    dataset = mapped.store_dataframe(pd.DataFrame({"a": [1, 2, 3]}))
+    assert load_table(None, dataset.dataset_id, stop=2)["a"].tolist() == [1, 2]
+    with pytest.raises(TypeError):
+        load_table(table_version("0" * 32), None)
@@ -0,0 +1,51 @@
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.dataset import mapped
+from eda.dataset.mapped import MappedDataset, spool_dataset
+
+
+@pytest.fixture(autouse=True)
+def dataset_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapped, "DATASET_DIRECTORY", tmp_path)
+    return tmp_path
+
+
+def _spool(contents: bytes) -> MappedDataset:
+    return spool_dataset(BytesIO(contents), ",", ".")
+
+
+def _age(path, seconds: float) -> None:
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_stale_cleanup_keeps_files_of_live_manifests(dataset_directory):
+    dataset = _spool(b"a,b\n1,x\n2,y\n")
+    derived = dataset.derive(pd.DataFrame({"a": [10, 20]}))
+    unused = _spool(b"c\n1\n")
+
+    for path in dataset_directory.iterdir():
+        if path.stem != derived.dataset_id:
+            _age(path, mapped.STALE_DATASET_SECONDS + 60)
+
+    mapped._remove_stale_datasets()
+
+    assert not mapped.dataset_path(unused.dataset_id).exists()
+    reopened = MappedDataset(derived.dataset_id).read()
+    assert reopened["a"].tolist() == [10, 20] and reopened["b"].tolist() == ["x", "y"]
+
+
+def test_derive_refreshes_the_files_it_refers_to(dataset_directory):
+    dataset = _spool(b"a,b\n1,x\n2,y\n")
+    path = mapped.dataset_path(dataset.dataset_id)
+    _age(path, 3600)
+
+    dataset.derive(pd.DataFrame({"a": np.array([3, 4])}))
+
+    assert path.stat().st_mtime > time.time() - 60
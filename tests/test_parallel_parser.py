@@ -0,0 +1,48 @@
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.file_input.parallel_parser import read_csv_parallel, split_ranges
+
+
+def _csv(rows: int) -> bytes:
+    lines = ["id,note,mixed,number"]
+    for row in range(rows):
+        # Strings only appear near the end, so the first ranges infer numbers
+        mixed = f"x{row}" if row > rows * 0.9 else str(row)
+        number = "" if row % 7 == 0 else f"{row / 3:.4f}"
+        note = f'"line {row}\nwith ""quotes"", and a comma"' if row % 5 == 0 else f"plain {row}"
+        lines.append(f"{row},{note},{mixed},{number}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+def test_read_csv_parallel_matches_read_csv(workers):
+    contents = _csv(2000)
+    expected = pd.read_csv(BytesIO(contents), low_memory=False)
+
+    parsed = read_csv_parallel(np.frombuffer(contents, dtype=np.uint8), workers)
+
+    pd.testing.assert_frame_equal(parsed, expected)
+    assert parsed["mixed"].map(type).eq(str).all()
+
+
+def test_split_ranges_cut_outside_quoted_fields():
+    contents = _csv(500)
+    data = np.frombuffer(contents, dtype=np.uint8)
+    header_end = contents.index(b"\n") + 1
+
+    ranges = split_ranges(data, header_end, 6, '"')
+
+    assert ranges[0][0] == header_end and ranges[-1][1] == len(contents)
+    for start, _ in ranges[1:]:
+        # Every range starts a row, so the quotes before it are balanced
+        assert contents[:start].count(b'"') % 2 == 0
+        assert contents[start - 1:start] == b"\n"
+
+
+def test_read_csv_parallel_header_only():
+    parsed = read_csv_parallel(np.frombuffer(b"a,b\n", dtype=np.uint8), 4)
+    assert parsed.columns.tolist() == ["a", "b"] and parsed.empty
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.dataset import mapped, query
+from eda.dataset.mapped import store_dataframe
+from eda.dataset.query import FilterExpression, FilterTerm, parse_filter_query, query_page, query_rows, sorted_index
+
+
+@pytest.fixture(autouse=True)
+def dataset_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapped, "DATASET_DIRECTORY", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    values = rng.integers(-50, 50, 500).astype(float)
+    values[rng.random(500) < 0.1] = np.nan
+    return pd.DataFrame({
+        "number": values,
+        "name": rng.choice(["Alpha", "beta", "Gamma", "delta", None], 500),
+        "day": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, 500), unit="D"),
+    })
+
+
+@pytest.fixture
+def dataset(df):
+    return store_dataframe(df)
+
+
+def test_parse_filter_query():
+    assert parse_filter_query('{number} >= 5 && ({name} icontains "al" || !{name} is nil)') == FilterExpression("and", (
+        FilterTerm("number", "ge", "5", False),
+        FilterExpression("or", (
+            FilterTerm("name", "contains", "al", True),
+            FilterExpression("not", (FilterTerm("name", "is nil", None, False),)),
+        )),
+    ))
+    assert parse_filter_query("{a\\}b} is not blank") == \
+        FilterExpression("not", (FilterTerm("a}b", "is blank", None, False),))
+    assert parse_filter_query("{number} s= 'x y'") == FilterTerm("number", "eq", "x y", False)
+    for invalid in ("", "   ", "{number} >=", "{number} between 1", "({number} > 1", "5 > {number}"):
+        assert parse_filter_query(invalid) is None
+
+
+@pytest.mark.parametrize("filter_query, expected", [
+    ("{number} > 10", lambda df: df["number"] > 10),
+    ("{number} <= -3", lambda df: df["number"] <= -3),
+    ("{number} = 0", lambda df: df["number"] == 0),
+    ("{number} != 0", lambda df: df["number"] != 0),
+    ("{number} is nil", lambda df: df["number"].isna()),
+    ("{number} is even", lambda df: df["number"] % 2 == 0),
+    ("{name} contains a", lambda df: df["name"].str.contains("a", na=False)),
+    ("{name} icontains A", lambda df: df["name"].str.lower().str.contains("a", na=False)),
+    ("{name} = beta", lambda df: df["name"] == "beta"),
+    ("{day} >= 2024-02-01", lambda df: df["day"] >= pd.Timestamp("2024-02-01")),
+    ("{day} datestartswith 2024-01", lambda df: df["day"].astype(str).str.startswith("2024-01")),
+    (
+        "{number} > 0 && ({name} = Gamma || not {day} < 2024-02-15)",
+        lambda df: (df["number"] > 0) & ((df["name"] == "Gamma") | ~(df["day"] < pd.Timestamp("2024-02-15"))),
+    ),
+])
+def test_filter_matches_pandas_mask(df, dataset, filter_query, expected):
+    rows = query_rows(dataset, None, filter_query)
+    np.testing.assert_array_equal(rows, np.flatnonzero(expected(df).to_numpy(dtype=bool)))
+
+
+def test_range_filter_through_sorted_index(df, dataset):
+    sorted_index(dataset, "number")
+    for filter_query, expected in [
+        ("{number} < 7", df["number"] < 7),
+        ("{number} >= 7", df["number"] >= 7),
+        ("{number} != 7", df["number"] != 7),
+    ]:
+        np.testing.assert_array_equal(query_rows(dataset, None, filter_query), np.flatnonzero(expected))
+
+
+@pytest.mark.parametrize("sort_by", [
+    [{"column_id": "number", "direction": "asc"}],
+    [{"column_id": "number", "direction": "desc"}],
+    [{"column_id": "name", "direction": "desc"}, {"column_id": "number", "direction": "asc"}],
+])
+def test_sorted_filtered_rows_match_pandas(df, dataset, sort_by):
+    rows = query_rows(dataset, sort_by, "{day} < 2024-02-10")
+    expected = df[df["day"] < pd.Timestamp("2024-02-10")].sort_values(
+        by=[item["column_id"] for item in sort_by],
+        ascending=[item["direction"] == "asc" for item in sort_by],
+        kind="stable",
+        na_position="last",
+    )
+    np.testing.assert_array_equal(rows, expected.index.to_numpy())
+
+
+def test_query_page(df, dataset):
+    page, page_count = query_page(dataset, 2, 25, None, "{number} > 0")
+    expected = df[df["number"] > 0]
+    assert page_count == -(-len(expected) // 25)
+    pd.testing.assert_frame_equal(page, expected.iloc[50:75], check_dtype=False)
+    assert query_rows(dataset, None, "{number} >") is None
+
+
+def test_filters_without_numexpr(df, dataset, monkeypatch):
+    monkeypatch.setattr(query, "numexpr", None)
+    rows = query_rows(dataset, None, "{number} > 5 || {name} = delta")
+    np.testing.assert_array_equal(rows, np.flatnonzero((df["number"] > 5) | (df["name"] == "delta")))
@@ -0,0 +1,77 @@
+import pytest
+from flask import Flask
+
+from eda.dataset import sessions
+from eda.dataset.sessions import SESSION_COOKIE, MemoryAccountant, register_session_routes, session_digest
+
+
+@pytest.fixture
+def accountant(monkeypatch):
+    accountant = MemoryAccountant(100)
+    monkeypatch.setattr(sessions, "memory_accountant", accountant)
+    return accountant
+
+
+@pytest.fixture
+def client(accountant):
+    server = Flask(__name__)
+    register_session_routes(server)
+
+    @server.get("/charge/<int:size>")
+    def charge(size: int):
+        accountant.charge("test", size, size, lambda: evicted.append(size))
+        return ""
+
+    evicted = []
+    server.evicted = evicted
+    return server.test_client()
+
+
+def test_sessions_get_a_cookie(client):
+    response = client.get("/memory")
+    assert SESSION_COOKIE in response.headers["Set-Cookie"]
+
+
+def test_least_recently_used_artifacts_are_evicted(client):
+    client.set_cookie(SESSION_COOKIE, "a")
+    client.get("/charge/40")
+    client.get("/charge/50")
+    client.get("/charge/30")
+
+    assert client.application.evicted == [40]
+    assert client.get("/memory").json["bytes"] == 80
+
+
+def test_memory_shows_only_the_session_of_the_caller(client, accountant):
+    client.set_cookie(SESSION_COOKIE, "a")
+    client.get("/charge/40")
+    client.set_cookie(SESSION_COOKIE, "b")
+    client.get("/charge/10")
+
+    usage = client.get("/memory").json
+    assert usage == {"session_bytes": 100, "bytes": 10, "caches": {"test": 10}}
+    assert accountant.usage("a")["bytes"] == 40
+
+
+def test_memory_report_needs_the_operator_token(client, monkeypatch):
+    assert client.get("/memory/sessions").status_code == 404
+
+    monkeypatch.setattr(sessions, "MEMORY_REPORT_TOKEN", "secret")
+    assert client.get("/memory/sessions").status_code == 403
+    assert client.get("/memory/sessions", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+
+def test_memory_report_shows_every_session_by_digest(client, monkeypatch):
+    monkeypatch.setattr(sessions, "MEMORY_REPORT_TOKEN", "secret")
+    client.set_cookie(SESSION_COOKIE, "a")
+    client.get("/charge/40")
+    client.set_cookie(SESSION_COOKIE, "b")
+    client.get("/charge/10")
+
+    report = client.get("/memory/sessions", headers={"Authorization": "Bearer secret"}).json
+    assert report["bytes"] == 50
+    assert report["sessions"] == {
+        session_digest("a"): {"bytes": 40, "caches": {"test": 40}},
+        session_digest("b"): {"bytes": 10, "caches": {"test": 10}},
+    }
+    assert "a" not in report["sessions"]
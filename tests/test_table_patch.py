@@ -0,0 +1,77 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+from dash import Patch
+
+from eda.data_table.table_patch import table_update
+from eda.dataset.versions import version_store
+
+
+def _patched(records: list[dict], data: Patch) -> list[dict]:
+    records = copy.deepcopy(records)
+    for operation in data.to_plotly_json()["operations"]:
+        *path, last = operation["location"]
+        target = records
+        for location in path:
+            target = target[location]
+        if operation["operation"] == "Delete":
+            del target[last]
+        else:
+            assert operation["operation"] == "Assign"
+            target[last] = operation["params"]["value"]
+    return records
+
+
+@pytest.fixture
+def before() -> pd.DataFrame:
+    return pd.DataFrame({
+        "number": np.arange(20, dtype=float),
+        "text": [f"row {row}" for row in range(20)],
+    })
+
+
+def test_changed_cells_and_deleted_rows(before):
+    after = before.drop(index=[3, 11]).copy()
+    after.loc[[0, 15], "number"] = [100.0, np.nan]
+
+    update = table_update(before, after, ["number"])
+    assert isinstance(update.data, Patch)
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(_patched(before.to_dict("records"), update.data)),
+        after.reset_index(drop=True)
+    )
+    assert update.changes["columns"] == ["number"] and update.changes["rows"]
+    assert update.edits == [
+        {"op": "delete_rows", "rows": [3, 11]},
+        {"op": "cells", "row": 0, "values": {"number": 100.0}},
+        {"op": "cells", "row": 13, "values": {"number": pytest.approx(np.nan, nan_ok=True)}},
+    ]
+
+    # The journal entries make the same table from the stored version
+    version_id = version_store.add(before)
+    pd.testing.assert_frame_equal(
+        version_store.edited(version_id, update.edits),
+        after.reset_index(drop=True)
+    )
+
+
+def test_unchanged_values_are_not_sent(before):
+    after = before.copy()
+    after["text"] = after["text"].astype(object)
+    update = table_update(before, after, ["number", "text"], types=True)
+    assert update.data.to_plotly_json()["operations"] == []
+    assert update.edits == [] and update.changes["types"]
+
+
+def test_large_changes_send_the_records(before):
+    after = before.copy()
+    after["number"] = after["number"] * 2
+    update = table_update(before, after, ["number"])
+    assert update.data == after.to_dict("records")
+    assert update.edits == [{"op": "columns", "columns": ["number"]}]
+
+    update = table_update(before, after.iloc[::2], ["number"])
+    assert update.data == after.iloc[::2].to_dict("records")
+    assert update.edits == [{"op": "replace"}]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.dataset import transport
+from eda.dataset.transport import ARROW_PREFIX, decode_frame, encode_frame, frame_json
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame({
+        "1": [1, 2, 3],
+        "number": [0.5, np.nan, 2.25],
+        "text": ["a", None, "ż"],
+        "day": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+    })
+
+
+def test_arrow_round_trip(df):
+    payload = encode_frame(df)
+    assert payload.startswith(ARROW_PREFIX)
+    pd.testing.assert_frame_equal(decode_frame(payload), df)
+
+
+def test_columns_arrow_cannot_hold_fall_back_to_json():
+    df = pd.DataFrame({"mixed": [1, "a"]})
+    payload = encode_frame(df)
+    assert payload == frame_json(df)
+    assert decode_frame(payload)["mixed"].tolist() == [1, "a"]
+
+
+def test_json_without_pyarrow(df, monkeypatch):
+    monkeypatch.setattr(transport, "pa", None)
+    payload = encode_frame(df[["1", "number", "text"]])
+    assert not payload.startswith(ARROW_PREFIX)
+    decoded = decode_frame(payload)
+    assert decoded.columns.tolist() == ["1", "number", "text"]
+    pd.testing.assert_frame_equal(decoded, df[["1", "number", "text"]])
+    with pytest.raises(TypeError):
+        decode_frame(ARROW_PREFIX)
+
+
+def test_json_of_earlier_versions(df):
+    decoded = decode_frame(df[["number", "text"]].to_json())
+    pd.testing.assert_frame_equal(decoded, df[["number", "text"]])
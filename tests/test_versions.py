@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eda.dataset import cache, versions
+from eda.dataset.sessions import MemoryAccountant
+from eda.dataset.versions import BaseVersionStore, SharedVersionStore, VersionStore
+
+
+@pytest.fixture(params=["memory", "shared"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return VersionStore(1024 * 1024 * 1024)
+    return SharedVersionStore(tmp_path, 1024 * 1024 * 1024, 1024 * 1024 * 1024)
+
+
+@pytest.fixture
+def table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "number": np.arange(10, dtype=np.float64),
+        "text": [f"row {row}" for row in range(10)],
+        "category": pd.Categorical(["a", "b"] * 5),
+    })
+
+
+def test_add_and_frame(store, table):
+    version_id = store.add(table)
+    pd.testing.assert_frame_equal(store.frame(version_id), table)
+    pd.testing.assert_frame_equal(store.frame(version_id, ["text"]), table[["text"]])
+
+
+def test_exists(store, table, monkeypatch):
+    version_id = store.add(table)
+    # Only the manifest of a shared version is read
+    monkeypatch.setattr(store, "_column", None, raising=False)
+    assert store.exists(version_id)
+    assert not store.exists("0" * 32) and not store.exists(None)
+    with pytest.raises(TypeError):
+        BaseVersionStore()
+
+
+def test_unknown_versions_and_columns(store, table):
+    version_id = store.add(table)
+    assert store.frame("0" * 32) is None
+    assert store.frame(version_id, ["missing"]) is None
+    assert store.derive("0" * 32, drop=["text"]) is None
+
+
+def test_derive_shares_unchanged_columns(store, table):
+    version_id = store.add(table)
+    derived = store.derive(version_id, pd.DataFrame({"number": np.zeros(10)}), drop=["category"])
+
+    parent, child = store.frame(version_id), store.frame(derived)
+    assert child.columns.tolist() == ["number", "text"]
+    assert (child["number"] == 0).all() and (parent["number"] == table["number"]).all()
+    assert np.shares_memory(child["text"].to_numpy(), parent["text"].to_numpy())
+    assert child["text"].tolist() == table["text"].tolist()
+
+
+def test_apply_edits(store, table):
+    version_id = store.add(table)
+    edits = [
+        {"op": "cells", "row": 1, "values": {"text": "changed"}},
+        {"op": "delete_rows", "rows": [0]},
+        {"op": "rows", "rows": [1, 0]},
+        {"op": "delete_column", "column": "category"},
+    ]
+
+    edited = store.frame(store.apply_edits(version_id, edits))
+
+    assert edited.columns.tolist() == ["number", "text"]
+    assert edited["text"].tolist()[:2] == ["row 2", "changed"]
+    assert len(edited) == 2
+    pd.testing.assert_frame_equal(store.edited(version_id, edits), edited)
+
+
+def test_edited_columns_have_the_types_of_the_records(store, table):
+    version_id = store.add(table)
+    edits = [{"op": "cells", "row": 0, "values": {"number": 2.5, "text": 7}}]
+
+    edited = store.edited(version_id, edits)
+    records = table.to_dict("records")
+    records[0].update(edits[0]["values"])
+    for name in ["number", "text"]:
+        assert edited[name].dtype == pd.DataFrame(records)[name].dtype
+
+
+def test_shared_store_evicts_old_versions_and_keeps_live_files(tmp_path, table, monkeypatch):
+    monkeypatch.setattr(versions, "COLUMN_FILE_GRACE_SECONDS", -1)
+    store = SharedVersionStore(tmp_path, 1, 1024 * 1024)
+
+    first = store.add(table)
+    second = store.derive(first, pd.DataFrame({"number": np.ones(10)}))
+
+    assert store.frame(first) is None
+    derived = store.frame(second)
+    assert derived is not None and derived["text"].tolist() == table["text"].tolist()
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_versions_over_the_session_budget_are_spilled(tmp_path, table, monkeypatch):
+    monkeypatch.setattr(cache, "memory_accountant", MemoryAccountant(1))
+    store = VersionStore(1024 * 1024 * 1024, tmp_path)
+
+    first = store.add(table)
+    store.add(table.copy())
+
+    # All columns but the newest one
+    assert len(list(tmp_path.glob("*.pickle"))) == 2 * len(table.columns) - 1
+    pd.testing.assert_frame_equal(store.frame(first), table)
+
+
+def test_spilled_columns_stay_shared_between_versions(tmp_path, monkeypatch):
+    column_bytes = 8 * 1000
+    monkeypatch.setattr(cache, "memory_accountant", MemoryAccountant(2 * column_bytes + 1))
+    store = VersionStore(1024 * 1024 * 1024, tmp_path)
+    table = pd.DataFrame({"a": np.arange(1000.0), "b": np.arange(1000.0)})
+
+    parent = store.add(table)
+    child = store.derive(parent, pd.DataFrame({"b": np.ones(1000)}))
+
+    # Only the column evicted from memory is spilled
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+    child_frame = store.frame(child)
+    parent_frame = store.frame(parent)
+    assert np.shares_memory(child_frame["a"].to_numpy(), parent_frame["a"].to_numpy())
+    pd.testing.assert_frame_equal(parent_frame, table)
+    assert child_frame["b"].tolist() == [1.0] * 1000